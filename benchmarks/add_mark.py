@@ -0,0 +1,70 @@
+import timeit
+
+from tic_tac_toe.domain.data import (
+    WINNING_CELL_COMBINATIONS,
+    AddMarkCommand,
+    Bitboard,
+    Cell,
+    Game,
+    GameError,
+    GameIsOver,
+    GameOngoing,
+    GameOver,
+    Mark,
+    Player,
+)
+
+
+# the dict/frozenset implementation AddMarkCommand used before bitboards
+def legacy_add_mark(game: Game, mark: Mark) -> Game | GameError:
+    if isinstance(game, GameOver):
+        return GameIsOver(error="GAME_IS_OVER")
+    updated_marks = {**game.marks, mark.cell: mark.player}
+    cells_marked_by_player = frozenset(
+        [cell for cell, player in updated_marks.items() if player == mark.player]
+    )
+    is_player_winner = any(
+        combination.issubset(cells_marked_by_player)
+        for combination in WINNING_CELL_COMBINATIONS
+        if mark.cell in combination
+    )
+    if is_player_winner:
+        return GameOver(status="OVER", winner=mark.player, marks=updated_marks)
+    if updated_marks.keys() == set(Cell):
+        return GameOver(status="OVER", winner=None, marks=updated_marks)
+    return GameOngoing(
+        status="ONGOING",
+        next_player=Player.ONE if game.next_player == Player.TWO else Player.TWO,
+        marks=updated_marks,
+    )
+
+
+GAME = GameOngoing(
+    status="ONGOING",
+    next_player=Player.ONE,
+    marks={
+        Cell.TOP_LEFT: Player.TWO,
+        Cell.CENTER_CENTER: Player.ONE,
+        Cell.TOP_CENTER: Player.TWO,
+        Cell.BOTTOM_RIGHT: Player.ONE,
+    },
+)
+MARK = Mark(player=Player.ONE, cell=Cell.TOP_RIGHT)
+
+
+def main(number: int = 20_000) -> None:
+    add_mark = AddMarkCommand(mark=MARK)
+    board = Bitboard.from_game(GAME)
+    assert add_mark(GAME) == legacy_add_mark(GAME, MARK)
+    cases = {
+        "legacy (dict/frozenset)": lambda: legacy_add_mark(GAME, MARK),
+        "AddMarkCommand (bitboard)": lambda: add_mark(GAME),
+        "Bitboard.add_mark only": lambda: board.add_mark(MARK),
+    }
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        print(f"{name:<28} {best / number * 1e6:8.2f} us/move")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import asyncio
+import random
+import time
+import timeit
+
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
+from tic_tac_toe.domain.ai import Difficulty, SolvedGameTable
+from tic_tac_toe.domain.application import Application
+from tic_tac_toe.domain.data import Cell, GameOngoing, Player
+
+GAME = GameOngoing(
+    status="ONGOING",
+    next_player=Player.ONE,
+    marks={
+        Cell.TOP_LEFT: Player.TWO,
+        Cell.CENTER_CENTER: Player.ONE,
+        Cell.TOP_CENTER: Player.TWO,
+        Cell.BOTTOM_RIGHT: Player.ONE,
+    },
+)
+
+
+async def play_ai_move(application: Application, number: int) -> float:
+    repository = application.repository
+    started_at = time.perf_counter()
+    for _ in range(number):
+        await repository.insert(game_id="game", game=GAME)
+        await application.play_ai_move(game_id="game")
+    return time.perf_counter() - started_at
+
+
+def main(number: int = 20_000) -> None:
+    started_at = time.perf_counter()
+    table = SolvedGameTable.build()
+    elapsed = time.perf_counter() - started_at
+    print(f"{'build (' + str(len(table)) + ' positions)':<28} {elapsed * 1e3:8.2f} ms")
+
+    rng = random.Random(0)
+    for difficulty in Difficulty:
+        best = min(
+            timeit.repeat(
+                lambda: table.choose_mark(GAME, difficulty, rng),
+                number=number,
+                repeat=5,
+            )
+        )
+        print(
+            f"choose_mark ({difficulty.value.lower()}){'':<{15 - len(difficulty.value)}}"
+            f"{best / number * 1e6:8.2f} us/move"
+        )
+
+    # what every move would cost without the table: solve from the position
+    best = min(
+        timeit.repeat(
+            lambda: SolvedGameTable().choose_mark(GAME, Difficulty.HARD, rng),
+            number=number // 100,
+            repeat=5,
+        )
+    )
+    print(f"{'tree search (no table)':<28} {best / (number // 100) * 1e6:8.2f} us/move")
+
+    application = Application(
+        repository=InMemoryGameRepository(),
+        generate_game_id=lambda: "game",
+        solved_game_table=table,
+    )
+    elapsed = asyncio.run(play_ai_move(application, number))
+    print(f"{'play_ai_move (in memory)':<28} {elapsed / number * 1e6:8.2f} us/move")
+
+
+if __name__ == "__main__":
+    main()
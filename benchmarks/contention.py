@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from typing import Callable, Mapping, Optional
+from uuid import uuid4
+
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+    PostgresGameRepositoryPoolConfig,
+)
+from tic_tac_toe.domain.application import (
+    Application,
+    GameMailboxes,
+    GameNotFound,
+    GameRepository,
+    GameUpdateConflict,
+)
+from tic_tac_toe.domain.data import Game, GameError, GameIsOver, Mark
+
+
+class CountingGameRepository(GameRepository):
+    # updates are the connections taken from the pool, attempts the games read
+    # by them: more attempts than updates are writes lost to a concurrent one
+    def __init__(self, repository: GameRepository) -> None:
+        self.repository = repository
+        self.updates = 0
+        self.attempts = 0
+
+    async def insert(self, game_id: str, game: Game) -> None:
+        await self.repository.insert(game_id=game_id, game=game)
+
+    async def insert_many(self, games: Mapping[str, Game]) -> None:
+        await self.repository.insert_many(games=games)
+
+    async def get(self, game_id: str) -> Game | GameNotFound:
+        return await self.repository.get(game_id=game_id)
+
+    async def update(
+        self,
+        game_id: str,
+        fn: Callable[[Game], Game | GameError],
+        marks: Optional[list[Mark]] = None,
+    ) -> Game | GameError | GameNotFound | GameUpdateConflict:
+        self.updates += 1
+
+        def counted(game: Game) -> Game | GameError:
+            self.attempts += 1
+            return fn(game)
+
+        return await self.repository.update(game_id=game_id, fn=counted, marks=marks)
+
+
+async def play(
+    repository: PostgresGameRepository,
+    mailboxes: Optional[GameMailboxes],
+    games: int,
+    clients: int,
+) -> None:
+    # `clients` ask for an ai move of the same game until it is over
+    counting = CountingGameRepository(repository)
+    application = Application(
+        repository=counting, generate_game_id=lambda: uuid4().hex, mailboxes=mailboxes
+    )
+    game_ids = [game.id for game in await application.new_games(games)]
+    conflicts = 0
+
+    async def client(game_id: str) -> None:
+        nonlocal conflicts
+        while True:
+            result = await application.play_ai_move(game_id)
+            if isinstance(result, GameUpdateConflict):
+                conflicts += 1
+            elif isinstance(result, GameIsOver):
+                return
+
+    wait_ms = repository.get_pool_stats().get("requests_wait_ms", 0)
+    started_at = time.perf_counter()
+    await asyncio.gather(
+        *(client(game_id) for game_id in game_ids for _ in range(clients))
+    )
+    elapsed = time.perf_counter() - started_at
+    wait_ms = repository.get_pool_stats().get("requests_wait_ms", 0) - wait_ms
+    name = "mailboxes" if mailboxes is not None else "no mailboxes"
+    print(
+        f"{name:<13} {elapsed:6.2f}s  {counting.updates:6} connections  "
+        f"{counting.attempts:6} reads  {conflicts:5} conflicts  "
+        f"{wait_ms / 1000:7.1f}s waiting for a connection"
+    )
+
+
+async def main(games: int = 200, clients: int = 8, pool_size: int = 16) -> None:
+    db_uri = os.getenv("POSTGRES_REPOSITORY_DB_URI")
+    if db_uri is None:
+        print("skipped: POSTGRES_REPOSITORY_DB_URI is not set")
+        return
+    repository = PostgresGameRepository(
+        config=PostgresGameRepositoryConfig(
+            db_uri=db_uri,  # type: ignore
+            pool=PostgresGameRepositoryPoolConfig(min_size=pool_size),
+        )
+    )
+    await repository.open()
+    try:
+        print(f"{games} games, {clients} clients per game, {pool_size} connections")
+        await play(repository, None, games, clients)
+        await play(repository, GameMailboxes(), games, clients)
+    finally:
+        await repository.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+import timeit
+import tracemalloc
+from typing import Any, Callable, Literal, Optional
+
+from pydantic import BaseModel
+
+from tic_tac_toe.domain.data import (
+    AddMarkCommand,
+    Bitboard,
+    BoardMarks,
+    Cell,
+    GameOngoing,
+    Mark,
+    Player,
+    _board_marks,
+)
+
+
+# the pydantic models the domain used before slotted dataclasses
+class LegacyMark(BaseModel):
+    player: Player
+    cell: Cell
+
+
+class LegacyGameOngoing(BaseModel):
+    status: Literal["ONGOING"]
+    next_player: Player
+    marks: BoardMarks
+
+
+class LegacyGameOver(BaseModel):
+    status: Literal["OVER"]
+    winner: Optional[Player]
+    marks: BoardMarks
+
+
+class LegacyAddMarkCommand(BaseModel):
+    mark: LegacyMark
+
+    def __call__(self, game: Any) -> Any:
+        result = Bitboard.from_game(game).add_mark(self.mark)  # type: ignore
+        if not isinstance(result, Bitboard):
+            return result
+        # as Bitboard.to_game did
+        marks = _board_marks(result.ones, result.twos)
+        if result.next_player is None:
+            return LegacyGameOver.construct(
+                status="OVER", winner=result.winner, marks=marks
+            )
+        return LegacyGameOngoing.construct(
+            status="ONGOING", next_player=result.next_player, marks=marks
+        )
+
+
+MARKS = {
+    Cell.TOP_LEFT: Player.TWO,
+    Cell.CENTER_CENTER: Player.ONE,
+    Cell.TOP_CENTER: Player.TWO,
+    Cell.BOTTOM_RIGHT: Player.ONE,
+}
+GAME = GameOngoing(status="ONGOING", next_player=Player.ONE, marks=MARKS)
+LEGACY_GAME = LegacyGameOngoing(status="ONGOING", next_player=Player.ONE, marks=MARKS)
+
+
+def legacy_add_mark() -> Any:
+    # as Application.add_mark: the mark parsed from the request, a command
+    mark = LegacyMark(player=Player.ONE, cell=Cell.TOP_RIGHT)
+    return LegacyAddMarkCommand(mark=mark)(LEGACY_GAME)
+
+
+def add_mark() -> Any:
+    mark = Mark(player=Player.ONE, cell=Cell.TOP_RIGHT)
+    return AddMarkCommand(mark=mark)(GAME)
+
+
+def allocated(fn: Callable[[], Any], number: int = 1000) -> tuple[float, float]:
+    # -> bytes allocated by a call at most, and kept by its result
+    tracemalloc.start()
+    fn()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    results = [fn() for _ in range(number)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return peak - before, (after - before) / number
+
+
+def main(number: int = 20_000) -> None:
+    assert legacy_add_mark().dict() == {
+        name: getattr(add_mark(), name) for name in GameOngoing.__slots__
+    }
+    cases = {"pydantic models": legacy_add_mark, "slotted dataclasses": add_mark}
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        peak, kept = allocated(fn)
+        print(
+            f"{name:<20} {best / number * 1e6:6.2f} us/move"
+            f" {peak:6.0f} B peak {kept:6.0f} B kept"
+        )
+
+
+if __name__ == "__main__":
+    main()
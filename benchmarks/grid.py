@@ -0,0 +1,27 @@
+import timeit
+
+from tic_tac_toe.domain.data import Bitboard, Cell, CreateNewGameCommand, Mark, Player
+from tic_tac_toe.domain.grid import CreateNewGridGameCommand, GridMark
+
+VARIANTS = [(3, 3), (9, 5), (15, 5), (19, 5), (25, 5)]
+
+
+def main(number: int = 20_000) -> None:
+    # a mark in the center: none of the lines through it is complete, every
+    # one is checked, the worst case for the move
+    board = Bitboard.from_game(CreateNewGameCommand()())
+    mark = Mark(player=Player.ONE, cell=Cell.CENTER_CENTER)
+    cases = {"Bitboard.add_mark (3x3)": lambda: board.add_mark(mark)}
+    for size, k in VARIANTS:
+        grid = CreateNewGridGameCommand(size=size, k=k)()
+        grid_mark = GridMark(player=Player.ONE, row=size // 2, column=size // 2)
+        cases[
+            f"Grid.add_mark ({size}x{size}, {k})"
+        ] = lambda grid=grid, grid_mark=grid_mark: grid.add_mark(grid_mark)
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        print(f"{name:<28} {best / number * 1e6:8.2f} us/move")
+
+
+if __name__ == "__main__":
+    main()
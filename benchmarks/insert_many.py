@@ -0,0 +1,37 @@
+import asyncio
+import os
+import time
+from uuid import uuid4
+
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+)
+from tic_tac_toe.domain.data import CreateNewGameCommand
+
+
+async def main(count: int = 10_000) -> None:
+    db_uri = os.getenv("POSTGRES_REPOSITORY_DB_URI")
+    if db_uri is None:
+        print("skipped: POSTGRES_REPOSITORY_DB_URI is not set")
+        return
+    repository = PostgresGameRepository(
+        config=PostgresGameRepositoryConfig(db_uri=db_uri)  # type: ignore
+    )
+    game = CreateNewGameCommand()()
+
+    started_at = time.perf_counter()
+    for _ in range(count // 100):
+        await repository.insert(game_id=uuid4().hex, game=game)
+    elapsed = (time.perf_counter() - started_at) * 100
+    print(f"insert (x{count}, extrapolated)   {elapsed:8.2f} s")
+
+    games = {uuid4().hex: game for _ in range(count)}
+    started_at = time.perf_counter()
+    await repository.insert_many(games=games)
+    elapsed = time.perf_counter() - started_at
+    print(f"insert_many (x{count})            {elapsed:8.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
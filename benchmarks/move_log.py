@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+from uuid import uuid4
+
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+    PostgresGameRepositoryPoolConfig,
+    PostgresMoveLogConfig,
+    PostgresMoveLogGameRepository,
+)
+from tic_tac_toe.domain.application import GameNotFound, GameUpdateConflict
+from tic_tac_toe.domain.data import (
+    AddMarkCommand,
+    Cell,
+    CreateNewGameCommand,
+    Game,
+    GameError,
+    GameIsOver,
+    GameOver,
+    Mark,
+)
+
+
+async def mark_first_free_cell(
+    repository: PostgresGameRepository, game_id: str
+) -> Game | GameError | GameNotFound | GameUpdateConflict:
+    # the marks played are given, as the application does
+    marks: list[Mark] = []
+
+    def fn(game: Game) -> Game | GameError:
+        if isinstance(game, GameOver):
+            marks.clear()
+            return GameIsOver(error="GAME_IS_OVER")
+        cell = next(cell for cell in Cell if cell not in game.marks)
+        marks[:] = [Mark(player=game.next_player, cell=cell)]
+        return AddMarkCommand(mark=marks[0])(game)
+
+    return await repository.update(game_id, fn, marks)
+
+
+async def wal_position(repository: PostgresGameRepository) -> int:
+    async with repository.connection() as conn:
+        cursor = await conn.execute(
+            "SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), '0/0')::BIGINT"
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+        return int(row[0])
+
+
+async def play(repository: PostgresGameRepository, count: int) -> None:
+    game = CreateNewGameCommand()()
+    game_ids = [uuid4().hex for _ in range(count)]
+    await repository.insert_many(games={game_id: game for game_id in game_ids})
+
+    wal_before = await wal_position(repository)
+    started_at = time.perf_counter()
+    updates = 0
+    # games are played concurrently, one move at a time until they are over
+    while game_ids:
+        results = await asyncio.gather(
+            *(mark_first_free_cell(repository, game_id) for game_id in game_ids)
+        )
+        updates += len(game_ids)
+        game_ids = [
+            game_id
+            for game_id, result in zip(game_ids, results)
+            if not isinstance(result, GameOver)
+        ]
+    elapsed = time.perf_counter() - started_at
+    wal = await wal_position(repository) - wal_before
+    print(
+        f"{type(repository).__name__:<32} {elapsed / updates * 1e6:8.1f} us/update"
+        f"  {wal / updates:8.1f} WAL bytes/update"
+    )
+
+
+async def main(count: int = 2_000) -> None:
+    db_uri = os.getenv("POSTGRES_REPOSITORY_DB_URI")
+    if db_uri is None:
+        print("skipped: POSTGRES_REPOSITORY_DB_URI is not set")
+        return
+    config = PostgresGameRepositoryConfig(
+        db_uri=db_uri,  # type: ignore
+        pool=PostgresGameRepositoryPoolConfig(min_size=16),
+    )
+    for repository in [
+        PostgresGameRepository(config=config),
+        PostgresMoveLogGameRepository(config=config, move_log=PostgresMoveLogConfig()),
+    ]:
+        await repository.open()
+        try:
+            await play(repository, count)
+        finally:
+            await repository.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
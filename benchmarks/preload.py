@@ -0,0 +1,87 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+PORT = 8765
+WORKERS = 3
+
+
+def memory(pid: int) -> dict[str, int]:
+    # kB: Pss splits the pages shared between processes among them
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        return {
+            line.split(":")[0]: int(line.split()[1])
+            for line in file
+            if line.startswith(("Rss:", "Pss:"))
+        }
+
+
+def children(pid: int) -> list[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as file:
+        return [int(child) for child in file.read().split()]
+
+
+def serve(preload: bool) -> None:
+    env = {
+        **os.environ,
+        "HTTP_PORT": str(PORT),
+        "GUNICORN_WORKERS": str(WORKERS),
+        "GUNICORN_PRELOAD": "1" if preload else "0",
+    }
+    started_at = time.perf_counter()
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+        + ["tic_tac_toe.__main__:asgi()"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    ready: list[float] = []
+
+    def read_log() -> None:
+        assert master.stderr is not None
+        for line in master.stderr:
+            if "Application startup complete" in line:
+                ready.append(time.perf_counter() - started_at)
+
+    threading.Thread(target=read_log, daemon=True).start()
+    while True:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{PORT}/games/missing")
+        except urllib.error.HTTPError:
+            # 404: served
+            break
+        except urllib.error.URLError:
+            time.sleep(0.005)
+    first_response = time.perf_counter() - started_at
+    while len(ready) < WORKERS:
+        time.sleep(0.005)
+    workers = [memory(pid) for pid in children(master.pid)]
+    master.send_signal(signal.SIGTERM)
+    master.wait()
+
+    print(
+        f"preload={'on ' if preload else 'off'}"
+        f" first response {first_response:5.2f}s"
+        f" all workers ready {ready[-1]:5.2f}s"
+        f" rss/worker {sum(w['Rss'] for w in workers) / len(workers) / 1024:5.1f}MB"
+        f" pss/worker {sum(w['Pss'] for w in workers) / len(workers) / 1024:5.1f}MB"
+    )
+
+
+def main() -> None:
+    if os.getenv("POSTGRES_REPOSITORY_DB_URI") is None:
+        print("skipped: POSTGRES_REPOSITORY_DB_URI is not set")
+        return
+    for preload in (False, True, False, True):
+        serve(preload)
+
+
+if __name__ == "__main__":
+    main()
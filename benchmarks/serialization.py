@@ -0,0 +1,64 @@
+import json
+import timeit
+from functools import partial
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_cloned_field, create_response_field
+
+from tic_tac_toe.adapters.serialization import decode_game, dumps, encode_game, loads
+from tic_tac_toe.domain.application import GameAggregate
+from tic_tac_toe.domain.data import Cell, GameOngoing, Player
+from tic_tac_toe.entrypoints import schemas
+from tic_tac_toe.entrypoints.asgi import GameJSONResponse
+
+GAME = GameOngoing(
+    status="ONGOING",
+    next_player=Player.ONE,
+    marks={
+        Cell.TOP_LEFT: Player.TWO,
+        Cell.CENTER_CENTER: Player.ONE,
+        Cell.TOP_CENTER: Player.TWO,
+        Cell.BOTTOM_RIGHT: Player.ONE,
+    },
+)
+AGGREGATE = GameAggregate(id="6bd0831e6e164d448630551d800e3591", state=GAME)
+STORED = json.dumps(jsonable_encoder(GAME))
+
+
+FIELD = create_cloned_field(
+    create_response_field(name="response", type_=schemas.GameAggregate)
+)
+
+
+def legacy_response() -> bytes:
+    # what fastapi.routing.serialize_response does for `response_model`
+    value, _ = FIELD.validate(jsonable_encoder(AGGREGATE), {}, loc=("response",))
+    return JSONResponse(content=jsonable_encoder(value)).body
+
+
+def legacy_load() -> schemas.GameOngoing | schemas.GameOver:
+    data = json.loads(STORED)
+    if data["status"] == "ONGOING":
+        return schemas.GameOngoing(**data)
+    return schemas.GameOver(**data)
+
+
+def main(number: int = 5_000) -> None:
+    assert loads(legacy_response()) == loads(GameJSONResponse(content=AGGREGATE).body)
+    assert encode_game(legacy_load()) == encode_game(decode_game(loads(STORED)))
+    cases = {
+        "response: response_model": legacy_response,
+        "response: GameJSONResponse": partial(GameJSONResponse, content=AGGREGATE),
+        "db write: jsonable_encoder": lambda: json.dumps(jsonable_encoder(GAME)),
+        "db write: dumps": lambda: dumps(encode_game(GAME)),
+        "db read: json + pydantic": legacy_load,
+        "db read: loads + decode_game": lambda: decode_game(loads(STORED)),
+    }
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        print(f"{name:<30} {best / number * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
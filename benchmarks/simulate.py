@@ -0,0 +1,42 @@
+import random
+import time
+
+import numpy as np
+
+from tic_tac_toe.domain.data import (
+    AddMarkCommand,
+    Cell,
+    CreateNewGameCommand,
+    GameOngoing,
+    Mark,
+)
+from tic_tac_toe.domain.simulate import play_random
+
+
+def add_mark_command_games(count: int) -> float:
+    # -> random games per second, one AddMarkCommand per move
+    started_at = time.perf_counter()
+    for _ in range(count):
+        game = CreateNewGameCommand()()
+        while isinstance(game, GameOngoing):
+            cell = random.choice([cell for cell in Cell if cell not in game.marks])
+            mark = Mark(player=game.next_player, cell=cell)
+            game = AddMarkCommand(mark=mark)(game)  # type: ignore
+    return count / (time.perf_counter() - started_at)
+
+
+def simulated_games(count: int) -> float:
+    rng = np.random.default_rng()
+    started_at = time.perf_counter()
+    play_random(count, rng).counts()
+    return count / (time.perf_counter() - started_at)
+
+
+def main() -> None:
+    print(f"AddMarkCommand      {add_mark_command_games(20_000):12,.0f} games/s")
+    for count in (10_000, 100_000, 1_000_000):
+        print(f"simulate {count:>10,} {simulated_games(count):12,.0f} games/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import random
+import time
+from uuid import uuid4
+
+import psycopg
+
+from tic_tac_toe.adapters.repository.postgres import load_game
+from tic_tac_toe.adapters.serialization import dumps, encode_game
+from tic_tac_toe.domain.data import Bitboard
+from tic_tac_toe.domain.transitions import TransitionTable
+
+TABLES = {
+    "jsonb": "CREATE TABLE bench_game_jsonb (id TEXT PRIMARY KEY, state JSONB)",
+    "board": "CREATE TABLE bench_game_board (id TEXT PRIMARY KEY, board INTEGER)",
+}
+
+
+def main(count: int = 1_000_000, reads: int = 5_000) -> None:
+    db_uri = os.getenv("POSTGRES_REPOSITORY_DB_URI")
+    if db_uri is None:
+        print("skipped: POSTGRES_REPOSITORY_DB_URI is not set")
+        return
+
+    # random positions among the ones reachable from a new game
+    positions = list(TransitionTable.build().transitions)
+    encoded = {
+        board: (dumps(encode_game(Bitboard.decode(board).to_game())).decode(), board)
+        for board in positions
+    }
+    games = [(uuid4().hex, random.choice(positions)) for _ in range(count)]
+    ids = random.sample([game_id for game_id, _ in games], reads)
+
+    with psycopg.connect(db_uri, autocommit=True) as conn:
+        for storage_format, create_table in TABLES.items():
+            table = f"bench_game_{storage_format}"
+            column = "state" if storage_format == "jsonb" else "board"
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(create_table)
+            with conn.cursor().copy(f"COPY {table} (id, {column}) FROM STDIN") as copy:
+                for game_id, board in games:
+                    value = encoded[board][0 if storage_format == "jsonb" else 1]
+                    copy.write_row((game_id, value))
+            conn.execute(f"VACUUM ANALYZE {table}")
+            table_size, total_size = conn.execute(
+                f"SELECT pg_table_size('{table}'), pg_total_relation_size('{table}')"
+            ).fetchone()  # type: ignore
+
+            started_at = time.perf_counter()
+            for game_id in ids:
+                row = conn.execute(
+                    f"SELECT {column} FROM {table} WHERE id = %s", [game_id]
+                ).fetchone()
+                state, board = (row[0], None) if column == "state" else (None, row[0])
+                load_game(state, board)
+            elapsed = (time.perf_counter() - started_at) / reads
+
+            print(
+                f"{storage_format:<6} table {table_size / 2**20:7.1f} MiB"
+                f"  with indexes {total_size / 2**20:7.1f} MiB"
+                f"  read + decode {elapsed * 1e6:7.1f} us"
+            )
+            conn.execute(f"DROP TABLE {table}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import time
+import timeit
+import tracemalloc
+
+from tic_tac_toe.domain.data import AddMarkCommand, Cell, GameOngoing, Mark, Player
+from tic_tac_toe.domain.transitions import TransitionTable
+
+GAME = GameOngoing(
+    status="ONGOING",
+    next_player=Player.ONE,
+    marks={
+        Cell.TOP_LEFT: Player.TWO,
+        Cell.CENTER_CENTER: Player.ONE,
+        Cell.TOP_CENTER: Player.TWO,
+        Cell.BOTTOM_RIGHT: Player.ONE,
+    },
+)
+MARK = Mark(player=Player.ONE, cell=Cell.TOP_RIGHT)
+
+
+def main(number: int = 20_000) -> None:
+    started_at = time.perf_counter()
+    transition_table = TransitionTable.build()
+    elapsed = time.perf_counter() - started_at
+
+    # tracing allocations slows the build down: measure it separately
+    tracemalloc.start()
+    TransitionTable.build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"positions                    {len(transition_table):8d}")
+    print(f"build time                   {elapsed * 1e3:8.0f} ms")
+    print(f"peak memory during build     {peak / 2**20:8.1f} MiB")
+
+    assert transition_table.add_mark(GAME, MARK) == AddMarkCommand(mark=MARK)(GAME)
+    cases = {
+        "AddMarkCommand": lambda: AddMarkCommand(mark=MARK)(GAME),
+        "TransitionTable.add_mark": lambda: transition_table.add_mark(GAME, MARK),
+    }
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        print(f"{name:<28} {best / number * 1e6:8.2f} us/move")
+
+
+if __name__ == "__main__":
+    main()
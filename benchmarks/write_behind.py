@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+from uuid import uuid4
+
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+    PostgresGameRepositoryPoolConfig,
+)
+from tic_tac_toe.adapters.repository.write_behind import (
+    WriteBehindGameRepository,
+    WriteBehindGameRepositoryConfig,
+)
+from tic_tac_toe.domain.application import GameRepository
+from tic_tac_toe.domain.data import CreateNewGameCommand
+
+
+async def create_games(
+    repository: GameRepository, concurrency: int, count: int
+) -> float:
+    # -> games created per second, each client awaits its insert
+    game = CreateNewGameCommand()()
+
+    async def client() -> None:
+        for _ in range(count // concurrency):
+            await repository.insert(game_id=uuid4().hex, game=game)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return count / (time.perf_counter() - started_at)
+
+
+async def main(concurrency: int = 16, count: int = 20_000) -> None:
+    db_uri = os.getenv("POSTGRES_REPOSITORY_DB_URI")
+    if db_uri is None:
+        print("skipped: POSTGRES_REPOSITORY_DB_URI is not set")
+        return
+    repository = PostgresGameRepository(
+        config=PostgresGameRepositoryConfig(
+            db_uri=db_uri,  # type: ignore
+            pool=PostgresGameRepositoryPoolConfig(min_size=concurrency),
+        )
+    )
+    await repository.open()
+    try:
+        created = await create_games(repository, concurrency, count)
+        print(f"insert (x{count}, {concurrency} clients)        {created:8.0f} games/s")
+
+        write_behind = WriteBehindGameRepository(
+            repository=repository, config=WriteBehindGameRepositoryConfig()
+        )
+        await write_behind.open()
+        started_at = time.perf_counter()
+        created = await create_games(write_behind, concurrency, count)
+        # until every game is inserted
+        await write_behind.close()
+        inserted = count / (time.perf_counter() - started_at)
+        print(
+            f"write behind (x{count}, {concurrency} clients)  {created:8.0f} games/s, "
+            f"{inserted:.0f} games/s inserted"
+        )
+    finally:
+        await repository.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,14 @@
+#!/usr/bin/env bash
+
+GAME=$(http POST :8080/games --print b)
+GAME_ID=$(echo $GAME | jq -r '.id' )
+
+echo '[
+    {"player": 1, "cell": "CENTER_CENTER"},
+    {"player": 2, "cell": "TOP_CENTER"},
+    {"player": 1, "cell": "TOP_LEFT"},
+    {"player": 2, "cell": "BOTTOM_RIGHT"},
+    {"player": 1, "cell": "BOTTOM_LEFT"},
+    {"player": 2, "cell": "TOP_RIGHT"},
+    {"player": 1, "cell": "CENTER_LEFT"}
+]' | http POST :8080/games/$GAME_ID/marks
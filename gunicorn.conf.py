@@ -1,7 +1,26 @@
+import gc
 import os
 
 worker_class = "uvicorn.workers.UvicornWorker"
-workers = 3
+workers = int(os.getenv("GUNICORN_WORKERS", "3"))
 accesslog = "-"
 errorlog = "-"
 bind = f"0.0.0.0:{os.getenv('HTTP_PORT')}"
+# the application is built once by the master, workers are forked from it
+preload_app = os.getenv("GUNICORN_PRELOAD") == "1"
+
+if os.getenv("GAME_CACHE") == "1" and workers != 1:
+    # each worker would cache games updated by the others
+    raise ValueError("GAME_CACHE=1 requires GUNICORN_WORKERS=1")
+
+if os.getenv("GAME_WRITE_BEHIND") == "1" and workers != 1:
+    # the other workers wouldn't find a new game until it is inserted
+    raise ValueError("GAME_WRITE_BEHIND=1 requires GUNICORN_WORKERS=1")
+
+
+def when_ready(server):
+    # called by the master before it forks the workers
+    if preload_app:
+        # Objects of the application are never collected: the collector
+        # would write to their pages, copied by every worker then.
+        gc.freeze()
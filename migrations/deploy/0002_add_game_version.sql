@@ -0,0 +1,8 @@
+-- Deploy tic-tac-toe:0002_add_game_version to pg
+-- requires: 0001_add_game_table
+
+BEGIN;
+
+ALTER TABLE game ADD COLUMN version BIGINT NOT NULL DEFAULT 0;
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- Deploy tic-tac-toe:0003_add_game_board to pg
+-- requires: 0002_add_game_version
+
+BEGIN;
+
+-- the packed game (see tic_tac_toe.domain.data.Bitboard.encode), replaces state
+ALTER TABLE game ADD COLUMN board INTEGER;
+ALTER TABLE game ALTER COLUMN state DROP NOT NULL;
+ALTER TABLE game ADD CONSTRAINT game_state_or_board_not_null
+    CHECK (state IS NOT NULL OR board IS NOT NULL);
+
+COMMIT;
@@ -0,0 +1,20 @@
+-- Deploy tic-tac-toe:0004_add_game_move to pg
+-- requires: 0003_add_game_board
+
+BEGIN;
+
+-- every mark added to a game, in the order it was played
+CREATE TABLE game_move (
+    game_id TEXT NOT NULL REFERENCES game (id) ON DELETE CASCADE,
+    -- 1 for the first move of the game
+    number SMALLINT NOT NULL,
+    player SMALLINT NOT NULL,
+    -- index of the cell, row by row from TOP_LEFT (0) to BOTTOM_RIGHT (8)
+    cell SMALLINT NOT NULL,
+    PRIMARY KEY (game_id, number)
+);
+
+-- moves already included in the game stored in state or board
+ALTER TABLE game ADD COLUMN snapshot_moves SMALLINT NOT NULL DEFAULT 0;
+
+COMMIT;
@@ -0,0 +1,39 @@
+-- Deploy tic-tac-toe:0005_add_game_listing to pg
+-- requires: 0004_add_game_move
+
+BEGIN;
+
+-- games are filtered on these columns instead of on state or board: they
+-- are computed from both formats, and can be indexed
+ALTER TABLE game ADD COLUMN status TEXT NOT NULL GENERATED ALWAYS AS (
+    CASE
+        WHEN board IS NULL THEN state ->> 'status'
+        WHEN (board >> 18) & 3 = 0 THEN 'OVER'
+        ELSE 'ONGOING'
+    END
+) STORED;
+ALTER TABLE game ADD COLUMN winner SMALLINT GENERATED ALWAYS AS (
+    CASE
+        WHEN board IS NULL THEN (state ->> 'winner')::SMALLINT
+        ELSE NULLIF((board >> 20) & 3, 0)
+    END
+) STORED;
+
+-- existing games get the time of the migration
+ALTER TABLE game ADD COLUMN created_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE game ADD COLUMN finished_at TIMESTAMPTZ;
+UPDATE game SET finished_at = now() WHERE status = 'OVER';
+
+-- Games are listed newest first, by creation or end time: the id breaks
+-- ties, and is the second half of the cursor of a page. Indexed columns
+-- only change when a game is over, the moves before stay HOT updates.
+CREATE INDEX game_created_at_idx ON game (created_at, id);
+CREATE INDEX game_status_created_at_idx ON game (status, created_at, id);
+CREATE INDEX game_winner_created_at_idx ON game (winner, created_at, id)
+    WHERE winner IS NOT NULL;
+CREATE INDEX game_finished_at_idx ON game (finished_at, id)
+    WHERE finished_at IS NOT NULL;
+CREATE INDEX game_winner_finished_at_idx ON game (winner, finished_at, id)
+    WHERE winner IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- Deploy tic-tac-toe:0006_add_game_stat to pg
+-- requires: 0005_add_game_listing
+
+BEGIN;
+
+-- counters added to by every worker (see tic_tac_toe.domain.stats)
+CREATE TABLE game_stat (
+    name TEXT NOT NULL PRIMARY KEY,
+    value BIGINT NOT NULL
+);
+
+COMMIT;
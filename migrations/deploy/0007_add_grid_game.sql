@@ -0,0 +1,21 @@
+-- Deploy tic-tac-toe:0007_add_grid_game to pg
+-- requires: 0006_add_game_stat
+
+BEGIN;
+
+-- games on grids of any size (see tic_tac_toe.domain.grid.Grid): the marks
+-- of each player are the bits of a number, one per cell, row by row
+CREATE TABLE grid_game (
+    id TEXT NOT NULL PRIMARY KEY,
+    size SMALLINT NOT NULL,
+    k SMALLINT NOT NULL,
+    ones NUMERIC NOT NULL,
+    twos NUMERIC NOT NULL,
+    -- NULL once the game is over
+    next_player SMALLINT,
+    winner SMALLINT,
+    version BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMIT;
@@ -0,0 +1,7 @@
+-- Revert tic-tac-toe:0002_add_game_version from pg
+
+BEGIN;
+
+ALTER TABLE game DROP COLUMN version;
+
+COMMIT;
@@ -0,0 +1,37 @@
+-- Revert tic-tac-toe:0003_add_game_board from pg
+
+BEGIN;
+
+-- unpack games stored only as board back into state
+UPDATE game
+SET state = jsonb_build_object(
+    'status', CASE WHEN (board >> 18) & 3 = 0 THEN 'OVER' ELSE 'ONGOING' END,
+    'marks', COALESCE(
+        (
+            SELECT jsonb_object_agg(
+                cell,
+                CASE WHEN board & (1 << (position - 1)::INTEGER) <> 0 THEN 1 ELSE 2 END
+            )
+            FROM unnest(ARRAY[
+                'TOP_LEFT', 'TOP_CENTER', 'TOP_RIGHT',
+                'CENTER_LEFT', 'CENTER_CENTER', 'CENTER_RIGHT',
+                'BOTTOM_LEFT', 'BOTTOM_CENTER', 'BOTTOM_RIGHT'
+            ]) WITH ORDINALITY AS cells (cell, position)
+            WHERE board & (
+                (1 << (position - 1)::INTEGER) | (1 << (position + 8)::INTEGER)
+            ) <> 0
+        ),
+        '{}'::JSONB
+    )
+) || CASE
+    WHEN (board >> 18) & 3 = 0
+    THEN jsonb_build_object('winner', NULLIF((board >> 20) & 3, 0))
+    ELSE jsonb_build_object('next_player', (board >> 18) & 3)
+END
+WHERE state IS NULL;
+
+ALTER TABLE game DROP CONSTRAINT game_state_or_board_not_null;
+ALTER TABLE game ALTER COLUMN state SET NOT NULL;
+ALTER TABLE game DROP COLUMN board;
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Revert tic-tac-toe:0004_add_game_move from pg
+
+BEGIN;
+
+-- moves not in a snapshot yet are lost: stop using the move log and run
+-- `python -m tic_tac_toe snapshot-games` before reverting
+ALTER TABLE game DROP COLUMN snapshot_moves;
+DROP TABLE game_move;
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Revert tic-tac-toe:0005_add_game_listing from pg
+
+BEGIN;
+
+-- the indexes are dropped with their columns
+ALTER TABLE game DROP COLUMN finished_at;
+ALTER TABLE game DROP COLUMN created_at;
+ALTER TABLE game DROP COLUMN winner;
+ALTER TABLE game DROP COLUMN status;
+
+COMMIT;
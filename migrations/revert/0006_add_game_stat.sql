@@ -0,0 +1,7 @@
+-- Revert tic-tac-toe:0006_add_game_stat from pg
+
+BEGIN;
+
+DROP TABLE game_stat;
+
+COMMIT;
@@ -0,0 +1,7 @@
+-- Revert tic-tac-toe:0007_add_grid_game from pg
+
+BEGIN;
+
+DROP TABLE grid_game;
+
+COMMIT;
@@ -0,0 +1,7 @@
+-- Verify tic-tac-toe:0002_add_game_version on pg
+
+BEGIN;
+
+SELECT version FROM game WHERE FALSE;
+
+ROLLBACK;
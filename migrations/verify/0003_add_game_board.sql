@@ -0,0 +1,7 @@
+-- Verify tic-tac-toe:0003_add_game_board on pg
+
+BEGIN;
+
+SELECT board FROM game WHERE FALSE;
+
+ROLLBACK;
@@ -0,0 +1,8 @@
+-- Verify tic-tac-toe:0004_add_game_move on pg
+
+BEGIN;
+
+SELECT game_id, number, player, cell FROM game_move WHERE FALSE;
+SELECT snapshot_moves FROM game WHERE FALSE;
+
+ROLLBACK;
@@ -0,0 +1,7 @@
+-- Verify tic-tac-toe:0005_add_game_listing on pg
+
+BEGIN;
+
+SELECT status, winner, created_at, finished_at FROM game WHERE FALSE;
+
+ROLLBACK;
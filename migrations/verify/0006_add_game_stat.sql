@@ -0,0 +1,7 @@
+-- Verify tic-tac-toe:0006_add_game_stat on pg
+
+BEGIN;
+
+SELECT name, value FROM game_stat WHERE FALSE;
+
+ROLLBACK;
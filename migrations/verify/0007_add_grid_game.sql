@@ -0,0 +1,8 @@
+-- Verify tic-tac-toe:0007_add_grid_game on pg
+
+BEGIN;
+
+SELECT id, size, k, ones, twos, next_player, winner, version, created_at
+FROM grid_game WHERE FALSE;
+
+ROLLBACK;
@@ -1,27 +1,382 @@
+import argparse
+import asyncio
 import os
+import random
+import re
+import sys
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache, partial
+from typing import AsyncIterator, BinaryIO, Iterator, Optional, Sequence, TypeVar
 from uuid import uuid4
 
 from fastapi import FastAPI
-from pydantic import PostgresDsn
+from psycopg.errors import UniqueViolation
+from pydantic import BaseModel, PostgresDsn
 
+from tic_tac_toe.adapters.metrics import REGISTRY, Gauge
+from tic_tac_toe.adapters.profiling import ProfilingConfig, StackSampler
+from tic_tac_toe.adapters.repository.cache import (
+    CachingGameRepository,
+    CachingGameRepositoryConfig,
+)
+from tic_tac_toe.adapters.repository.grid import PostgresGridGameRepository
+from tic_tac_toe.adapters.repository.instrumented import InstrumentedGameRepository
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
 from tic_tac_toe.adapters.repository.postgres import (
     PostgresGameRepository,
     PostgresGameRepositoryConfig,
+    PostgresGameRepositoryPoolConfig,
+    PostgresMoveLogConfig,
+    PostgresMoveLogGameRepository,
+    StorageFormat,
+)
+from tic_tac_toe.adapters.repository.write_behind import (
+    WriteBehindGameRepository,
+    WriteBehindGameRepositoryConfig,
+)
+from tic_tac_toe.adapters.serialization import decode_listed_game, dumps
+from tic_tac_toe.adapters.stats import (
+    PostgresGameStatistics,
+    PostgresGameStatisticsConfig,
+)
+from tic_tac_toe.adapters.updates import PostgresGameUpdates
+from tic_tac_toe.domain.ai import SolvedGameTable
+from tic_tac_toe.domain.application import (
+    Application,
+    GameAggregate,
+    GameMailboxes,
+    GameNotFound,
+    GameRepository,
+    ListedGame,
 )
-from tic_tac_toe.domain.application import Application
+from tic_tac_toe.domain.data import GameOver
+from tic_tac_toe.domain.transitions import TransitionTable
 from tic_tac_toe.entrypoints.asgi import create_asgi_app
 
+ConfigT = TypeVar("ConfigT", bound=BaseModel)
+RepositoryT = TypeVar("RepositoryT", bound=PostgresGameRepository)
+
+# detail of the error of a game already stored
+DUPLICATE_GAME_ID = re.compile(r"\(id\)=\((.*)\)")
+
+
+# with GUNICORN_PRELOAD=1 the application is built before workers fork:
+# reseeded in each of them, not to choose the same random ai moves
+RNG = random.Random()
+os.register_at_fork(after_in_child=RNG.seed)
+
+
+@lru_cache(maxsize=None)
+def solved_game_table() -> SolvedGameTable:
+    # built once per process, shared by the applications built in it
+    return SolvedGameTable.build()
+
 
 def generate_game_id() -> str:
     return uuid4().hex
 
 
-def asgi() -> FastAPI:
+def config_from_env(config_class: type[ConfigT], env_var: str) -> Optional[ConfigT]:
+    # e.g. GAME_CACHE=1 GAME_CACHE_MAX_SIZE=10000 GAME_CACHE_TTL=5
+    if os.getenv(env_var) != "1":
+        return None
+    return config_class.parse_obj(
+        {
+            field: os.environ[f"{env_var}_{field.upper()}"]
+            for field in config_class.__fields__
+            if f"{env_var}_{field.upper()}" in os.environ
+        }
+    )
+
+
+def postgres_repository_config(metrics: bool = False) -> PostgresGameRepositoryConfig:
     db_uri: PostgresDsn = os.getenv("POSTGRES_REPOSITORY_DB_URI")  # type: ignore
-    config = PostgresGameRepositoryConfig(db_uri=db_uri)
-    repository = PostgresGameRepository(config=config)
+    storage_format: StorageFormat = os.getenv(  # type: ignore
+        "POSTGRES_REPOSITORY_STORAGE_FORMAT", "jsonb"
+    )
+    return PostgresGameRepositoryConfig(
+        db_uri=db_uri,
+        pool=config_from_env(
+            PostgresGameRepositoryPoolConfig, "POSTGRES_REPOSITORY_POOL"
+        ),
+        storage_format=storage_format,
+        metrics=metrics,
+    )
+
+
+def create_postgres_repository(metrics: bool = False) -> PostgresGameRepository:
+    config = postgres_repository_config(metrics=metrics)
+    move_log = config_from_env(PostgresMoveLogConfig, "POSTGRES_REPOSITORY_MOVE_LOG")
+    if move_log is None:
+        return PostgresGameRepository(config=config)
+    return PostgresMoveLogGameRepository(config=config, move_log=move_log)
+
+
+async def self_check(application: Application, repository: GameRepository) -> None:
+    # Run by every worker once its pool is open, before it accepts requests:
+    # a game against the ai, in memory and encoded as for a response, then a
+    # game read from the database. A worker failing it doesn't start.
+    in_memory = Application(
+        repository=InMemoryGameRepository(),
+        generate_game_id=generate_game_id,
+        transition_table=application.transition_table,
+        solved_game_table=application.solved_game_table,
+    )
+    result: object = await in_memory.new_game()
+    while isinstance(result, GameAggregate) and not isinstance(result.state, GameOver):
+        result = await in_memory.play_ai_move(game_id=result.id)
+    if not isinstance(result, GameAggregate):
+        raise RuntimeError(f"self check: the ai can't play a game, {result}")
+    dumps(result)
+    missing = await repository.get(game_id=generate_game_id())
+    if not isinstance(missing, GameNotFound):
+        raise RuntimeError(f"self check: a new game id is taken, {missing}")
+
+
+def asgi() -> FastAPI:
+    metrics = os.getenv("METRICS") == "1"
+    postgres_repository = create_postgres_repository(metrics=metrics)
+    repository: GameRepository = postgres_repository
+    on_startup = [postgres_repository.open]
+    on_shutdown = [postgres_repository.close]
+    write_behind_config = config_from_env(
+        WriteBehindGameRepositoryConfig, "GAME_WRITE_BEHIND"
+    )
+    if write_behind_config is not None:
+        write_behind = WriteBehindGameRepository(
+            repository=repository, config=write_behind_config
+        )
+        repository = write_behind
+        on_startup.append(write_behind.open)
+        # the games waiting are inserted before the pool is closed
+        on_shutdown.insert(0, write_behind.close)
+    cache_config = config_from_env(CachingGameRepositoryConfig, "GAME_CACHE")
+    if cache_config is not None:
+        caching_repository = CachingGameRepository(
+            repository=repository, config=cache_config
+        )
+        repository = caching_repository
+        if metrics:
+            REGISTRY.register(
+                Gauge(
+                    "game_cache",
+                    "Size and hit counts of the game cache",
+                    label="stat",
+                    read=caching_repository.get_cache_stats,
+                )
+            )
+    if metrics:
+        # operations as seen by the application, cache hits included
+        repository = InstrumentedGameRepository(repository=repository)
+        REGISTRY.register(
+            Gauge(
+                "postgres_pool",
+                "Statistics of the connection pool",
+                label="stat",
+                read=postgres_repository.get_pool_stats,
+            )
+        )
+    updates = None
+    if os.getenv("GAME_UPDATES") == "1":
+        updates = PostgresGameUpdates(repository=postgres_repository)
+        on_startup.append(updates.open)
+        on_shutdown.insert(0, updates.close)
+    statistics_config = config_from_env(PostgresGameStatisticsConfig, "GAME_STATS")
+    statistics = None
+    if statistics_config is not None:
+        statistics = PostgresGameStatistics(
+            repository=postgres_repository, config=statistics_config
+        )
+        on_startup.append(statistics.open)
+        # the last counts are written before the pool is closed
+        on_shutdown.insert(0, statistics.close)
+    profiling_config = config_from_env(ProfilingConfig, "PROFILING")
+    profiler = None
+    if profiling_config is not None:
+        profiler = StackSampler(config=profiling_config)
+        on_startup.append(profiler.open)
+        on_shutdown.append(profiler.close)
     application = Application(
         repository=repository,
         generate_game_id=generate_game_id,
+        transition_table=(
+            TransitionTable.build()
+            if os.getenv("PRECOMPUTED_TRANSITIONS") == "1"
+            else None
+        ),
+        solved_game_table=solved_game_table(),
+        rng=RNG,
+        updates=updates,
+        listing=postgres_repository,
+        statistics=statistics,
+        # moves are only recorded in the move log
+        history=(
+            postgres_repository
+            if isinstance(postgres_repository, PostgresMoveLogGameRepository)
+            else None
+        ),
+        mailboxes=GameMailboxes() if os.getenv("GAME_MAILBOXES") == "1" else None,
+        grids=PostgresGridGameRepository(repository=postgres_repository),
+    )
+    # last: the pool is open, the background tasks started
+    on_startup.append(partial(self_check, application, postgres_repository))
+    return create_asgi_app(
+        application=application,
+        on_startup=on_startup,
+        on_shutdown=on_shutdown,
+        metrics=metrics,
+        profiler=profiler,
+    )
+
+
+@asynccontextmanager
+async def opened(repository: RepositoryT) -> AsyncIterator[RepositoryT]:
+    # commands run with the configuration of the server: its pool, if set
+    await repository.open()
+    try:
+        yield repository
+    finally:
+        await repository.close()
+
+
+async def backfill_board(args: argparse.Namespace) -> None:
+    async with opened(
+        PostgresGameRepository(config=postgres_repository_config())
+    ) as repository:
+        converted = await repository.backfill_board(batch_size=args.batch_size)
+    print(f"{converted} games converted")
+
+
+async def snapshot_games(args: argparse.Namespace) -> None:
+    async with opened(
+        PostgresMoveLogGameRepository(
+            config=postgres_repository_config(), move_log=PostgresMoveLogConfig()
+        )
+    ) as repository:
+        written = await repository.snapshot_games(batch_size=args.batch_size)
+    print(f"{written} games written")
+
+
+@contextmanager
+def open_file(path: str, mode: str) -> Iterator[BinaryIO]:
+    # "-" is stdin or stdout, left open
+    if path == "-":
+        yield sys.stdin.buffer if "r" in mode else sys.stdout.buffer
+    else:
+        with open(path, mode) as file:
+            yield file  # type: ignore
+
+
+async def export_games(args: argparse.Namespace) -> None:
+    exported = 0
+    async with opened(create_postgres_repository()) as repository:
+        with open_file(args.output, "wb") as output:
+            async for game in repository.export_games():
+                output.write(dumps(game) + b"\n")
+                exported += 1
+    # stdout may be the export itself
+    print(f"{exported} games exported", file=sys.stderr)
+
+
+async def import_games(args: argparse.Namespace) -> None:
+    imported = 0
+    batch: list[ListedGame] = []
+    # id -> line of the games of the batch
+    lines: dict[str, int] = {}
+
+    async def import_batch(repository: PostgresGameRepository) -> None:
+        nonlocal imported
+        try:
+            await repository.import_games(batch)
+        except UniqueViolation as error:
+            # the batches before were imported already
+            match = DUPLICATE_GAME_ID.search(error.diag.message_detail or "")
+            number = (
+                lines[match[1]] if match and match[1] in lines else min(lines.values())
+            )
+            raise SystemExit(
+                f"line {number}: game already stored, {imported} games imported"
+                f"\n{error}"
+            )
+        imported += len(batch)
+        batch.clear()
+        lines.clear()
+
+    async with opened(create_postgres_repository()) as repository:
+        with open_file(args.input, "rb") as input:
+            for number, line in enumerate(input, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    game = decode_listed_game(line)
+                except ValueError as error:
+                    raise SystemExit(
+                        f"line {number}: invalid game, {imported} games imported"
+                        f"\n{error}"
+                    )
+                batch.append(game)
+                lines[game.id] = number
+                if len(batch) == args.batch_size:
+                    await import_batch(repository)
+        if batch:
+            await import_batch(repository)
+    print(f"{imported} games imported", file=sys.stderr)
+
+
+async def rebuild_stats(args: argparse.Namespace) -> None:
+    async with opened(
+        PostgresGameRepository(config=postgres_repository_config())
+    ) as repository:
+        statistics = PostgresGameStatistics(
+            repository=repository, config=PostgresGameStatisticsConfig()
+        )
+        before, after = await statistics.rebuild()
+    for name in sorted(before.keys() | after.keys()):
+        print(f"{name}: {before.get(name, 0)} -> {after.get(name, 0)}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m tic_tac_toe")
+    commands = parser.add_subparsers(required=True)
+
+    backfill_board_command = commands.add_parser(
+        "backfill-board",
+        help="pack games still stored as jsonb into the board column",
+    )
+    backfill_board_command.add_argument("--batch-size", type=int, default=1000)
+    backfill_board_command.set_defaults(run=backfill_board)
+
+    snapshot_games_command = commands.add_parser(
+        "snapshot-games",
+        help="write the moves not in a snapshot yet to the game table",
+    )
+    snapshot_games_command.add_argument("--batch-size", type=int, default=1000)
+    snapshot_games_command.set_defaults(run=snapshot_games)
+
+    export_games_command = commands.add_parser(
+        "export-games",
+        help="write every game as a line of json",
     )
-    return create_asgi_app(application=application)
+    export_games_command.add_argument("--output", default="-")
+    export_games_command.set_defaults(run=export_games)
+
+    import_games_command = commands.add_parser(
+        "import-games",
+        help="insert the games written by export-games",
+    )
+    import_games_command.add_argument("--input", default="-")
+    import_games_command.add_argument("--batch-size", type=int, default=10_000)
+    import_games_command.set_defaults(run=import_games)
+
+    rebuild_stats_command = commands.add_parser(
+        "rebuild-stats",
+        help="compute the game statistics again from the games stored",
+    )
+    rebuild_stats_command.set_defaults(run=rebuild_stats)
+
+    args = parser.parse_args(argv)
+    asyncio.run(args.run(args))
+
+
+if __name__ == "__main__":
+    main()
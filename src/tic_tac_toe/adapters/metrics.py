@@ -0,0 +1,165 @@
+from bisect import bisect_left
+from typing import Callable, Iterator, Mapping, Optional, Sequence
+
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds: most queries and requests take from a tenth of a millisecond to a
+# few milliseconds, the default buckets of prometheus clients start at 5ms
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    escaped = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in values
+    )
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Series:
+    # the observations of a histogram with the same label values: observing
+    # is a bisection and two additions, counts are made cumulative when read
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # the last one is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series: dict[tuple[str, ...], Series] = {}
+
+    def labels(self, *values: str) -> Series:
+        # series of label values known in advance are better kept around
+        series = self.series.get(values)
+        if series is None:
+            series = self.series[values] = Series(self.buckets)
+        return series
+
+    def observe(self, value: float, *labels: str) -> None:
+        self.labels(*labels).observe(value)
+
+    def count(self, *labels: str) -> int:
+        series = self.series.get(labels)
+        return 0 if series is None else sum(series.counts)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, series in sorted(self.series.items()):
+            prefix = format_labels(self.label_names, labels)
+            separator = "," if prefix else ""
+            cumulative = 0
+            for bound, count in zip(bounds, series.counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket{{{prefix}{separator}le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            suffix = f"{{{prefix}}}" if prefix else ""
+            yield f"{self.name}_sum{suffix} {format_value(series.sum)}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+class Gauge:
+    # values read when rendered, e.g. the stats of a connection pool
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label: str,
+        read: Callable[[], Mapping[str, float]],
+    ):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.read = read
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for key, value in sorted(self.read().items()):
+            yield (
+                f"{self.name}{{{format_labels((self.label,), (key,))}}} "
+                f"{format_value(value)}"
+            )
+
+
+Metric = Histogram | Gauge
+
+
+class Registry:
+    # Metrics are kept by each process: with several gunicorn workers, every
+    # scrape returns the metrics of the worker that served it.
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        # a metric registered again under the same name replaces the first one
+        self.metrics[metric.name] = metric
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        histogram = Histogram(name=name, help=help, labels=labels, buckets=buckets)
+        self.register(histogram)
+        return histogram
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self.metrics.get(name)
+
+    def render(self) -> str:
+        return "".join(
+            f"{line}\n"
+            for _, metric in sorted(self.metrics.items())
+            for line in metric.render()
+        )
+
+
+# the metrics of the adapters and of the http api
+REGISTRY = Registry()
@@ -0,0 +1,132 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Callable, Optional
+
+from pydantic import BaseModel, Field, PositiveFloat
+
+
+class ProfilingConfig(BaseModel):
+    # fraction of the requests profiled, on top of the ones with the header
+    sample_rate: float = Field(default=0.01, ge=0, le=1)
+    # requests with this header are profiled, e.g. `x-profile: 1`
+    header: str = "x-profile"
+    # seconds between the start of two profiled requests, header or not
+    min_interval: PositiveFloat = 1.0
+    # seconds between two samples of the stack
+    sampling_interval: PositiveFloat = 0.001
+    # the stacks sampled, folded: one stack per line followed by its count;
+    # `{pid}` is replaced by the id of the worker process
+    output: str = "profile-{pid}.folded"
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    # `co_qualname` is new in python 3.11
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{frame.f_globals.get('__name__', '?')}.{name}"
+
+
+def fold_stack(frame: Optional[FrameType]) -> str:
+    # outermost frame first, as flamegraph.pl and speedscope expect
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    # A thread samples the stack of the thread running the event loop while
+    # profiled requests are in flight, and writes the stacks sampled so far
+    # when none is left. Coroutines waiting for the database are suspended:
+    # their time shows up as the event loop waiting for io. Samples are of
+    # the event loop: other requests served meanwhile are sampled as well.
+    def __init__(
+        self,
+        config: ProfilingConfig,
+        uniform: Callable[[], float] = random.random,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.sample_rate = config.sample_rate
+        self.header = config.header.lower().encode()
+        self.min_interval = config.min_interval
+        self.sampling_interval = config.sampling_interval
+        self.output_pattern = config.output
+        self.output = ""
+        self.uniform = uniform
+        self.clock = clock
+        self.stacks: Counter[str] = Counter()
+        # samples taken since the stacks were last written
+        self.unwritten = False
+        self.in_flight = 0
+        self.last_started_at = -config.min_interval
+        self.target: Optional[int] = None
+        self.thread: Optional[threading.Thread] = None
+        self.wakeup = threading.Event()
+        self.stopped = False
+
+    def should_profile(self, headers: list[tuple[bytes, bytes]]) -> bool:
+        now = self.clock()
+        if now - self.last_started_at < self.min_interval:
+            return False
+        if self.uniform() >= self.sample_rate and not any(
+            name == self.header for name, _ in headers
+        ):
+            return False
+        self.last_started_at = now
+        return True
+
+    def start_request(self) -> None:
+        self.in_flight += 1
+        self.wakeup.set()
+
+    def end_request(self) -> None:
+        self.in_flight -= 1
+
+    async def open(self) -> None:
+        # called by the thread running the event loop
+        self.target = threading.get_ident()
+        # workers are forked after the configuration is read
+        self.output = self.output_pattern.format(pid=os.getpid())
+        self.stopped = False
+        self.thread = threading.Thread(
+            target=self.run, name="stack-sampler", daemon=True
+        )
+        self.thread.start()
+
+    async def close(self) -> None:
+        if self.thread is not None:
+            self.stopped = True
+            self.wakeup.set()
+            self.thread.join()
+            self.thread = None
+
+    def run(self) -> None:
+        while not self.stopped:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            while self.in_flight > 0 and not self.stopped:
+                self.sample()
+                time.sleep(self.sampling_interval)
+            if self.unwritten:
+                self.write()
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.target or 0)
+        if frame is not None:
+            self.stacks[fold_stack(frame)] += 1
+            self.unwritten = True
+
+    def write(self) -> None:
+        # replaced at once: the file is never read half written
+        written = f"{self.output}.tmp"
+        with open(written, "w") as file:
+            for stack, count in self.stacks.items():
+                file.write(f"{stack} {count}\n")
+        os.replace(written, self.output)
+        self.unwritten = False
@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Mapping, Optional
+
+from pydantic import BaseModel, PositiveFloat, PositiveInt
+
+from tic_tac_toe.domain.application import (
+    GameNotFound,
+    GameRepository,
+    GameUpdateConflict,
+)
+from tic_tac_toe.domain.data import Game, GameError, Mark, is_game
+
+
+class CachingGameRepositoryConfig(BaseModel):
+    max_size: PositiveInt = 10_000
+    # seconds a cached game is served without reading it again: it bounds
+    # how stale a game can be when it is updated by someone else
+    ttl: PositiveFloat = 5.0
+
+
+class GameReads:
+    # reads of a game in flight, and the writes of the game since the first
+    # of them started
+    def __init__(self) -> None:
+        self.count = 0
+        self.writes = 0
+
+
+class CachingGameRepository(GameRepository):
+    # Writes always go through the wrapped repository, so updates are never
+    # computed on a stale game. Reads are only guaranteed to be fresh if every
+    # write goes through this instance, i.e. with a single gunicorn worker.
+    def __init__(
+        self,
+        repository: GameRepository,
+        config: CachingGameRepositoryConfig,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.repository = repository
+        self.max_size = config.max_size
+        self.ttl = config.ttl
+        self.clock = clock
+        # least recently used first
+        self.games: OrderedDict[str, tuple[float, Game]] = OrderedDict()
+        self.reads: dict[str, GameReads] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_cache_stats(self) -> Mapping[str, int]:
+        return {
+            "size": len(self.games),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _store(self, game_id: str, game: Game) -> None:
+        self.games[game_id] = (self.clock() + self.ttl, game)
+        self.games.move_to_end(game_id)
+        if len(self.games) > self.max_size:
+            self.games.popitem(last=False)
+            self.evictions += 1
+
+    def _written(self, game_id: str) -> None:
+        reads = self.reads.get(game_id)
+        if reads is not None:
+            reads.writes += 1
+
+    async def insert(self, game_id: str, game: Game) -> None:
+        await self.repository.insert(game_id=game_id, game=game)
+        self._written(game_id)
+        self._store(game_id, game)
+
+    async def insert_many(self, games: Mapping[str, Game]) -> None:
+        # not cached: a batch would evict the games being played
+        await self.repository.insert_many(games=games)
+        for game_id in games:
+            self._written(game_id)
+
+    async def get(self, game_id: str) -> Game | GameNotFound:
+        entry = self.games.get(game_id)
+        if entry is not None:
+            expires_at, game = entry
+            if expires_at > self.clock():
+                self.hits += 1
+                self.games.move_to_end(game_id)
+                return game
+            del self.games[game_id]
+
+        self.misses += 1
+        reads = self.reads.get(game_id)
+        if reads is None:
+            reads = self.reads[game_id] = GameReads()
+        reads.count += 1
+        writes = reads.writes
+        try:
+            result = await self.repository.get(game_id=game_id)
+        finally:
+            reads.count -= 1
+            if reads.count == 0:
+                del self.reads[game_id]
+        # a game written meanwhile is cached already, and newer than this one
+        if is_game(result) and reads.writes == writes:
+            self._store(game_id, result)
+        return result
+
+    async def update(
+        self,
+        game_id: str,
+        fn: Callable[[Game], Game | GameError],
+        marks: Optional[list[Mark]] = None,
+    ) -> Game | GameError | GameNotFound | GameUpdateConflict:
+        result = await self.repository.update(game_id=game_id, fn=fn, marks=marks)
+        self._written(game_id)
+        if is_game(result):
+            self._store(game_id, result)
+        else:
+            # the cached game may be the reason the update was rejected
+            self.games.pop(game_id, None)
+        return result
@@ -0,0 +1,146 @@
+from typing import Callable, Optional
+
+from tic_tac_toe.adapters.repository.postgres import PostgresGameRepository
+from tic_tac_toe.domain.application import (
+    GameNotFound,
+    GameUpdateConflict,
+    GridGameRepository,
+)
+from tic_tac_toe.domain.data import Player
+from tic_tac_toe.domain.grid import Grid, GridError
+
+PLAYERS = {player.value: player for player in Player}
+
+
+def player_value(player: Optional[Player]) -> Optional[int]:
+    return None if player is None else player.value
+
+
+def load_grid(
+    size: int,
+    k: int,
+    ones: int,
+    twos: int,
+    next_player: Optional[int],
+    winner: Optional[int],
+) -> Grid:
+    # masks are numeric: read as decimals
+    return Grid(
+        size=size,
+        k=k,
+        ones=int(ones),
+        twos=int(twos),
+        next_player=None if next_player is None else PLAYERS[next_player],
+        winner=None if winner is None else PLAYERS[winner],
+    )
+
+
+class InMemoryGridGameRepository(GridGameRepository):
+    def __init__(self) -> None:
+        self.grids: dict[str, Grid] = {}
+
+    async def insert_grid(self, game_id: str, grid: Grid) -> None:
+        self.grids[game_id] = grid
+
+    async def get_grid(self, game_id: str) -> Grid | GameNotFound:
+        grid = self.grids.get(game_id)
+        if grid is None:
+            return GameNotFound(error="GAME_NOT_FOUND")
+        return grid
+
+    async def update_grid(
+        self,
+        game_id: str,
+        fn: Callable[[Grid], Grid | GridError],
+    ) -> Grid | GridError | GameNotFound | GameUpdateConflict:
+        grid = self.grids.get(game_id)
+        if grid is None:
+            return GameNotFound(error="GAME_NOT_FOUND")
+        result = fn(grid)
+        if isinstance(result, Grid):
+            self.grids[game_id] = result
+        return result
+
+
+class PostgresGridGameRepository(GridGameRepository):
+    # Grid games in the `grid_game` table, with the connections and the
+    # optimistic concurrency of the 3 x 3 games: an update only succeeds if
+    # nobody else updated the game since it was read.
+    def __init__(self, repository: PostgresGameRepository):
+        self.repository = repository
+
+    async def insert_grid(self, game_id: str, grid: Grid) -> None:
+        async with self.repository.connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO grid_game (id, size, k, ones, twos, next_player, winner)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """,
+                (
+                    game_id,
+                    grid.size,
+                    grid.k,
+                    grid.ones,
+                    grid.twos,
+                    player_value(grid.next_player),
+                    player_value(grid.winner),
+                ),
+            )
+
+    async def get_grid(self, game_id: str) -> Grid | GameNotFound:
+        async with self.repository.connection() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT size, k, ones, twos, next_player, winner FROM grid_game
+                WHERE id = %s
+                """,
+                (game_id,),
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return GameNotFound(error="GAME_NOT_FOUND")
+        return load_grid(*row)
+
+    async def update_grid(
+        self,
+        game_id: str,
+        fn: Callable[[Grid], Grid | GridError],
+    ) -> Grid | GridError | GameNotFound | GameUpdateConflict:
+        async with self.repository.connection() as conn:
+            async with conn.cursor() as cursor:
+                for _ in range(self.repository.max_update_attempts):
+                    await cursor.execute(
+                        """
+                        SELECT size, k, ones, twos, next_player, winner, version
+                        FROM grid_game WHERE id = %s
+                        """,
+                        (game_id,),
+                    )
+                    row = await cursor.fetchone()
+                    if row is None:
+                        return GameNotFound(error="GAME_NOT_FOUND")
+                    *grid, version = row
+
+                    result = fn(load_grid(*grid))
+                    if not isinstance(result, Grid):
+                        return result
+
+                    await cursor.execute(
+                        """
+                        UPDATE grid_game
+                        SET ones = %s, twos = %s, next_player = %s, winner = %s,
+                            version = version + 1
+                        WHERE id = %s AND version = %s
+                        """,
+                        (
+                            result.ones,
+                            result.twos,
+                            player_value(result.next_player),
+                            player_value(result.winner),
+                            game_id,
+                            version,
+                        ),
+                    )
+                    if cursor.rowcount == 1:
+                        return result
+                return GameUpdateConflict(error="GAME_UPDATE_CONFLICT")
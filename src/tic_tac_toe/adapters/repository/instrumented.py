@@ -0,0 +1,75 @@
+import time
+from typing import Callable, Mapping, Optional
+
+from tic_tac_toe.adapters.metrics import REGISTRY
+from tic_tac_toe.domain.application import (
+    GameNotFound,
+    GameRepository,
+    GameUpdateConflict,
+)
+from tic_tac_toe.domain.data import Game, GameError, Mark
+
+OPERATION_SECONDS = REGISTRY.histogram(
+    "game_repository_operation_seconds",
+    "Time spent in a repository operation, as seen by the application",
+    labels=("operation",),
+)
+COMMAND_SECONDS = REGISTRY.histogram(
+    "game_command_seconds",
+    "Time to compute an updated game, e.g. to add a mark",
+)
+# updates hold no lock: concurrent updates of a game are retried instead
+UPDATE_ATTEMPTS = REGISTRY.histogram(
+    "game_update_attempts",
+    "Times a game was read and computed again to be updated",
+    buckets=(1, 2, 3, 5, 10),
+)
+INSERT_SECONDS = OPERATION_SECONDS.labels("insert")
+INSERT_MANY_SECONDS = OPERATION_SECONDS.labels("insert_many")
+GET_SECONDS = OPERATION_SECONDS.labels("get")
+UPDATE_SECONDS = OPERATION_SECONDS.labels("update")
+COMMAND = COMMAND_SECONDS.labels()
+
+
+class InstrumentedGameRepository(GameRepository):
+    def __init__(self, repository: GameRepository):
+        self.repository = repository
+
+    async def insert(self, game_id: str, game: Game) -> None:
+        started_at = time.perf_counter()
+        await self.repository.insert(game_id=game_id, game=game)
+        INSERT_SECONDS.observe(time.perf_counter() - started_at)
+
+    async def insert_many(self, games: Mapping[str, Game]) -> None:
+        started_at = time.perf_counter()
+        await self.repository.insert_many(games=games)
+        INSERT_MANY_SECONDS.observe(time.perf_counter() - started_at)
+
+    async def get(self, game_id: str) -> Game | GameNotFound:
+        started_at = time.perf_counter()
+        result = await self.repository.get(game_id=game_id)
+        GET_SECONDS.observe(time.perf_counter() - started_at)
+        return result
+
+    async def update(
+        self,
+        game_id: str,
+        fn: Callable[[Game], Game | GameError],
+        marks: Optional[list[Mark]] = None,
+    ) -> Game | GameError | GameNotFound | GameUpdateConflict:
+        attempts = 0
+
+        def timed_fn(game: Game) -> Game | GameError:
+            nonlocal attempts
+            attempts += 1
+            started_at = time.perf_counter()
+            result = fn(game)
+            COMMAND.observe(time.perf_counter() - started_at)
+            return result
+
+        started_at = time.perf_counter()
+        result = await self.repository.update(game_id=game_id, fn=timed_fn, marks=marks)
+        UPDATE_SECONDS.observe(time.perf_counter() - started_at)
+        if attempts:
+            UPDATE_ATTEMPTS.observe(attempts)
+        return result
@@ -0,0 +1,42 @@
+from typing import Callable, Mapping, Optional
+
+from tic_tac_toe.domain.application import (
+    GameNotFound,
+    GameRepository,
+    GameUpdateConflict,
+)
+from tic_tac_toe.domain.data import Game, GameError, Mark, is_game
+
+
+class InMemoryGameRepository(GameRepository):
+    # Games live in the memory of the process: meant for benchmarks and
+    # development, where the cost of a database is not wanted.
+    def __init__(self) -> None:
+        self.games: dict[str, Game] = {}
+
+    async def insert(self, game_id: str, game: Game) -> None:
+        self.games[game_id] = game
+
+    async def insert_many(self, games: Mapping[str, Game]) -> None:
+        self.games.update(games)
+
+    async def get(self, game_id: str) -> Game | GameNotFound:
+        game = self.games.get(game_id)
+        if game is None:
+            return GameNotFound(error="GAME_NOT_FOUND")
+        return game
+
+    async def update(
+        self,
+        game_id: str,
+        fn: Callable[[Game], Game | GameError],
+        marks: Optional[list[Mark]] = None,
+    ) -> Game | GameError | GameNotFound | GameUpdateConflict:
+        # there is no await between read and write: updates never conflict
+        game = self.games.get(game_id)
+        if game is None:
+            return GameNotFound(error="GAME_NOT_FOUND")
+        result = fn(game)
+        if is_game(result):
+            self.games[game_id] = result
+        return result
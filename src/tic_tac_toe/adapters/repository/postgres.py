@@ -1,44 +1,302 @@
-import json
-from functools import partial
-from typing import Callable
+import base64
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+)
 
-from fastapi.encoders import jsonable_encoder
-from psycopg import AsyncConnection
-from psycopg.types.json import Jsonb, set_json_dumps
-from pydantic import BaseModel, PostgresDsn
+from psycopg import AsyncConnection, AsyncCursor, sql
+from psycopg.abc import Params, Query
+from psycopg.errors import UniqueViolation
+from psycopg.types.json import Jsonb, set_json_dumps, set_json_loads
+from psycopg_pool import AsyncConnectionPool
+from pydantic import BaseModel, PositiveFloat, PositiveInt, PostgresDsn
 
-from tic_tac_toe.domain.application import GameNotFound, GameRepository
-from tic_tac_toe.domain.data import Game, GameError, GameOngoing, GameOver, is_game
+from tic_tac_toe.adapters.metrics import REGISTRY
+from tic_tac_toe.adapters.serialization import PLAYERS, decode_game, dumps, loads
+from tic_tac_toe.domain.application import (
+    GameFilter,
+    GameHistory,
+    GameHistoryNotFound,
+    GameListing,
+    GameNotFound,
+    GameOrder,
+    GamePage,
+    GameRepository,
+    GameUpdateConflict,
+    InvalidCursor,
+    ListedGame,
+)
+from tic_tac_toe.domain.data import (
+    Bitboard,
+    Cell,
+    Game,
+    GameError,
+    GameOver,
+    Mark,
+    is_game,
+)
 
 # https://www.psycopg.org/psycopg3/docs/basic/adapt.html#json-adaptation
-set_json_dumps(partial(json.dumps, default=jsonable_encoder))
+set_json_dumps(dumps)
+set_json_loads(loads)
+
+
+# - jsonb: the whole game as json in the `state` column
+# - board: the game packed in an integer in the `board` column
+StorageFormat = Literal["jsonb", "board"]
+
+CONNECTION_WAIT_SECONDS = REGISTRY.histogram(
+    "postgres_connection_wait_seconds",
+    "Time to get a connection: a new one, or a free one from the pool",
+)
+QUERY_SECONDS = REGISTRY.histogram(
+    "postgres_query_seconds",
+    "Time to execute a query, up to its results being available",
+)
+CONNECTION_WAIT = CONNECTION_WAIT_SECONDS.labels()
+QUERY = QUERY_SECONDS.labels()
+
+
+class TimedAsyncCursor(AsyncCursor[Any]):
+    # the cursor of every connection of the repository, `conn.execute` included
+    async def execute(
+        self,
+        query: Query,
+        params: Optional[Params] = None,
+        *,
+        prepare: Optional[bool] = None,
+        binary: Optional[bool] = None,
+    ) -> "TimedAsyncCursor":
+        started_at = time.perf_counter()
+        try:
+            return await super().execute(query, params, prepare=prepare, binary=binary)
+        finally:
+            QUERY.observe(time.perf_counter() - started_at)
+
+
+class PostgresGameRepositoryPoolConfig(BaseModel):
+    min_size: PositiveInt = 4
+    max_size: Optional[PositiveInt] = None
+    # seconds a request waits for a free connection before failing
+    timeout: PositiveFloat = 30.0
+    max_idle: PositiveFloat = 600.0
+    max_lifetime: PositiveFloat = 3600.0
+    # check connections are alive before handing them out
+    check: bool = True
 
 
 class PostgresGameRepositoryConfig(BaseModel):
     db_uri: PostgresDsn
+    # when missing, a new connection is opened for every operation
+    pool: Optional[PostgresGameRepositoryPoolConfig] = None
+    # reads and writes of concurrent updates to a game may interleave
+    max_update_attempts: PositiveInt = 5
+    # games are read in both formats, but written in this one
+    storage_format: StorageFormat = "jsonb"
+    # time connections and queries, as with METRICS=1
+    metrics: bool = False
+
+
+def load_game(state: Optional[Mapping[str, Any]], board: Optional[int]) -> Game:
+    if board is not None:
+        return Bitboard.decode(board).to_game()
+    if state is None:  # pragma: nocover
+        raise ValueError("game has neither state nor board")
+    return decode_game(state)
+
+
+def encode_cursor(at: datetime, game_id: str) -> str:
+    # the position of the last game of a page
+    return base64.urlsafe_b64encode(dumps([at.isoformat(), game_id])).decode()
+
 
+def decode_cursor(cursor: str) -> Optional[tuple[datetime, str]]:
+    try:
+        at, game_id = loads(base64.urlsafe_b64decode(cursor))
+        if not isinstance(game_id, str):
+            return None
+        return datetime.fromisoformat(at), game_id
+    except (TypeError, ValueError):
+        return None
 
-class PostgresGameRepository(GameRepository):
+
+def list_games_query(
+    filter: GameFilter,
+    order: GameOrder,
+    limit: int,
+    after: Optional[tuple[datetime, str]] = None,
+) -> tuple[sql.Composed, dict[str, Any]]:
+    # Every filter can be answered by one of the indexes on (..., order, id)
+    # (see migrations/deploy/0005_add_game_listing.sql): pages are read from
+    # the index in order, and a page never costs more than `limit` rows.
+    conditions: list[sql.Composable] = []
+    params: dict[str, Any] = {"limit": limit}
+    if order == "finished_at":
+        # only games that are over have an end time: it makes the status of
+        # the filter redundant when it is OVER
+        conditions.append(sql.SQL("finished_at IS NOT NULL"))
+    if filter.status is not None and (order, filter.status) != ("finished_at", "OVER"):
+        conditions.append(sql.SQL("status = %(status)s"))
+        params["status"] = filter.status
+    if filter.winner is not None:
+        conditions.append(sql.SQL("winner = %(winner)s"))
+        params["winner"] = filter.winner.value
+    bounds = [
+        ("created_at", ">=", "created_after"),
+        ("created_at", "<", "created_before"),
+        ("finished_at", ">=", "finished_after"),
+        ("finished_at", "<", "finished_before"),
+    ]
+    for column, operator, bound in bounds:
+        value = getattr(filter, bound)
+        if value is not None:
+            conditions.append(
+                sql.SQL("{} {} {}").format(
+                    sql.Identifier(column), sql.SQL(operator), sql.Placeholder(bound)
+                )
+            )
+            params[bound] = value
+    if after is not None:
+        conditions.append(
+            sql.SQL("({}, id) < (%(after_at)s, %(after_id)s)").format(
+                sql.Identifier(order)
+            )
+        )
+        params["after_at"], params["after_id"] = after
+
+    query = sql.SQL(
+        """
+        SELECT id, state, board, created_at, finished_at FROM game
+        {where}
+        ORDER BY {order} DESC, id DESC
+        LIMIT %(limit)s
+        """
+    ).format(
+        where=(
+            sql.SQL("WHERE ") + sql.SQL(" AND ").join(conditions)
+            if conditions
+            else sql.SQL("")
+        ),
+        order=sql.Identifier(order),
+    )
+    return query, params
+
+
+class PostgresGameRepository(GameRepository, GameListing):
     def __init__(self, config: PostgresGameRepositoryConfig):
         self.db_uri = config.db_uri
+        self.max_update_attempts = config.max_update_attempts
+        self.storage_format = config.storage_format
+        self.metrics = config.metrics
+        self.cursor_factory: type[AsyncCursor[Any]] = (
+            TimedAsyncCursor if config.metrics else AsyncCursor
+        )
+        self.pool: Optional[AsyncConnectionPool] = (
+            None
+            if config.pool is None
+            else AsyncConnectionPool(
+                conninfo=config.db_uri,
+                min_size=config.pool.min_size,
+                max_size=config.pool.max_size,
+                timeout=config.pool.timeout,
+                max_idle=config.pool.max_idle,
+                max_lifetime=config.pool.max_lifetime,
+                check=AsyncConnectionPool.check_connection
+                if config.pool.check
+                else None,
+                kwargs={"autocommit": True, "cursor_factory": self.cursor_factory},
+                open=False,
+            )
+        )
+
+    async def open(self) -> None:
+        if self.pool is not None:
+            await self.pool.open(wait=True)
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+
+    def get_pool_stats(self) -> Mapping[str, int]:
+        # https://www.psycopg.org/psycopg3/docs/advanced/pool.html#pool-stats
+        if self.pool is None:
+            return {}
+        return self.pool.get_stats()
+
+    def dump_game(self, game: Game) -> tuple[Optional[Jsonb], Optional[int]]:
+        if self.storage_format == "board":
+            return None, Bitboard.from_game(game).encode()
+        return Jsonb(game), None
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncConnection]:
+        started_at = time.perf_counter()
+        if self.pool is None:
+            async with await AsyncConnection.connect(
+                self.db_uri, autocommit=True, cursor_factory=self.cursor_factory
+            ) as conn:
+                if self.metrics:
+                    CONNECTION_WAIT.observe(time.perf_counter() - started_at)
+                yield conn
+        else:
+            async with self.pool.connection() as conn:
+                if self.metrics:
+                    CONNECTION_WAIT.observe(time.perf_counter() - started_at)
+                yield conn
 
     async def insert(self, game_id: str, game: Game) -> None:
-        async with await AsyncConnection.connect(self.db_uri) as conn:
+        state, board = self.dump_game(game)
+        async with self.connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
                     """
-                    INSERT INTO game (id, state)
-                    VALUES (%(id)s, %(state)s)
+                    INSERT INTO game (id, state, board, finished_at)
+                    VALUES (
+                        %(id)s, %(state)s, %(board)s,
+                        CASE WHEN %(over)s THEN now() END
+                    )
                     """,
-                    {"id": game_id, "state": Jsonb(game)},
+                    {
+                        "id": game_id,
+                        "state": state,
+                        "board": board,
+                        "over": isinstance(game, GameOver),
+                    },
                 )
 
+    async def insert_many(self, games: Mapping[str, Game]) -> None:
+        # COPY takes values only: the end time is taken here, not by postgres
+        now = datetime.now(timezone.utc)
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                async with cursor.copy(
+                    "COPY game (id, state, board, finished_at) FROM STDIN"
+                ) as copy:
+                    for game_id, game in games.items():
+                        await copy.write_row(
+                            (
+                                game_id,
+                                *self.dump_game(game),
+                                now if isinstance(game, GameOver) else None,
+                            )
+                        )
+
     async def get(self, game_id: str) -> Game | GameNotFound:
-        async with await AsyncConnection.connect(self.db_uri) as conn:
+        async with self.connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
                     """
-                        SELECT state FROM game
+                        SELECT state, board FROM game
                         WHERE id = %(id)s
                         """,
                     {"id": game_id},
@@ -47,49 +305,461 @@ class PostgresGameRepository(GameRepository):
                 if row is None:
                     return GameNotFound(error="GAME_NOT_FOUND")
 
-                game_data = row[0]
+                return load_game(*row)
 
-                game: Game = (
-                    GameOngoing(**game_data)
-                    if game_data["status"] == "ONGOING"
-                    else GameOver(**game_data)
-                )
+    async def update(
+        self,
+        game_id: str,
+        fn: Callable[[Game], Game | GameError],
+        marks: Optional[list[Mark]] = None,
+    ) -> Game | GameError | GameNotFound | GameUpdateConflict:
+        # optimistic concurrency: no lock is held while `fn` runs, the write
+        # only succeeds if nobody else updated the game since it was read
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                for _ in range(self.max_update_attempts):
+                    await cursor.execute(
+                        """
+                        SELECT state, board, version FROM game
+                        WHERE id = %(id)s
+                        """,
+                        {"id": game_id},
+                    )
+                    row = await cursor.fetchone()
+                    if row is None:
+                        return GameNotFound(error="GAME_NOT_FOUND")
+
+                    state, board, version = row
+
+                    result = fn(load_game(state, board))
+                    if not is_game(result):
+                        return result
+
+                    state, board = self.dump_game(result)
+                    await cursor.execute(
+                        """
+                        UPDATE game
+                        SET state = %(state)s, board = %(board)s,
+                            version = version + 1,
+                            finished_at = CASE WHEN %(over)s THEN now() END
+                        WHERE id = %(id)s AND version = %(version)s
+                        """,
+                        {
+                            "id": game_id,
+                            "state": state,
+                            "board": board,
+                            "version": version,
+                            "over": isinstance(result, GameOver),
+                        },
+                    )
+                    if cursor.rowcount == 1:
+                        return result
+                return GameUpdateConflict(error="GAME_UPDATE_CONFLICT")
+
+    async def _load_listed_games(
+        self, cursor: AsyncCursor[Any], rows: Sequence[tuple[Any, ...]]
+    ) -> list[Game]:
+        return [load_game(state, board) for _, state, board, *_ in rows]
+
+    async def list_games(
+        self,
+        filter: GameFilter,
+        order: GameOrder,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> GamePage | InvalidCursor:
+        after = None
+        if cursor is not None:
+            after = decode_cursor(cursor)
+            if after is None:
+                return InvalidCursor(error="INVALID_CURSOR")
+        # one more game than asked tells whether there is a next page
+        query, params = list_games_query(filter, order, limit + 1, after)
+        async with self.connection() as conn:
+            async with conn.cursor() as db_cursor:
+                await db_cursor.execute(query, params)
+                rows = await db_cursor.fetchall()
+                games = await self._load_listed_games(db_cursor, rows[:limit])
+
+        listed = [
+            ListedGame(
+                id=game_id,
+                state=game,
+                created_at=created_at,
+                finished_at=finished_at,
+            )
+            for (game_id, _, _, created_at, finished_at), game in zip(rows, games)
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = listed[-1]
+            next_cursor = encode_cursor(getattr(last, order), last.id)
+        return GamePage(games=listed, next_cursor=next_cursor)
+
+    # `COPY` streams the whole table without a snapshot of it in memory
+    EXPORT_QUERY = """
+        COPY (SELECT id, state, board, created_at, finished_at FROM game)
+        TO STDOUT (FORMAT BINARY)
+    """
+    EXPORT_TYPES = ["text", "jsonb", "int4", "timestamptz", "timestamptz"]
+
+    def _exported_game(self, row: tuple[Any, ...]) -> ListedGame:
+        game_id, state, board, created_at, finished_at = row
+        return ListedGame(
+            id=game_id,
+            state=load_game(state, board),
+            created_at=created_at,
+            finished_at=finished_at,
+        )
+
+    async def export_games(self) -> AsyncIterator[ListedGame]:
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                async with cursor.copy(self.EXPORT_QUERY) as copy:
+                    copy.set_types(self.EXPORT_TYPES)
+                    async for row in copy.rows():
+                        yield self._exported_game(row)
+
+    async def import_games(self, games: Sequence[ListedGame]) -> None:
+        # a single `COPY`: no game is imported if any of them already exists
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                async with cursor.copy(
+                    """
+                    COPY game (id, state, board, created_at, finished_at)
+                    FROM STDIN
+                    """
+                ) as copy:
+                    for game in games:
+                        await copy.write_row(
+                            (
+                                game.id,
+                                *self.dump_game(game.state),
+                                game.created_at,
+                                game.finished_at,
+                            )
+                        )
+
+    async def backfill_board(self, batch_size: int = 1000) -> int:
+        # packs games still stored as jsonb, returns how many were converted
+        converted = 0
+        last_id = ""
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                while True:
+                    await cursor.execute(
+                        """
+                        SELECT id, state, version FROM game
+                        WHERE board IS NULL AND id > %(last_id)s
+                        ORDER BY id
+                        LIMIT %(batch_size)s
+                        """,
+                        {"last_id": last_id, "batch_size": batch_size},
+                    )
+                    rows = await cursor.fetchall()
+                    if not rows:
+                        return converted
+                    # games updated in the meantime are skipped
+                    await cursor.executemany(
+                        """
+                        UPDATE game
+                        SET state = NULL, board = %(board)s, version = version + 1
+                        WHERE id = %(id)s AND version = %(version)s
+                        """,
+                        [
+                            {
+                                "id": game_id,
+                                "board": Bitboard.from_game(
+                                    decode_game(state)
+                                ).encode(),
+                                "version": version,
+                            }
+                            for game_id, state, version in rows
+                        ],
+                    )
+                    converted += cursor.rowcount
+                    last_id = rows[-1][0]
+
+
+class PostgresMoveLogConfig(BaseModel):
+    # moves played since the game was last written to the `game` table
+    # before it is written again; games are always written when over
+    snapshot_interval: PositiveInt = 4
+
+
+SNAPSHOT = """
+    UPDATE game
+    SET state = %(state)s, board = %(board)s,
+        snapshot_moves = %(moves)s, version = version + 1,
+        finished_at = CASE WHEN %(over)s THEN now() END
+    WHERE id = %(id)s AND snapshot_moves < %(moves)s
+"""
+
+
+@lru_cache(maxsize=None)
+def append_moves_query(count: int, snapshot: bool) -> str:
+    # VALUES instead of unnest(): inserting a single row is a lot cheaper
+    values = ", ".join(
+        f"(%(id)s, %(number_{index})s, %(player_{index})s, %(cell_{index})s)"
+        for index in range(count)
+    )
+    query = f"INSERT INTO game_move (game_id, number, player, cell) VALUES {values}"
+    if snapshot:
+        # a single statement: the snapshot is written with the moves
+        return f"WITH appended AS ({query}) {SNAPSHOT}"
+    return query
+
+
+CELLS = tuple(Cell)
+CELL_INDEXES: Mapping[Cell, int] = {cell: index for index, cell in enumerate(Cell)}
+
+
+def replay(
+    state: Optional[Mapping[str, Any]],
+    board: Optional[int],
+    moves: Sequence[tuple[int, int]],
+) -> Game:
+    # (player, cell index) moves played after the game in state or board
+    game = load_game(state, board)
+    if not moves:
+        return game
+    result: Bitboard | GameError = Bitboard.from_game(game)
+    for player, cell in moves:
+        if not isinstance(result, Bitboard):  # pragma: nocover
+            raise ValueError(f"invalid move log: {result}")
+        result = result.add_mark(Mark(player=PLAYERS[player], cell=CELLS[cell]))
+    if not isinstance(result, Bitboard):  # pragma: nocover
+        raise ValueError(f"invalid move log: {result}")
+    return result.to_game()
+
+
+class PostgresMoveLogGameRepository(PostgresGameRepository, GameHistory):
+    # Moves are appended to the `game_move` table instead of rewriting the
+    # game row on every update. The game row is a snapshot, updated every
+    # `snapshot_interval` moves and when the game is over: games are read
+    # from their snapshot and the moves played after it.
+    #
+    # Concurrent updates are detected by the primary key of the moves: only
+    # one of them can append the next move of a game.
+    def __init__(
+        self,
+        config: PostgresGameRepositoryConfig,
+        move_log: PostgresMoveLogConfig,
+    ):
+        super().__init__(config=config)
+        self.snapshot_interval = move_log.snapshot_interval
+
+    async def _read(
+        self, cursor: AsyncCursor[Any], game_id: str
+    ) -> Optional[tuple[Game, int, int]]:
+        # -> game, moves in its snapshot, moves played
+        await cursor.execute(
+            """
+            SELECT game.state, game.board, game.snapshot_moves,
+                game_move.player, game_move.cell
+            FROM game
+            LEFT JOIN game_move
+                ON game_move.game_id = game.id
+                AND game_move.number > game.snapshot_moves
+            WHERE game.id = %(id)s
+            ORDER BY game_move.number
+            """,
+            {"id": game_id},
+        )
+        rows = await cursor.fetchall()
+        if not rows:
+            return None
+        state, board, snapshot_moves, _, _ = rows[0]
+        moves = [(player, cell) for *_, player, cell in rows if player is not None]
+        game = replay(state, board, moves)
+        return game, snapshot_moves, snapshot_moves + len(moves)
+
+    async def get(self, game_id: str) -> Game | GameNotFound:
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                read = await self._read(cursor, game_id)
+                if read is None:
+                    return GameNotFound(error="GAME_NOT_FOUND")
+                game, _, _ = read
                 return game
 
     async def update(
         self,
         game_id: str,
         fn: Callable[[Game], Game | GameError],
-    ) -> Game | GameError | GameNotFound:
-        async with await AsyncConnection.connect(self.db_uri) as conn:
+        marks: Optional[list[Mark]] = None,
+    ) -> Game | GameError | GameNotFound | GameUpdateConflict:
+        if marks is None:
+            # the boards don't tell in which order the marks were played
+            raise ValueError("the move log needs the marks played by every update")
+        async with self.connection() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute(
+                for _ in range(self.max_update_attempts):
+                    read = await self._read(cursor, game_id)
+                    if read is None:
+                        return GameNotFound(error="GAME_NOT_FOUND")
+                    game, snapshot_moves, moves = read
+
+                    result = fn(game)
+                    if not is_game(result):
+                        return result
+
+                    params: dict[str, Any] = {"id": game_id}
+                    for index, mark in enumerate(marks):
+                        params[f"number_{index}"] = moves + index + 1
+                        params[f"player_{index}"] = mark.player.value
+                        params[f"cell_{index}"] = CELL_INDEXES[mark.cell]
+                    moves += len(marks)
+                    snapshot = (
+                        isinstance(result, GameOver)
+                        or moves - snapshot_moves >= self.snapshot_interval
+                    )
+                    if snapshot:
+                        state, board = self.dump_game(result)
+                        params.update(
+                            state=state,
+                            board=board,
+                            moves=moves,
+                            over=isinstance(result, GameOver),
+                        )
+                    try:
+                        await cursor.execute(
+                            append_moves_query(len(marks), snapshot), params
+                        )
+                    except UniqueViolation:
+                        # somebody else added a move in the meantime
+                        continue
+                    return result
+                return GameUpdateConflict(error="GAME_UPDATE_CONFLICT")
+
+    async def _load_listed_games(
+        self, cursor: AsyncCursor[Any], rows: Sequence[tuple[Any, ...]]
+    ) -> list[Game]:
+        # the moves played after the snapshots of the page, in one query
+        await cursor.execute(
+            """
+            SELECT game_move.game_id, game_move.player, game_move.cell
+            FROM game_move
+            JOIN game
+                ON game.id = game_move.game_id
+                AND game_move.number > game.snapshot_moves
+            WHERE game_move.game_id = ANY(%(ids)s)
+            ORDER BY game_move.game_id, game_move.number
+            """,
+            {"ids": [game_id for game_id, *_ in rows]},
+        )
+        moves: dict[str, list[tuple[int, int]]] = {}
+        for game_id, player, cell in await cursor.fetchall():
+            moves.setdefault(game_id, []).append((player, cell))
+        return [
+            replay(state, board, moves.get(game_id, ()))
+            for game_id, state, board, *_ in rows
+        ]
+
+    # the moves played after the snapshot of every game
+    EXPORT_QUERY = """
+        COPY (
+            SELECT game.id, game.state, game.board, game.created_at,
+                game.finished_at, moves.players, moves.cells
+            FROM game
+            LEFT JOIN LATERAL (
+                SELECT
+                    array_agg(player ORDER BY number) AS players,
+                    array_agg(cell ORDER BY number) AS cells
+                FROM game_move
+                WHERE game_id = game.id AND number > game.snapshot_moves
+            ) AS moves ON TRUE
+        )
+        TO STDOUT (FORMAT BINARY)
+    """
+    EXPORT_TYPES = [*PostgresGameRepository.EXPORT_TYPES, "int2[]", "int2[]"]
+
+    def _exported_game(self, row: tuple[Any, ...]) -> ListedGame:
+        game_id, state, board, created_at, finished_at, players, cells = row
+        return ListedGame(
+            id=game_id,
+            state=replay(state, board, list(zip(players or (), cells or ()))),
+            created_at=created_at,
+            finished_at=finished_at,
+        )
+
+    async def moves(
+        self,
+        game_id: str,
+        after: int = 0,
+        until: Optional[int] = None,
+    ) -> AsyncGenerator[Mark | GameNotFound | GameHistoryNotFound, None]:
+        async with self.connection() as conn:
+            # server-side cursors only live in a transaction
+            async with conn.transaction():
+                cursor = await conn.execute(
                     """
-                    SELECT state FROM game
+                    SELECT state, board, snapshot_moves FROM game
                     WHERE id = %(id)s
-                    FOR UPDATE
                     """,
                     {"id": game_id},
                 )
                 row = await cursor.fetchone()
                 if row is None:
-                    return GameNotFound(error="GAME_NOT_FOUND")
+                    yield GameNotFound(error="GAME_NOT_FOUND")
+                    return
+                state, board, snapshot_moves = row
+                if len(load_game(state, board).marks) > snapshot_moves:
+                    # marks played before the game was in the move log
+                    yield GameHistoryNotFound(error="GAME_HISTORY_NOT_FOUND")
+                    return
 
-                game_data = row[0]
+                # fetched `itersize` rows at a time, never the whole history
+                async with conn.cursor(name="game_moves") as moves:
+                    await moves.execute(
+                        """
+                        SELECT player, cell FROM game_move
+                        WHERE game_id = %(id)s AND number > %(after)s
+                            AND (%(until)s::SMALLINT IS NULL OR number <= %(until)s)
+                        ORDER BY number
+                        """,
+                        {"id": game_id, "after": after, "until": until},
+                    )
+                    async for player, cell in moves:
+                        yield Mark(player=PLAYERS[player], cell=CELLS[cell])
 
-                game: Game = (
-                    GameOngoing(**game_data)
-                    if game_data["status"] == "ONGOING"
-                    else GameOver(**game_data)
-                )
-                result = fn(game)
-                if is_game(result):
+    async def snapshot_games(self, batch_size: int = 1000) -> int:
+        # writes the moves not in a snapshot yet to the game table, e.g.
+        # before going back to full-row updates; returns the games written
+        written = 0
+        last_id = ""
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                while True:
                     await cursor.execute(
                         """
-                        UPDATE game
-                        SET state = %(state)s
-                        WHERE id = %(id)s
+                        SELECT DISTINCT game.id FROM game
+                        JOIN game_move
+                            ON game_move.game_id = game.id
+                            AND game_move.number > game.snapshot_moves
+                        WHERE game.id > %(last_id)s
+                        ORDER BY game.id
+                        LIMIT %(batch_size)s
                         """,
-                        {"id": game_id, "state": Jsonb(result)},
+                        {"last_id": last_id, "batch_size": batch_size},
                     )
-                return result
+                    game_ids = [game_id for game_id, in await cursor.fetchall()]
+                    if not game_ids:
+                        return written
+                    for game_id in game_ids:
+                        read = await self._read(cursor, game_id)
+                        if read is not None:
+                            game, _, moves = read
+                            state, board = self.dump_game(game)
+                            await cursor.execute(
+                                SNAPSHOT,
+                                {
+                                    "id": game_id,
+                                    "state": state,
+                                    "board": board,
+                                    "moves": moves,
+                                    "over": isinstance(game, GameOver),
+                                },
+                            )
+                            written += cursor.rowcount
+                    last_id = game_ids[-1]
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import Callable, Mapping, Optional
+
+from psycopg import OperationalError
+from pydantic import BaseModel, PositiveFloat, PositiveInt
+
+from tic_tac_toe.domain.application import (
+    GameNotFound,
+    GameRepository,
+    GameUpdateConflict,
+)
+from tic_tac_toe.domain.data import Game, GameError, Mark
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindGameRepositoryConfig(BaseModel):
+    # seconds new games wait in memory before being inserted together
+    flush_interval: PositiveFloat = 0.01
+    # new games waiting at most: inserting more waits for a flush
+    max_pending: PositiveInt = 10_000
+
+
+class WriteBehindGameRepository(GameRepository):
+    # New games are kept in memory and inserted in batches by a background
+    # task, every `flush_interval` seconds. They are read from memory until
+    # they are inserted, and inserted before being updated: updates always go
+    # through the wrapped repository. Other processes only see a game once it
+    # is inserted, and the games waiting are lost if the process is killed.
+    #
+    # Games are inserted again while the database can't be reached. Games the
+    # database rejects are dropped, and logged: the batch is split to find
+    # them, the others are inserted.
+    def __init__(
+        self,
+        repository: GameRepository,
+        config: WriteBehindGameRepositoryConfig,
+    ):
+        self.repository = repository
+        self.flush_interval = config.flush_interval
+        self.max_pending = config.max_pending
+        self.pending: dict[str, Game] = {}
+        # games being inserted, still read from memory
+        self.flushing: dict[str, Game] = {}
+        # a single insert at a time: games are inserted in the order created
+        self.flush_lock = asyncio.Lock()
+        self.flusher: Optional[asyncio.Task[None]] = None
+
+    async def open(self) -> None:
+        self.flusher = asyncio.create_task(self.flush_periodically())
+
+    async def close(self) -> None:
+        if self.flusher is not None:
+            # an insert cancelled halfway leaves the connection unusable
+            async with self.flush_lock:
+                self.flusher.cancel()
+            try:
+                await self.flusher
+            except asyncio.CancelledError:
+                pass
+            self.flusher = None
+        # games still waiting are inserted before the wrapped repository closes
+        await self.flush()
+
+    async def flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # games are kept for the next attempt
+                logger.exception("inserting new games failed")
+
+    async def flush(self) -> None:
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            self.flushing, self.pending = self.pending, {}
+            try:
+                await self.insert_batch(dict(self.flushing))
+            except BaseException:
+                # the games not inserted yet
+                self.pending = {**self.flushing, **self.pending}
+                raise
+            finally:
+                self.flushing = {}
+
+    async def insert_batch(self, games: Mapping[str, Game]) -> None:
+        # games inserted or dropped are removed from `flushing`
+        try:
+            await self.repository.insert_many(games=games)
+        except OperationalError:
+            raise
+        except Exception:
+            if len(games) > 1:
+                # a half at a time, down to the games rejected
+                items = list(games.items())
+                middle = len(items) // 2
+                await self.insert_batch(dict(items[:middle]))
+                await self.insert_batch(dict(items[middle:]))
+                return
+            logger.exception("new game %s can't be inserted, dropped", *games)
+        for game_id in games:
+            del self.flushing[game_id]
+
+    async def insert(self, game_id: str, game: Game) -> None:
+        # backpressure: creating games can't outpace inserting them
+        while len(self.pending) >= self.max_pending:
+            await self.flush()
+        self.pending[game_id] = game
+
+    async def insert_many(self, games: Mapping[str, Game]) -> None:
+        # already a single insert
+        await self.repository.insert_many(games=games)
+
+    async def get(self, game_id: str) -> Game | GameNotFound:
+        game = self.pending.get(game_id)
+        if game is None:
+            game = self.flushing.get(game_id)
+        if game is not None:
+            return game
+        return await self.repository.get(game_id=game_id)
+
+    async def update(
+        self,
+        game_id: str,
+        fn: Callable[[Game], Game | GameError],
+        marks: Optional[list[Mark]] = None,
+    ) -> Game | GameError | GameNotFound | GameUpdateConflict:
+        if game_id in self.pending or game_id in self.flushing:
+            # with the games created meanwhile
+            await self.flush()
+        return await self.repository.update(game_id=game_id, fn=fn, marks=marks)
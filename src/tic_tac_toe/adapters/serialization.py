@@ -0,0 +1,163 @@
+import json
+from dataclasses import is_dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Mapping
+
+from tic_tac_toe.domain.application import GridGameAggregate, ListedGame
+from tic_tac_toe.domain.data import Cell, Game, GameOngoing, GameOver, Player
+from tic_tac_toe.domain.grid import Grid
+
+CELLS: Mapping[str, Cell] = {cell.value: cell for cell in Cell}
+PLAYERS: Mapping[int, Player] = {player.value: player for player in Player}
+
+
+def encode_game(game: Game) -> dict[str, Any]:
+    marks = {cell.value: player.value for cell, player in game.marks.items()}
+    if isinstance(game, GameOver):
+        return {
+            "status": "OVER",
+            "winner": None if game.winner is None else game.winner.value,
+            "marks": marks,
+        }
+    return {
+        "status": "ONGOING",
+        "next_player": game.next_player.value,
+        "marks": marks,
+    }
+
+
+def encode_grid(grid: Grid) -> dict[str, Any]:
+    # marks row by row
+    marks = [
+        {"player": player.value, "row": row, "column": column}
+        for row in range(grid.size)
+        for column in range(grid.size)
+        if (player := grid.player_at(row, column)) is not None
+    ]
+    game: dict[str, Any] = {"size": grid.size, "k": grid.k}
+    if grid.next_player is None:
+        game["status"] = "OVER"
+        game["winner"] = None if grid.winner is None else grid.winner.value
+    else:
+        game["status"] = "ONGOING"
+        game["next_player"] = grid.next_player.value
+    game["marks"] = marks
+    return game
+
+
+def decode_game(data: Mapping[str, Any]) -> Game:
+    # only meant for data produced by `encode_game`: it is not validated
+    marks = {CELLS[cell]: PLAYERS[player] for cell, player in data["marks"].items()}
+    if data["status"] == "OVER":
+        winner = data["winner"]
+        return GameOver(
+            status="OVER",
+            winner=None if winner is None else PLAYERS[winner],
+            marks=marks,
+        )
+    return GameOngoing(
+        status="ONGOING",
+        next_player=PLAYERS[data["next_player"]],
+        marks=marks,
+    )
+
+
+def encode(value: Any) -> Any:
+    # called for every value the json library can't serialize by itself
+    if isinstance(value, GameOngoing | GameOver):
+        return encode_game(value)
+    if isinstance(value, GridGameAggregate):
+        # a grid is a tuple: it would be encoded as a json array
+        return {"id": value.id, "state": encode_grid(value.state)}
+    if is_dataclass(value):
+        # the other domain values: slotted dataclasses, encoded field by field
+        return {name: getattr(value, name) for name in value.__slots__}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        # as orjson does
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+try:
+    import orjson
+
+    def dumps(value: Any) -> bytes:
+        # orjson can't encode the cells of games, keys of their marks
+        return orjson.dumps(
+            value, default=encode, option=orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+except ImportError:  # pragma: nocover
+
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, default=encode, separators=(",", ":")).encode()
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+def validate_player(value: Any, field: str) -> Player:
+    # bool is an int: true is player one, as for pydantic
+    player = PLAYERS.get(value) if isinstance(value, int) else None
+    if player is None:
+        raise ValueError(f"{field} must be a player, 1 or 2")
+    return player
+
+
+def validate_game(data: Any) -> Game:
+    # decode_game for data from outside, e.g. imported games
+    if not isinstance(data, dict):
+        raise ValueError("a game must be a json object")
+    marks = data.get("marks")
+    if not isinstance(marks, dict):
+        raise ValueError("marks must be a json object")
+    board = {}
+    for cell, player in marks.items():
+        if cell not in CELLS:
+            raise ValueError(f"{cell} is not a cell")
+        board[CELLS[cell]] = validate_player(player, f"marks.{cell}")
+    status = data.get("status")
+    if status == "OVER":
+        winner = data.get("winner")
+        return GameOver(
+            status="OVER",
+            winner=None if winner is None else validate_player(winner, "winner"),
+            marks=board,
+        )
+    if status == "ONGOING":
+        return GameOngoing(
+            status="ONGOING",
+            next_player=validate_player(data.get("next_player"), "next_player"),
+            marks=board,
+        )
+    raise ValueError("status must be ONGOING or OVER")
+
+
+def decode_listed_game(line: bytes | str) -> ListedGame:
+    # a line written by the export, validated
+    data = loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("a game must be a json object")
+    game_id = data.get("id")
+    created_at = data.get("created_at")
+    finished_at = data.get("finished_at")
+    if not isinstance(game_id, str):
+        raise ValueError("id must be a string")
+    if not isinstance(created_at, str):
+        raise ValueError("created_at must be a string")
+    if finished_at is not None and not isinstance(finished_at, str):
+        raise ValueError("finished_at must be a string or null")
+    return ListedGame(
+        id=game_id,
+        state=validate_game(data.get("state")),
+        created_at=datetime.fromisoformat(created_at),
+        finished_at=None
+        if finished_at is None
+        else datetime.fromisoformat(finished_at),
+    )
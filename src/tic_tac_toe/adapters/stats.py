@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Mapping, Optional
+
+from pydantic import BaseModel, PositiveFloat
+
+from tic_tac_toe.adapters.repository.postgres import PostgresGameRepository
+from tic_tac_toe.domain.application import GameStatistics
+from tic_tac_toe.domain.data import Cell, Player
+from tic_tac_toe.domain.stats import (
+    DRAWS,
+    GAMES_OVER,
+    GAMES_STARTED,
+    MOVES,
+    opening_counter,
+    wins_counter,
+)
+
+logger = logging.getLogger(__name__)
+
+CELLS = tuple(Cell)
+
+
+class InMemoryGameStatistics(GameStatistics):
+    # the counts of this process only
+    def __init__(self) -> None:
+        self.counts: Counter[str] = Counter()
+
+    def count(self, counts: Mapping[str, int]) -> None:
+        self.counts.update(counts)
+
+    async def read(self) -> Mapping[str, int]:
+        return dict(self.counts)
+
+
+class PostgresGameStatisticsConfig(BaseModel):
+    # seconds counts are kept in memory before being added to the table:
+    # counts of the last interval are lost if a worker is killed
+    flush_interval: PositiveFloat = 5.0
+
+
+ADD_COUNTS = """
+    INSERT INTO game_stat (name, value)
+    SELECT * FROM unnest(%(names)s::TEXT[], %(values)s::BIGINT[])
+    ON CONFLICT (name) DO UPDATE SET value = game_stat.value + EXCLUDED.value
+"""
+
+
+# the counters computed from the games stored, in a single scan
+REBUILD_GAME_COUNTS = """
+    SELECT
+        count(*),
+        count(*) FILTER (WHERE status = 'OVER'),
+        count(*) FILTER (WHERE status = 'OVER' AND winner IS NULL),
+        count(*) FILTER (WHERE winner = 1),
+        count(*) FILTER (WHERE winner = 2),
+        COALESCE(
+            sum(
+                CASE
+                    WHEN board IS NULL
+                    THEN (SELECT count(*) FROM jsonb_object_keys(state -> 'marks'))
+                    -- the bits of the marks of both players
+                    ELSE bit_count((board & 262143)::BIT(32))
+                END
+            ) FILTER (WHERE status = 'OVER'),
+            0
+        )::BIGINT
+    FROM game
+"""
+
+# openings are only known for the games in the move log
+REBUILD_OPENING_COUNTS = """
+    SELECT cell, count(*) FROM game_move WHERE number = 1 GROUP BY cell
+"""
+
+
+class PostgresGameStatistics(GameStatistics):
+    # Counts are added up in memory by every worker, and added to the
+    # `game_stat` table every `flush_interval` seconds: reads are a handful
+    # of rows whatever the number of games, and lag by up to an interval.
+    def __init__(
+        self,
+        repository: PostgresGameRepository,
+        config: PostgresGameStatisticsConfig,
+    ):
+        self.repository = repository
+        self.flush_interval = config.flush_interval
+        self.pending: Counter[str] = Counter()
+        self.flusher: Optional[asyncio.Task[None]] = None
+        self.flush_lock = asyncio.Lock()
+
+    def count(self, counts: Mapping[str, int]) -> None:
+        self.pending.update(counts)
+
+    async def open(self) -> None:
+        self.flusher = asyncio.create_task(self.flush_periodically())
+
+    async def close(self) -> None:
+        if self.flusher is not None:
+            # a query cancelled halfway leaves the connection unusable
+            async with self.flush_lock:
+                self.flusher.cancel()
+            try:
+                await self.flusher
+            except asyncio.CancelledError:
+                pass
+            self.flusher = None
+        await self.flush()
+
+    async def flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # counts are kept for the next attempt
+                logger.exception("writing game statistics failed")
+
+    async def flush(self) -> None:
+        async with self.flush_lock:
+            counts, self.pending = self.pending, Counter()
+            if not counts:
+                return
+            try:
+                async with self.repository.connection() as conn:
+                    await conn.execute(
+                        ADD_COUNTS,
+                        {"names": list(counts), "values": list(counts.values())},
+                    )
+            except BaseException:
+                self.pending.update(counts)
+                raise
+
+    async def read(self) -> Mapping[str, int]:
+        async with self.repository.connection() as conn:
+            cursor = await conn.execute("SELECT name, value FROM game_stat")
+            return dict(await cursor.fetchall())
+
+    async def rebuild(self) -> tuple[Mapping[str, int], Mapping[str, int]]:
+        # replaces the counters with the ones computed from the games:
+        # -> counters before, counters after
+        async with self.repository.connection() as conn:
+            async with conn.transaction():
+                cursor = await conn.execute(
+                    "SELECT name, value FROM game_stat FOR UPDATE"
+                )
+                before = dict(await cursor.fetchall())
+                cursor = await conn.execute(REBUILD_GAME_COUNTS)
+                row = await cursor.fetchone()
+                names = [
+                    GAMES_STARTED,
+                    GAMES_OVER,
+                    DRAWS,
+                    wins_counter(Player.ONE),
+                    wins_counter(Player.TWO),
+                    MOVES,
+                ]
+                after = dict(zip(names, row or ()))
+                cursor = await conn.execute(REBUILD_OPENING_COUNTS)
+                for cell, count in await cursor.fetchall():
+                    after[opening_counter(CELLS[cell])] = count
+                await conn.execute("DELETE FROM game_stat")
+                await conn.execute(
+                    ADD_COUNTS, {"names": list(after), "values": list(after.values())}
+                )
+        return before, after
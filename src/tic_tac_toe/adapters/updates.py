@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Optional
+
+from psycopg import AsyncConnection, sql
+
+from tic_tac_toe.adapters.repository.postgres import PostgresGameRepository
+from tic_tac_toe.adapters.serialization import decode_game, dumps, loads
+from tic_tac_toe.domain.application import GameAggregate, GameNotFound, GameUpdates
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    # Games are full snapshots: a subscriber that falls behind only needs
+    # the latest one, so older games still waiting are dropped.
+    def __init__(self) -> None:
+        self.games: asyncio.Queue[GameAggregate] = asyncio.Queue(maxsize=1)
+
+    def put(self, game: GameAggregate) -> None:
+        if self.games.full():
+            self.games.get_nowait()
+        self.games.put_nowait(game)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> GameAggregate:
+        return await self.games.get()
+
+
+class InMemoryGameUpdates(GameUpdates):
+    # fan-out to the subscribers of this process only
+    def __init__(self) -> None:
+        self.subscriptions: defaultdict[str, set[Subscription]] = defaultdict(set)
+
+    async def publish(self, game: GameAggregate) -> None:
+        self.dispatch(game)
+
+    def dispatch(self, game: GameAggregate) -> None:
+        for subscription in self.subscriptions.get(game.id, ()):
+            subscription.put(game)
+
+    @asynccontextmanager
+    async def subscribe(self, game_id: str) -> AsyncIterator[Subscription]:
+        subscription = Subscription()
+        self.subscriptions[game_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self.subscriptions[game_id].discard(subscription)
+            if not self.subscriptions[game_id]:
+                del self.subscriptions[game_id]
+
+
+class PostgresGameUpdates(GameUpdates):
+    # Fan-out across processes with LISTEN/NOTIFY: games are published on a
+    # channel every worker listens to, and dispatched to the subscribers of
+    # each of them. Games published while the listening connection is down
+    # are lost: once listening again, the games subscribed to are read from
+    # the repository and sent to their subscribers.
+    # Games are published in the background, on a connection of their own:
+    # the move is stored already, it doesn't wait for nor fail with them.
+    def __init__(
+        self,
+        repository: PostgresGameRepository,
+        channel: str = "game_updates",
+        reconnect_delay: float = 1.0,
+        open_timeout: float = 10.0,
+        max_pending: int = 10_000,
+    ):
+        self.repository = repository
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.open_timeout = open_timeout
+        self.local = InMemoryGameUpdates()
+        self.listener: Optional[asyncio.Task[None]] = None
+        self.listening = asyncio.Event()
+        # the listening connection, while connected
+        self.connection: Optional[AsyncConnection[Any]] = None
+        # games to notify, all those waiting are sent together
+        self.pending: asyncio.Queue[GameAggregate] = asyncio.Queue(max_pending)
+        self.publisher: Optional[asyncio.Task[None]] = None
+        # the publishing connection, while connected
+        self.publishing_connection: Optional[AsyncConnection[Any]] = None
+
+    async def open(self) -> None:
+        self.listener = asyncio.create_task(self.listen())
+        self.publisher = asyncio.create_task(self.publish_pending())
+        try:
+            await asyncio.wait_for(self.listening.wait(), self.open_timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        for task in (self.listener, self.publisher):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.listener = None
+        self.publisher = None
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                async with await AsyncConnection.connect(
+                    self.repository.db_uri, autocommit=True
+                ) as conn:
+                    self.connection = conn
+                    await conn.execute(
+                        sql.SQL("LISTEN {}").format(sql.Identifier(self.channel))
+                    )
+                    self.listening.set()
+                    await self.resend()
+                    async for notify in conn.notifies():
+                        self.dispatch(notify.payload)
+            except Exception:
+                logger.exception("listening to %s failed", self.channel)
+            finally:
+                self.connection = None
+                self.listening.clear()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def dispatch(self, payload: str) -> None:
+        try:
+            data = loads(payload)
+            game = GameAggregate(id=data["id"], state=decode_game(data["state"]))
+        except Exception:
+            logger.exception("invalid game update on %s: %r", self.channel, payload)
+            return
+        self.local.dispatch(game)
+
+    async def resend(self) -> None:
+        # the games published while not listening are missing
+        for game_id in list(self.local.subscriptions):
+            game = await self.repository.get(game_id=game_id)
+            if not isinstance(game, GameNotFound):
+                self.local.dispatch(GameAggregate(id=game_id, state=game))
+
+    async def publish(self, game: GameAggregate) -> None:
+        try:
+            self.pending.put_nowait(game)
+        except asyncio.QueueFull:
+            # games are snapshots: watchers get the next move of the game
+            logger.warning("too many game updates to publish, %s dropped", game.id)
+
+    async def publish_pending(self) -> None:
+        while True:
+            try:
+                async with await AsyncConnection.connect(
+                    self.repository.db_uri, autocommit=True
+                ) as conn:
+                    self.publishing_connection = conn
+                    while True:
+                        games = [await self.pending.get()]
+                        while not self.pending.empty():
+                            games.append(self.pending.get_nowait())
+                        # in a single query, notified in order
+                        await conn.execute(
+                            """
+                            SELECT pg_notify(%s, payload)
+                            FROM unnest(%s::text[]) AS payload
+                            """,
+                            (self.channel, [dumps(game).decode() for game in games]),
+                        )
+            except Exception:
+                # the games being sent are lost
+                logger.exception("publishing to %s failed", self.channel)
+            finally:
+                self.publishing_connection = None
+            await asyncio.sleep(self.reconnect_delay)
+
+    def subscribe(self, game_id: str) -> AsyncContextManager[Subscription]:
+        return self.local.subscribe(game_id)
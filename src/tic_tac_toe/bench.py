@@ -0,0 +1,452 @@
+"""Load generator for the http api.
+
+Plays games against the api with a number of concurrent clients and reports
+throughput and latency percentiles per endpoint. The api is either served
+in process (no network, no http server) or reached over http:
+
+    python -m tic_tac_toe.bench --repository memory --concurrency 16
+    python -m tic_tac_toe.bench --repository postgres --duration 30
+    python -m tic_tac_toe.bench --url http://localhost:8080 --mix win=3,error=1
+
+Comparing the in-memory and the postgres repositories separates the cost of
+the framework from the cost of the database.
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Mapping, Optional, Protocol, Sequence
+from urllib.parse import urlsplit
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+from starlette.types import ASGIApp, Message
+
+from tic_tac_toe.adapters.repository.instrumented import InstrumentedGameRepository
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
+from tic_tac_toe.adapters.serialization import dumps, loads
+from tic_tac_toe.domain.application import Application
+from tic_tac_toe.entrypoints.asgi import create_asgi_app
+
+# same games as examples/win.sh and examples/draw.sh
+WIN = (
+    (1, "CENTER_CENTER"),
+    (2, "TOP_CENTER"),
+    (1, "TOP_LEFT"),
+    (2, "BOTTOM_RIGHT"),
+    (1, "BOTTOM_LEFT"),
+    (2, "TOP_RIGHT"),
+    (1, "CENTER_LEFT"),
+)
+DRAW = (
+    (1, "CENTER_CENTER"),
+    (2, "BOTTOM_LEFT"),
+    (1, "TOP_LEFT"),
+    (2, "BOTTOM_RIGHT"),
+    (1, "BOTTOM_CENTER"),
+    (2, "TOP_CENTER"),
+    (1, "CENTER_RIGHT"),
+    (2, "CENTER_LEFT"),
+    (1, "TOP_RIGHT"),
+)
+
+
+class Transport(Protocol):
+    async def request(
+        self, method: str, path: str, body: Optional[bytes] = None
+    ) -> tuple[int, bytes]:
+        ...  # pragma: nocover
+
+    async def close(self) -> None:
+        ...  # pragma: nocover
+
+
+class ASGITransport(Transport):
+    # calls the application directly: measures everything but the network
+    # and the http server
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def request(
+        self, method: str, path: str, body: Optional[bytes] = None
+    ) -> tuple[int, bytes]:
+        body = body or b""
+        request_messages: list[Message] = [
+            {"type": "http.request", "body": body, "more_body": False},
+            {"type": "http.disconnect"},
+        ]
+        status = 0
+        chunks: list[bytes] = []
+
+        async def receive() -> Message:
+            return request_messages.pop(0)
+
+        async def send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        path, _, query_string = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query_string.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"bench"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("bench", 0),
+            "server": ("bench", 80),
+        }
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+    async def close(self) -> None:
+        pass
+
+
+class HTTPTransport(Transport):
+    # a keep-alive http/1.1 connection, opened on the first request
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.connection: Optional[
+            tuple[asyncio.StreamReader, asyncio.StreamWriter]
+        ] = None
+
+    async def request(
+        self, method: str, path: str, body: Optional[bytes] = None
+    ) -> tuple[int, bytes]:
+        if self.connection is None:
+            self.connection = await asyncio.open_connection(self.host, self.port)
+        reader, writer = self.connection
+
+        body = body or b""
+        writer.write(
+            (
+                f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "\r\n"
+            ).encode()
+            + body
+        )
+        await writer.drain()
+
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+        content = await reader.readexactly(int(headers.get(b"content-length", 0)))
+        if headers.get(b"connection") == b"close":
+            await self.close()
+        return status, content
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            _, writer = self.connection
+            self.connection = None
+            writer.close()
+            await writer.wait_closed()
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        # responses whose status is not the one the scenario expects
+        self.unexpected: defaultdict[str, int] = defaultdict(int)
+
+    async def call(
+        self,
+        transport: Transport,
+        endpoint: str,
+        expected_status: int,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+    ) -> bytes:
+        started_at = time.perf_counter()
+        status, content = await transport.request(method, path, body)
+        self.latencies[endpoint].append(time.perf_counter() - started_at)
+        if status != expected_status:
+            self.unexpected[endpoint] += 1
+        return content
+
+
+Scenario = Callable[[Transport, Recorder], Awaitable[None]]
+
+
+async def new_game(transport: Transport, recorder: Recorder) -> str:
+    content = await recorder.call(transport, "POST /games", 201, "POST", "/games")
+    game_id: str = loads(content)["id"]
+    return game_id
+
+
+def mark(player: int, cell: str) -> bytes:
+    return dumps({"player": player, "cell": cell})
+
+
+def play(marks: Sequence[tuple[int, str]]) -> Scenario:
+    async def scenario(transport: Transport, recorder: Recorder) -> None:
+        game_id = await new_game(transport, recorder)
+        for player, cell in marks:
+            await recorder.call(
+                transport,
+                "POST /games/{id}/mark",
+                200,
+                "POST",
+                f"/games/{game_id}/mark",
+                mark(player, cell),
+            )
+        await recorder.call(
+            transport, "GET /games/{id}", 200, "GET", f"/games/{game_id}"
+        )
+
+    return scenario
+
+
+async def play_errors(transport: Transport, recorder: Recorder) -> None:
+    game_id = await new_game(transport, recorder)
+    path = f"/games/{game_id}/mark"
+    endpoint = "POST /games/{id}/mark"
+    # player two can't start, and a cell can't be marked twice
+    await recorder.call(transport, endpoint, 400, "POST", path, mark(2, "TOP_LEFT"))
+    await recorder.call(transport, endpoint, 200, "POST", path, mark(1, "TOP_LEFT"))
+    await recorder.call(transport, endpoint, 400, "POST", path, mark(2, "TOP_LEFT"))
+    await recorder.call(transport, "GET /games/{id}", 404, "GET", "/games/missing")
+
+
+SCENARIOS: Mapping[str, Scenario] = {
+    "win": play(WIN),
+    "draw": play(DRAW),
+    "error": play_errors,
+}
+
+
+class EndpointReport(BaseModel):
+    endpoint: str
+    requests: int
+    unexpected: int
+    requests_per_second: float
+    # seconds
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    # nearest rank
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def report(recorder: Recorder, elapsed: float) -> list[EndpointReport]:
+    latencies = dict(recorder.latencies)
+    latencies["total"] = [
+        value for values in recorder.latencies.values() for value in values
+    ]
+    reports = []
+    for endpoint, values in latencies.items():
+        if not values:
+            continue
+        values = sorted(values)
+        reports.append(
+            EndpointReport(
+                endpoint=endpoint,
+                requests=len(values),
+                unexpected=(
+                    sum(recorder.unexpected.values())
+                    if endpoint == "total"
+                    else recorder.unexpected[endpoint]
+                ),
+                requests_per_second=len(values) / elapsed,
+                p50=percentile(values, 0.5),
+                p90=percentile(values, 0.9),
+                p99=percentile(values, 0.99),
+                max=values[-1],
+            )
+        )
+    return reports
+
+
+def format_report(reports: Sequence[EndpointReport]) -> str:
+    lines = [
+        f"{'endpoint':<24}{'requests':>10}{'unexpected':>12}{'req/s':>10}"
+        f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    ]
+    for r in reports:
+        lines.append(
+            f"{r.endpoint:<24}{r.requests:>10}{r.unexpected:>12}"
+            f"{r.requests_per_second:>10.1f}{r.p50 * 1e3:>9.2f}{r.p90 * 1e3:>9.2f}"
+            f"{r.p99 * 1e3:>9.2f}{r.max * 1e3:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+async def run(
+    make_transport: Callable[[], Transport],
+    concurrency: int,
+    duration: float,
+    mix: Mapping[str, float],
+    seed: Optional[int] = None,
+) -> list[EndpointReport]:
+    recorder = Recorder()
+    scenarios = [SCENARIOS[name] for name in mix]
+    weights = list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    async def client(rng: random.Random) -> None:
+        transport = make_transport()
+        try:
+            while time.perf_counter() < deadline:
+                scenario = rng.choices(scenarios, weights)[0]
+                await scenario(transport, recorder)
+        finally:
+            await transport.close()
+
+    started_at = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(random.Random(None if seed is None else seed + index))
+            for index in range(concurrency)
+        )
+    )
+    return report(recorder, time.perf_counter() - started_at)
+
+
+def create_app(repository_name: str, metrics: bool = False) -> FastAPI:
+    # with metrics, as the http server with METRICS=1: the difference is the
+    # cost of the instrumentation
+    if repository_name == "memory":
+        memory_repository = InMemoryGameRepository()
+        return create_asgi_app(
+            application=Application(
+                repository=(
+                    InstrumentedGameRepository(memory_repository)
+                    if metrics
+                    else memory_repository
+                ),
+                generate_game_id=generate_game_id,
+            ),
+            metrics=metrics,
+        )
+    # imported here: the module is the entrypoint of the http server
+    from tic_tac_toe.__main__ import create_postgres_repository
+
+    repository = create_postgres_repository(metrics=metrics)
+    return create_asgi_app(
+        application=Application(
+            repository=(
+                InstrumentedGameRepository(repository) if metrics else repository
+            ),
+            generate_game_id=generate_game_id,
+        ),
+        on_startup=[repository.open],
+        on_shutdown=[repository.close],
+        metrics=metrics,
+    )
+
+
+def generate_game_id() -> str:
+    # games ids are not what is measured: avoid the cost of uuid4
+    return f"{random.getrandbits(128):032x}"
+
+
+def parse_mix(value: str) -> Mapping[str, float]:
+    # e.g. win=3,draw=1,error=1
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(
+                f"unknown scenario {name!r}, choose from {', '.join(SCENARIOS)}"
+            )
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight {weight!r}")
+        if mix[name] < 0:
+            raise argparse.ArgumentTypeError(f"invalid weight {weight!r}")
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("at least one weight must be positive")
+    return mix
+
+
+async def bench(args: argparse.Namespace) -> None:
+    if args.url is not None:
+        url = urlsplit(args.url)
+        reports = await run(
+            make_transport=lambda: HTTPTransport(
+                host=url.hostname or "localhost", port=url.port or 80
+            ),
+            concurrency=args.concurrency,
+            duration=args.duration,
+            mix=args.mix,
+            seed=args.seed,
+        )
+    else:
+        app = create_app(args.repository, metrics=args.metrics)
+        await app.router.startup()
+        try:
+            reports = await run(
+                make_transport=lambda: ASGITransport(app=app),
+                concurrency=args.concurrency,
+                duration=args.duration,
+                mix=args.mix,
+                seed=args.seed,
+            )
+        finally:
+            await app.router.shutdown()
+    print(format_report(reports))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m tic_tac_toe.bench",
+        description="play games against the api and report latencies",
+    )
+    parser.add_argument(
+        "--url",
+        help="base url of a running server, the api is served in process if missing",
+    )
+    parser.add_argument(
+        "--repository",
+        choices=["memory", "postgres"],
+        default="memory",
+        help="repository of the in process api, postgres is configured as the "
+        "http server (default: memory)",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="instrument the in process api as the http server with METRICS=1",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default="win=1,draw=1,error=1",
+        help="relative weights of the scenarios (default: win=1,draw=1,error=1)",
+    )
+    parser.add_argument("--seed", type=int)
+
+    args = parser.parse_args(argv)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import random
+from enum import Enum
+from typing import Mapping
+
+from .data import (
+    FULL_BOARD_MASK,
+    WINNING_MASKS_BY_CELL,
+    Bitboard,
+    Cell,
+    Game,
+    GameIsOver,
+    Mark,
+    Player,
+)
+
+
+class Difficulty(Enum):
+    EASY = "EASY"
+    MEDIUM = "MEDIUM"
+    HARD = "HARD"
+
+
+# chance that the best move is played instead of a random one
+OPTIMAL_MOVE_PROBABILITY: Mapping[Difficulty, float] = {
+    Difficulty.EASY: 0.0,
+    Difficulty.MEDIUM: 0.6,
+    Difficulty.HARD: 1.0,
+}
+
+CELLS = tuple(Cell)
+WINNING_MASKS = tuple(WINNING_MASKS_BY_CELL[cell] for cell in Cell)
+
+
+def _symmetries() -> list[tuple[int, ...]]:
+    # rotations and reflections of the grid: symmetry[cell] is where the
+    # cell ends up, cells are indexed row by row as the bits of a bitboard
+    def rotate(cell: int) -> int:
+        row, column = divmod(cell, 3)
+        return column * 3 + (2 - row)
+
+    def reflect(cell: int) -> int:
+        row, column = divmod(cell, 3)
+        return row * 3 + (2 - column)
+
+    symmetries = []
+    symmetry = tuple(range(len(CELLS)))
+    for _ in range(4):
+        symmetries.append(symmetry)
+        symmetries.append(tuple(reflect(cell) for cell in symmetry))
+        symmetry = tuple(rotate(cell) for cell in symmetry)
+    return symmetries
+
+
+def _permuted_masks(symmetry: tuple[int, ...]) -> tuple[int, ...]:
+    # every 9 bits mask -> the mask with its cells moved by `symmetry`
+    return tuple(
+        sum(1 << symmetry[cell] for cell in range(len(CELLS)) if mask >> cell & 1)
+        for mask in range(FULL_BOARD_MASK + 1)
+    )
+
+
+SYMMETRIES = _symmetries()
+INVERSE_SYMMETRIES = [
+    tuple(symmetry.index(cell) for cell in range(len(CELLS))) for symmetry in SYMMETRIES
+]
+PERMUTED_MASKS = [_permuted_masks(symmetry) for symmetry in SYMMETRIES]
+
+# (cell, score) of every move of a position, best first: a positive score is a
+# win for the player that moves, the sooner the higher; negative is a loss
+Moves = tuple[tuple[int, int], ...]
+
+
+class SolvedGameTable:
+    # Positions are stored from the point of view of the player that moves:
+    # (own marks, opponent marks), reduced to the smallest of their 8
+    # symmetric positions. It brings the 4520 positions where a move can be
+    # played from a new game down to 627.
+    def __init__(self) -> None:
+        self.moves: dict[int, Moves] = {}
+        # position -> (key, symmetry), see `canonical`
+        self.canonical_positions: dict[int, tuple[int, int]] = {}
+
+    @classmethod
+    def build(cls) -> "SolvedGameTable":
+        table = cls()
+        table.solve(0)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def canonical(self, own: int, opponent: int) -> tuple[int, int]:
+        # -> key of the position, index of the symmetry leading to it
+        position = own | opponent << len(CELLS)
+        canonical = self.canonical_positions.get(position)
+        if canonical is None:
+            canonical = min(
+                (masks[own] | masks[opponent] << len(CELLS), index)
+                for index, masks in enumerate(PERMUTED_MASKS)
+            )
+            self.canonical_positions[position] = canonical
+        return canonical
+
+    def solve(self, key: int) -> Moves:
+        moves = self.moves.get(key)
+        if moves is not None:
+            return moves
+
+        own = key & FULL_BOARD_MASK
+        opponent = key >> len(CELLS)
+        scores = []
+        for cell in range(len(CELLS)):
+            cell_mask = 1 << cell
+            if (own | opponent) & cell_mask:
+                continue
+            marked = own | cell_mask
+            empty_cells = len(CELLS) - (marked | opponent).bit_count()
+            if any(marked & mask == mask for mask in WINNING_MASKS[cell]):
+                score = 1 + empty_cells
+            elif empty_cells == 0:
+                score = 0
+            else:
+                # the best move of the opponent is the worst outcome for us
+                opponent_key, _ = self.canonical(opponent, marked)
+                score = -self.solve(opponent_key)[0][1]
+            scores.append((cell, score))
+        moves = tuple(sorted(scores, key=lambda move: -move[1]))
+        self.moves[key] = moves
+        return moves
+
+    def choose_mark(
+        self,
+        game: Game,
+        difficulty: Difficulty,
+        rng: random.Random,
+    ) -> Mark | GameIsOver:
+        board = Bitboard.from_game(game)
+        if board.next_player is None:
+            return GameIsOver(error="GAME_IS_OVER")
+        if board.next_player is Player.ONE:
+            own, opponent = board.ones, board.twos
+        else:
+            own, opponent = board.twos, board.ones
+
+        key, symmetry = self.canonical(own, opponent)
+        # positions not reachable from a new game are solved the first time
+        moves = self.solve(key)
+        if rng.random() < OPTIMAL_MOVE_PROBABILITY[difficulty]:
+            best_score = moves[0][1]
+            moves = tuple(move for move in moves if move[1] == best_score)
+        cell, _ = rng.choice(moves)
+
+        # moves are stored for the symmetric position: map the cell back
+        return Mark(
+            player=board.next_player, cell=CELLS[INVERSE_SYMMETRIES[symmetry][cell]]
+        )
@@ -1,18 +1,78 @@
-from typing import Callable, Literal, Protocol
+import asyncio
+import random
+from collections import OrderedDict
+from contextlib import aclosing
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import (
+    AsyncContextManager,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Literal,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+)
 
-from pydantic import BaseModel
+from .ai import Difficulty, SolvedGameTable
+from .data import (
+    AddMarkCommand,
+    CreateNewGameCommand,
+    Game,
+    GameError,
+    GameIsOver,
+    GameOngoing,
+    GameOver,
+    Mark,
+    Player,
+    is_game,
+)
+from .grid import (
+    AddGridMarkCommand,
+    CreateNewGridGameCommand,
+    Grid,
+    GridError,
+    GridMark,
+)
+from .stats import GameStats, compute_stats, marks_counts, new_games_counts
+from .transitions import TransitionTable
 
-from .data import AddMarkCommand, CreateNewGameCommand, Game, GameError, Mark, is_game
 
-
-class GameNotFound(BaseModel):
+@dataclass(frozen=True, slots=True)
+class GameNotFound:
     error: Literal["GAME_NOT_FOUND"]
 
 
+@dataclass(frozen=True, slots=True)
+class GameUpdateConflict:
+    error: Literal["GAME_UPDATE_CONFLICT"]
+
+
+@dataclass(frozen=True, slots=True)
+class GameHistoryNotFound:
+    error: Literal["GAME_HISTORY_NOT_FOUND"]
+
+
+@dataclass(frozen=True, slots=True)
+class MoveNotFound:
+    error: Literal["MOVE_NOT_FOUND"]
+
+
+@dataclass(frozen=True, slots=True)
+class InvalidCursor:
+    error: Literal["INVALID_CURSOR"]
+
+
 class GameRepository(Protocol):
     async def insert(self, game_id: str, game: Game) -> None:
         ...  # pragma: nocover
 
+    async def insert_many(self, games: Mapping[str, Game]) -> None:
+        ...  # pragma: nocover
+
     async def get(self, game_id: str) -> Game | GameNotFound:
         ...  # pragma: nocover
 
@@ -20,13 +80,230 @@ class GameRepository(Protocol):
         self,
         game_id: str,
         fn: Callable[[Game], Game | GameError],
-    ) -> Game | GameError | GameNotFound:
+        # filled by every call of `fn` with the marks it added, in the order
+        # they were played
+        marks: Optional[list[Mark]] = None,
+    ) -> Game | GameError | GameNotFound | GameUpdateConflict:
+        ...  # pragma: nocover
+
+
+@dataclass(frozen=True, slots=True)
+class GameAggregate:
+    id: str
+    state: Game
+
+
+@dataclass(frozen=True, slots=True)
+class MarksAdded:
+    id: str
+    state: Game
+    # marks are applied in order until the first one that can't be added
+    applied: int
+    error: Optional[GameError]
+
+
+class GameUpdates(Protocol):
+    # called once the game is stored: a failure is not the move's
+    async def publish(self, game: GameAggregate) -> None:
+        ...  # pragma: nocover
+
+    def subscribe(
+        self, game_id: str
+    ) -> AsyncContextManager[AsyncIterator[GameAggregate]]:
+        ...  # pragma: nocover
+
+
+class GameHistory(Protocol):
+    # Moves are numbered from 1 in playing order, and never change once
+    # played. The game is checked first: an error is the only item when it
+    # is not found or moves were played before the history was recorded.
+    def moves(
+        self,
+        game_id: str,
+        after: int = 0,
+        until: Optional[int] = None,
+    ) -> AsyncGenerator[Mark | GameNotFound | GameHistoryNotFound, None]:
         ...  # pragma: nocover
 
 
-class GameAggregate(BaseModel):
+GameStatus = Literal["ONGOING", "OVER"]
+# games are listed newest first by one of these: by end time, only games
+# that are over are listed
+GameOrder = Literal["created_at", "finished_at"]
+
+
+@dataclass(frozen=True, slots=True)
+class GameFilter:
+    status: Optional[GameStatus] = None
+    winner: Optional[Player] = None
+    # lower bounds are included, upper bounds are not
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    finished_after: Optional[datetime] = None
+    finished_before: Optional[datetime] = None
+
+
+@dataclass(frozen=True, slots=True)
+class ListedGame:
     id: str
     state: Game
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+
+@dataclass(frozen=True, slots=True)
+class GamePage:
+    games: list[ListedGame]
+    # pass it back as `cursor` to get the next page, missing on the last one
+    next_cursor: Optional[str]
+
+
+class GameListing(Protocol):
+    async def list_games(
+        self,
+        filter: GameFilter,
+        order: GameOrder,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> GamePage | InvalidCursor:
+        ...  # pragma: nocover
+
+
+class GameStatistics(Protocol):
+    # `count` is called on every move: counts are meant to be added in
+    # memory, and written from time to time
+    def count(self, counts: Mapping[str, int]) -> None:
+        ...  # pragma: nocover
+
+    async def read(self) -> Mapping[str, int]:
+        ...  # pragma: nocover
+
+
+@dataclass(frozen=True, slots=True)
+class GridGameAggregate:
+    id: str
+    state: Grid
+
+
+class GridGameRepository(Protocol):
+    # as GameRepository, for games on grids of any size
+    async def insert_grid(self, game_id: str, grid: Grid) -> None:
+        ...  # pragma: nocover
+
+    async def get_grid(self, game_id: str) -> Grid | GameNotFound:
+        ...  # pragma: nocover
+
+    async def update_grid(
+        self,
+        game_id: str,
+        fn: Callable[[Grid], Grid | GridError],
+    ) -> Grid | GridError | GameNotFound | GameUpdateConflict:
+        ...  # pragma: nocover
+
+
+GameUpdate = Callable[[Game], Game | GameError]
+GameUpdateResult = Game | GameError | GameNotFound | GameUpdateConflict
+
+
+class GameMailbox:
+    def __init__(self) -> None:
+        # held while a batch of updates is written
+        self.lock = asyncio.Lock()
+        self.pending: list[
+            tuple[GameUpdate, list[Mark], asyncio.Future[GameUpdateResult]]
+        ] = []
+        # requests with an update in the mailbox: dropped when none is left
+        self.users = 0
+
+
+class GameMailboxes:
+    # Concurrent updates of a game by requests of this process wait in its
+    # mailbox instead of conflicting in the repository: whoever gets the lock
+    # next applies all the updates waiting, in order, in a single update of
+    # the repository. The others find their result when they get the lock.
+    # Updates of other processes can still conflict, and are retried.
+    def __init__(self) -> None:
+        self.mailboxes: dict[str, GameMailbox] = {}
+
+    def __len__(self) -> int:
+        return len(self.mailboxes)
+
+    async def update(
+        self,
+        repository: GameRepository,
+        game_id: str,
+        fn: GameUpdate,
+        marks: list[Mark],
+    ) -> GameUpdateResult:
+        mailbox = self.mailboxes.get(game_id)
+        if mailbox is None:
+            mailbox = self.mailboxes[game_id] = GameMailbox()
+        future: asyncio.Future[GameUpdateResult]
+        future = asyncio.get_running_loop().create_future()
+        entry = (fn, marks, future)
+        mailbox.pending.append(entry)
+        mailbox.users += 1
+        try:
+            async with mailbox.lock:
+                if not future.done():
+                    await self.deliver(repository, game_id, mailbox)
+            return future.result()
+        except BaseException:
+            # cancelled while waiting: not applied if still pending, an update
+            # already taken in a batch is written with the others
+            if entry in mailbox.pending:
+                mailbox.pending.remove(entry)
+            raise
+        finally:
+            mailbox.users -= 1
+            if mailbox.users == 0:
+                del self.mailboxes[game_id]
+
+    async def deliver(
+        self, repository: GameRepository, game_id: str, mailbox: GameMailbox
+    ) -> None:
+        batch, mailbox.pending = mailbox.pending, []
+        # of the last attempt of the repository to update the game
+        results: list[Game | GameError] = []
+        played: list[Mark] = []
+
+        def apply_all(game: Game) -> Game | GameError:
+            results.clear()
+            played.clear()
+            for fn, marks, _ in batch:
+                result = fn(game)
+                results.append(result)
+                if is_game(result):
+                    game = result
+                    played.extend(marks)
+            # nothing to write if no update was applied
+            return game if any(map(is_game, results)) else results[-1]
+
+        # The write goes on in its own task if the request writing it is
+        # cancelled: the game may already be updated, the batch is waited for
+        # and its results set before the cancellation goes on, with the lock.
+        write = asyncio.ensure_future(
+            repository.update(game_id=game_id, fn=apply_all, marks=played)
+        )
+        cancelled = False
+        while not write.done():
+            try:
+                await asyncio.wait({write})
+            except asyncio.CancelledError:
+                cancelled = True
+        try:
+            outcome = write.result()
+        except Exception as error:
+            for *_, future in batch:
+                future.set_exception(error)
+        else:
+            for index, (*_, future) in enumerate(batch):
+                if isinstance(outcome, GameNotFound | GameUpdateConflict):
+                    future.set_result(outcome)
+                else:
+                    future.set_result(results[index])
+        if cancelled:
+            raise asyncio.CancelledError
 
 
 class Application:
@@ -34,33 +311,252 @@ class Application:
         self,
         repository: GameRepository,
         generate_game_id: Callable[[], str],
+        transition_table: Optional[TransitionTable] = None,
+        solved_game_table: Optional[SolvedGameTable] = None,
+        rng: Optional[random.Random] = None,
+        updates: Optional[GameUpdates] = None,
+        history: Optional[GameHistory] = None,
+        listing: Optional[GameListing] = None,
+        statistics: Optional[GameStatistics] = None,
+        max_replayed_games: int = 10_000,
+        mailboxes: Optional[GameMailboxes] = None,
+        grids: Optional[GridGameRepository] = None,
     ) -> None:
         self.repository = repository
         self.generate_game_id = generate_game_id
+        self.transition_table = transition_table
+        # built on the first ai move when missing
+        self._solved_game_table = solved_game_table
+        self.rng = rng or random.Random()
+        # games are published after every successful move, if set
+        self.updates = updates
+        self.history = history
+        self.listing = listing
+        self.statistics = statistics
+        # (game id, move number) -> game after the move, least recently used
+        # first: moves never change, cached games never need to be refreshed
+        self.max_replayed_games = max_replayed_games
+        self.replayed_games: OrderedDict[tuple[str, int], Game] = OrderedDict()
+        # concurrent updates of a game are applied together, if set
+        self.mailboxes = mailboxes
+        # games on grids of any size, stored apart from 3 x 3 games
+        self.grids = grids
+
+    @property
+    def solved_game_table(self) -> SolvedGameTable:
+        if self._solved_game_table is None:
+            self._solved_game_table = SolvedGameTable.build()
+        return self._solved_game_table
+
+    async def publish(self, game: GameAggregate) -> None:
+        if self.updates is not None:
+            await self.updates.publish(game)
+
+    def count(self, counts: Mapping[str, int]) -> None:
+        if self.statistics is not None and counts:
+            self.statistics.count(counts)
+
+    async def update(
+        self, game_id: str, fn: GameUpdate, marks: list[Mark]
+    ) -> GameUpdateResult:
+        # `fn` fills `marks` with the marks it added
+        if self.mailboxes is None:
+            return await self.repository.update(game_id=game_id, fn=fn, marks=marks)
+        return await self.mailboxes.update(self.repository, game_id, fn, marks)
 
     async def new_game(self) -> GameAggregate:
         create_new_game = CreateNewGameCommand()
         game = create_new_game()
         game_id = self.generate_game_id()
         await self.repository.insert(game_id=game_id, game=game)
+        self.count(new_games_counts(1))
         return GameAggregate(id=game_id, state=game)
 
+    async def new_games(self, count: int) -> list[GameAggregate]:
+        create_new_game = CreateNewGameCommand()
+        # new games are all alike: a single state is shared by all of them
+        game = create_new_game()
+        games = {self.generate_game_id(): game for _ in range(count)}
+        await self.repository.insert_many(games=games)
+        self.count(new_games_counts(count))
+        return [GameAggregate(id=game_id, state=game) for game_id in games]
+
     async def get_game(self, game_id: str) -> GameAggregate | GameNotFound:
         result = await self.repository.get(game_id=game_id)
         if isinstance(result, GameNotFound):
             return result
         return GameAggregate(id=game_id, state=result)
 
+    def add_mark_command(self, mark: Mark) -> Callable[[Game], Game | GameError]:
+        if self.transition_table is None:
+            return AddMarkCommand(mark=mark)
+        return partial(self.transition_table.add_mark, mark=mark)
+
     async def add_mark(
         self,
         game_id: str,
         mark: Mark,
-    ) -> GameAggregate | GameError | GameNotFound:
-        result = await self.repository.update(
-            game_id=game_id,
-            fn=AddMarkCommand(mark=mark),
+    ) -> GameAggregate | GameError | GameNotFound | GameUpdateConflict:
+        result = await self.update(
+            game_id=game_id, fn=self.add_mark_command(mark), marks=[mark]
         )
         if is_game(result):
-            return GameAggregate(id=game_id, state=result)
+            self.count(marks_counts(result, [mark]))
+            game = GameAggregate(id=game_id, state=result)
+            await self.publish(game)
+            return game
+        # type narrowing does not seem to work
+        return result  # type: ignore
+
+    async def add_marks(
+        self,
+        game_id: str,
+        marks: Sequence[Mark],
+    ) -> MarksAdded | GameNotFound | GameUpdateConflict:
+        add_mark_commands = [self.add_mark_command(mark) for mark in marks]
+        # the outcome of the last attempt the repository made to update the game
+        outcome: list[MarksAdded] = []
+        played: list[Mark] = []
+
+        def add_marks(game: Game) -> Game | GameError:
+            applied = 0
+            error: Optional[GameError] = None
+            for add_mark in add_mark_commands:
+                result = add_mark(game)
+                if not isinstance(result, GameOngoing | GameOver):
+                    error = result
+                    break
+                game = result
+                applied += 1
+            outcome[:] = [
+                MarksAdded(id=game_id, state=game, applied=applied, error=error)
+            ]
+            played[:] = marks[:applied]
+            # nothing to write if no mark was added
+            return error if applied == 0 and error is not None else game
+
+        result = await self.update(game_id=game_id, fn=add_marks, marks=played)
+        if isinstance(result, GameNotFound | GameUpdateConflict):
+            return result
+        marks_added = outcome[0]
+        if marks_added.applied > 0:
+            self.count(marks_counts(marks_added.state, marks[: marks_added.applied]))
+            await self.publish(GameAggregate(id=game_id, state=marks_added.state))
+        return marks_added
+
+    async def play_ai_move(
+        self,
+        game_id: str,
+        difficulty: Difficulty = Difficulty.HARD,
+    ) -> GameAggregate | GameError | GameNotFound | GameUpdateConflict:
+        solved_game_table = self.solved_game_table
+        # the mark of the last attempt the repository made to update the game
+        played: list[Mark] = []
+
+        def play_ai_move(game: Game) -> Game | GameError:
+            mark = solved_game_table.choose_mark(game, difficulty, self.rng)
+            if isinstance(mark, GameIsOver):
+                return mark
+            played[:] = [mark]
+            return self.add_mark_command(mark)(game)
+
+        result = await self.update(game_id=game_id, fn=play_ai_move, marks=played)
+        if is_game(result):
+            self.count(marks_counts(result, played))
+            game = GameAggregate(id=game_id, state=result)
+            await self.publish(game)
+            return game
         # type narrowing does not seem to work
         return result  # type: ignore
+
+    async def list_games(
+        self,
+        filter: GameFilter,
+        order: GameOrder = "created_at",
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> GamePage | InvalidCursor:
+        if self.listing is None:
+            raise ValueError("games can't be listed")
+        return await self.listing.list_games(
+            filter=filter, order=order, limit=limit, cursor=cursor
+        )
+
+    def game_moves(
+        self, game_id: str
+    ) -> AsyncGenerator[Mark | GameNotFound | GameHistoryNotFound, None]:
+        if self.history is None:
+            raise ValueError("game history is not recorded")
+        return self.history.moves(game_id=game_id)
+
+    def _store_replayed_game(self, game_id: str, number: int, game: Game) -> None:
+        self.replayed_games[game_id, number] = game
+        self.replayed_games.move_to_end((game_id, number))
+        if len(self.replayed_games) > self.max_replayed_games:
+            self.replayed_games.popitem(last=False)
+
+    async def game_at(
+        self, game_id: str, number: int
+    ) -> GameAggregate | GameNotFound | GameHistoryNotFound | MoveNotFound:
+        # the game after its first `number` moves, replayed from the closest
+        # game already replayed: only the moves after it are read
+        if self.history is None:
+            raise ValueError("game history is not recorded")
+        replayed = 0
+        game: Game = CreateNewGameCommand()()
+        for cached in range(number, 0, -1):
+            cached_game = self.replayed_games.get((game_id, cached))
+            if cached_game is not None:
+                self.replayed_games.move_to_end((game_id, cached))
+                replayed, game = cached, cached_game
+                break
+        if replayed == number > 0:
+            return GameAggregate(id=game_id, state=game)
+
+        moves = self.history.moves(game_id=game_id, after=replayed, until=number)
+        async with aclosing(moves):
+            async for move in moves:
+                if not isinstance(move, Mark):
+                    return move
+                result = self.add_mark_command(move)(game)
+                if not is_game(result):  # pragma: nocover
+                    raise ValueError(f"invalid move {replayed + 1}: {result}")
+                game = result
+                replayed += 1
+                self._store_replayed_game(game_id, replayed, game)
+        if replayed < number:
+            return MoveNotFound(error="MOVE_NOT_FOUND")
+        return GameAggregate(id=game_id, state=game)
+
+    async def get_stats(self) -> GameStats:
+        if self.statistics is None:
+            raise ValueError("games are not counted")
+        return compute_stats(await self.statistics.read())
+
+    async def new_grid_game(self, size: int, k: int) -> GridGameAggregate:
+        if self.grids is None:
+            raise ValueError("grid games are not stored")
+        grid = CreateNewGridGameCommand(size=size, k=k)()
+        game_id = self.generate_game_id()
+        await self.grids.insert_grid(game_id=game_id, grid=grid)
+        return GridGameAggregate(id=game_id, state=grid)
+
+    async def get_grid_game(self, game_id: str) -> GridGameAggregate | GameNotFound:
+        if self.grids is None:
+            raise ValueError("grid games are not stored")
+        result = await self.grids.get_grid(game_id=game_id)
+        if isinstance(result, GameNotFound):
+            return result
+        return GridGameAggregate(id=game_id, state=result)
+
+    async def add_grid_mark(
+        self, game_id: str, mark: GridMark
+    ) -> GridGameAggregate | GridError | GameNotFound | GameUpdateConflict:
+        if self.grids is None:
+            raise ValueError("grid games are not stored")
+        result = await self.grids.update_grid(
+            game_id=game_id, fn=AddGridMarkCommand(mark=mark)
+        )
+        if isinstance(result, Grid):
+            return GridGameAggregate(id=game_id, state=result)
+        return result
@@ -1,7 +1,8 @@
+from dataclasses import dataclass
 from enum import Enum
-from typing import Annotated, Any, Literal, Mapping, Optional, TypeGuard
-
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Literal, Mapping, NamedTuple, Optional, TypeGuard
 
 
 class Player(Enum):
@@ -37,27 +38,30 @@ WINNING_CELL_COMBINATIONS = frozenset(
 BoardMarks = Mapping[Cell, Player]
 
 
-class Mark(BaseModel):
+# Domain values are immutable and never validated: they are built from
+# values already checked, by the http api (`tic_tac_toe.entrypoints.schemas`)
+# or when read back from storage.
+@dataclass(frozen=True, slots=True)
+class Mark:
     player: Player
     cell: Cell
 
 
-class GameOngoing(BaseModel):
+@dataclass(frozen=True, slots=True)
+class GameOngoing:
     status: Literal["ONGOING"]
     next_player: Player
     marks: BoardMarks
 
 
-class GameOver(BaseModel):
+@dataclass(frozen=True, slots=True)
+class GameOver:
     status: Literal["OVER"]
     winner: Optional[Player]
     marks: BoardMarks
 
 
-Game = Annotated[
-    GameOngoing | GameOver,
-    Field(discriminator="status"),
-]
+Game = GameOngoing | GameOver
 
 
 def is_game(value: Any) -> TypeGuard[Game]:
@@ -66,27 +70,28 @@ def is_game(value: Any) -> TypeGuard[Game]:
     return isinstance(value, GameOngoing | GameOver)
 
 
-class CellAlreadyMarked(BaseModel):
+@dataclass(frozen=True, slots=True)
+class CellAlreadyMarked:
     error: Literal["CELL_ALREADY_MARKED"]
     cell: Cell
 
 
-class PlayerCantMove(BaseModel):
+@dataclass(frozen=True, slots=True)
+class PlayerCantMove:
     error: Literal["PLAYER_CANT_MOVE"]
     player: Player
 
 
-class GameIsOver(BaseModel):
+@dataclass(frozen=True, slots=True)
+class GameIsOver:
     error: Literal["GAME_IS_OVER"]
 
 
-GameError = Annotated[
-    CellAlreadyMarked | GameIsOver | PlayerCantMove,
-    Field(discriminator="error"),
-]
+GameError = CellAlreadyMarked | GameIsOver | PlayerCantMove
 
 
-class CreateNewGameCommand(BaseModel):
+@dataclass(frozen=True, slots=True)
+class CreateNewGameCommand:
     def __call__(self) -> Game:
         return GameOngoing(
             status="ONGOING",
@@ -95,56 +100,118 @@ class CreateNewGameCommand(BaseModel):
         )
 
 
-class AddMarkCommand(BaseModel):
-    mark: Mark
+# one bit per cell, following the declaration order of `Cell`
+CELL_MASKS: Mapping[Cell, int] = {cell: 1 << index for index, cell in enumerate(Cell)}
 
-    def __call__(self, game: Game) -> Game | GameError:
+_BOARD_SIZE = len(Cell)
+FULL_BOARD_MASK = (1 << _BOARD_SIZE) - 1
+
+_PLAYERS_BY_VALUE: tuple[Optional[Player], ...] = (None, Player.ONE, Player.TWO)
+
+
+@lru_cache(maxsize=None)
+def _board_marks(ones: int, twos: int) -> BoardMarks:
+    # at most 3^9 boards, shared by every game on them: read only
+    return MappingProxyType(
+        {
+            cell: Player.ONE if ones & mask else Player.TWO
+            for cell, mask in CELL_MASKS.items()
+            if (ones | twos) & mask
+        }
+    )
+
+
+WINNING_MASKS_BY_CELL: Mapping[Cell, tuple[int, ...]] = {
+    cell: tuple(
+        sum(CELL_MASKS[c] for c in combination)
+        for combination in WINNING_CELL_COMBINATIONS
+        if cell in combination
+    )
+    for cell in Cell
+}
+
+
+class Bitboard(NamedTuple):
+    ones: int
+    twos: int
+    # None once the game is over
+    next_player: Optional[Player]
+    winner: Optional[Player]
+
+    @classmethod
+    def from_game(cls, game: Game) -> "Bitboard":
+        ones = twos = 0
+        for cell, player in game.marks.items():
+            if player is Player.ONE:
+                ones |= CELL_MASKS[cell]
+            else:
+                twos |= CELL_MASKS[cell]
         if isinstance(game, GameOver):
-            return GameIsOver(error="GAME_IS_OVER")
-        if game.next_player != self.mark.player:
-            return PlayerCantMove(error="PLAYER_CANT_MOVE", player=self.mark.player)
-        if self.mark.cell in game.marks:
-            return CellAlreadyMarked(error="CELL_ALREADY_MARKED", cell=self.mark.cell)
-
-        updated_marks = {**game.marks, self.mark.cell: self.mark.player}
-        cells_marked_by_player = frozenset(
-            [
-                cell
-                for cell, player in updated_marks.items()
-                if player == self.mark.player
-            ]
-        )
-        winning_combinations_to_check = frozenset(
-            [
-                combination
-                for combination in WINNING_CELL_COMBINATIONS
-                if self.mark.cell in combination
-            ]
+            return cls(ones, twos, None, game.winner)
+        return cls(ones, twos, game.next_player, None)
+
+    @classmethod
+    def decode(cls, value: int) -> "Bitboard":
+        return cls(
+            value & FULL_BOARD_MASK,
+            (value >> _BOARD_SIZE) & FULL_BOARD_MASK,
+            _PLAYERS_BY_VALUE[(value >> (2 * _BOARD_SIZE)) & 0b11],
+            _PLAYERS_BY_VALUE[(value >> (2 * _BOARD_SIZE + 2)) & 0b11],
         )
 
-        is_player_winner = any(
-            (
-                combination.issubset(cells_marked_by_player)
-                for combination in winning_combinations_to_check
-            )
+    def encode(self) -> int:
+        # | winner (2 bits) | next player (2 bits) | twos (9 bits) | ones (9 bits) |
+        return (
+            self.ones
+            | self.twos << _BOARD_SIZE
+            | (0 if self.next_player is None else self.next_player.value)
+            << (2 * _BOARD_SIZE)
+            | (0 if self.winner is None else self.winner.value) << (2 * _BOARD_SIZE + 2)
         )
 
-        if is_player_winner:
-            return GameOver(
-                status="OVER",
-                winner=self.mark.player,
-                marks=updated_marks,
-            )
+    def to_game(self) -> Game:
+        marks = _board_marks(self.ones, self.twos)
+        if self.next_player is None:
+            return GameOver(status="OVER", winner=self.winner, marks=marks)
+        return GameOngoing(status="ONGOING", next_player=self.next_player, marks=marks)
 
-        if updated_marks.keys() == set(Cell):
-            return GameOver(
-                status="OVER",
-                winner=None,
-                marks=updated_marks,
-            )
+    def add_mark(self, mark: Mark) -> "Bitboard | GameError":
+        if self.next_player is None:
+            return GameIsOver(error="GAME_IS_OVER")
+        if self.next_player is not mark.player:
+            return PlayerCantMove(error="PLAYER_CANT_MOVE", player=mark.player)
+        cell_mask = CELL_MASKS[mark.cell]
+        if (self.ones | self.twos) & cell_mask:
+            return CellAlreadyMarked(error="CELL_ALREADY_MARKED", cell=mark.cell)
+
+        if mark.player is Player.ONE:
+            ones, twos, player_mask = self.ones | cell_mask, self.twos, self.ones
+            next_player = Player.TWO
+        else:
+            ones, twos, player_mask = self.ones, self.twos | cell_mask, self.twos
+            next_player = Player.ONE
+        player_mask |= cell_mask
+
+        # only the lines passing through the new mark can have been completed
+        for winning_mask in WINNING_MASKS_BY_CELL[mark.cell]:
+            if player_mask & winning_mask == winning_mask:
+                return Bitboard(ones, twos, None, mark.player)
+        if ones | twos == FULL_BOARD_MASK:
+            return Bitboard(ones, twos, None, None)
+        return Bitboard(ones, twos, next_player, None)
+
+
+@dataclass(frozen=True, slots=True)
+class AddMarkCommand:
+    mark: Mark
 
-        return GameOngoing(
-            status="ONGOING",
-            next_player=Player.ONE if game.next_player == Player.TWO else Player.TWO,
-            marks=updated_marks,
-        )
+    def __call__(self, game: Game) -> Game | GameError:
+        result = Bitboard.from_game(game).add_mark(self.mark)
+        if isinstance(result, Bitboard):
+            return result.to_game()
+        return result
+
+
+WINNING_MASKS = frozenset(
+    mask for masks in WINNING_MASKS_BY_CELL.values() for mask in masks
+)
@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Literal, NamedTuple, Optional
+
+from .data import GameIsOver, Player, PlayerCantMove
+
+# Games on a size x size grid, won by k marks in a row: 3 x 3 with 3 in a
+# row is tic-tac-toe, 15 x 15 with 5 in a row is gomoku. The board of
+# `Cell` is kept by the 3 x 3 api, cells here are numbered row by row.
+MAX_GRID_SIZE = 25
+# up to connect6: the masks of a variant take a few milliseconds to compute
+MAX_GRID_K = 6
+# variants whose masks are kept, least recently used are computed again
+MAX_CACHED_VARIANTS = 32
+
+# row, column steps of the lines: across, down, both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=MAX_CACHED_VARIANTS)
+def winning_masks(size: int, k: int) -> tuple[tuple[int, ...], ...]:
+    # for every cell, the k in a row passing through it: a mark can only
+    # complete one of these, at most 4 * k of them whatever the size
+    masks: list[list[int]] = [[] for _ in range(size * size)]
+    for row in range(size):
+        for column in range(size):
+            for row_step, column_step in DIRECTIONS:
+                end_row = row + (k - 1) * row_step
+                end_column = column + (k - 1) * column_step
+                if not (0 <= end_row < size and 0 <= end_column < size):
+                    continue
+                cells = [
+                    (row + i * row_step) * size + column + i * column_step
+                    for i in range(k)
+                ]
+                mask = sum(1 << cell for cell in cells)
+                for cell in cells:
+                    masks[cell].append(mask)
+    return tuple(tuple(cell_masks) for cell_masks in masks)
+
+
+@dataclass(frozen=True, slots=True)
+class GridMark:
+    player: Player
+    row: int
+    column: int
+
+
+@dataclass(frozen=True, slots=True)
+class GridCellAlreadyMarked:
+    error: Literal["CELL_ALREADY_MARKED"]
+    row: int
+    column: int
+
+
+@dataclass(frozen=True, slots=True)
+class CellOutsideGrid:
+    error: Literal["CELL_OUTSIDE_GRID"]
+    row: int
+    column: int
+
+
+GridError = CellOutsideGrid | GridCellAlreadyMarked | GameIsOver | PlayerCantMove
+
+
+class Grid(NamedTuple):
+    size: int
+    k: int
+    # one bit per cell of each player
+    ones: int
+    twos: int
+    # None once the game is over
+    next_player: Optional[Player]
+    winner: Optional[Player]
+
+    def player_at(self, row: int, column: int) -> Optional[Player]:
+        mask = 1 << (row * self.size + column)
+        if self.ones & mask:
+            return Player.ONE
+        if self.twos & mask:
+            return Player.TWO
+        return None
+
+    def add_mark(self, mark: GridMark) -> "Grid | GridError":
+        if self.next_player is None:
+            return GameIsOver(error="GAME_IS_OVER")
+        if self.next_player is not mark.player:
+            return PlayerCantMove(error="PLAYER_CANT_MOVE", player=mark.player)
+        if not (0 <= mark.row < self.size and 0 <= mark.column < self.size):
+            return CellOutsideGrid(
+                error="CELL_OUTSIDE_GRID", row=mark.row, column=mark.column
+            )
+        cell = mark.row * self.size + mark.column
+        cell_mask = 1 << cell
+        if (self.ones | self.twos) & cell_mask:
+            return GridCellAlreadyMarked(
+                error="CELL_ALREADY_MARKED", row=mark.row, column=mark.column
+            )
+
+        if mark.player is Player.ONE:
+            ones, twos, player_mask = self.ones | cell_mask, self.twos, self.ones
+            next_player = Player.TWO
+        else:
+            ones, twos, player_mask = self.ones, self.twos | cell_mask, self.twos
+            next_player = Player.ONE
+        player_mask |= cell_mask
+
+        # as for the 3 x 3 board: only the lines through the new mark
+        for winning_mask in winning_masks(self.size, self.k)[cell]:
+            if player_mask & winning_mask == winning_mask:
+                return self._replace(
+                    ones=ones, twos=twos, next_player=None, winner=mark.player
+                )
+        if ones | twos == (1 << self.size * self.size) - 1:
+            return self._replace(ones=ones, twos=twos, next_player=None)
+        return self._replace(ones=ones, twos=twos, next_player=next_player)
+
+
+@dataclass(frozen=True, slots=True)
+class CreateNewGridGameCommand:
+    size: int = 3
+    # marks in a row to win
+    k: int = 3
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.size <= MAX_GRID_SIZE:
+            raise ValueError(f"the size of the grid must be from 1 to {MAX_GRID_SIZE}")
+        if not 1 <= self.k <= min(self.size, MAX_GRID_K):
+            raise ValueError(
+                f"k must be from 1 to the size of the grid, and at most {MAX_GRID_K}"
+            )
+
+    def __call__(self) -> Grid:
+        # computed once per variant, before the first move
+        winning_masks(self.size, self.k)
+        return Grid(self.size, self.k, 0, 0, Player.ONE, None)
+
+
+@dataclass(frozen=True, slots=True)
+class AddGridMarkCommand:
+    mark: GridMark
+
+    def __call__(self, grid: Grid) -> Grid | GridError:
+        return grid.add_mark(self.mark)
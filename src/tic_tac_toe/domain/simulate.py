@@ -0,0 +1,151 @@
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .data import FULL_BOARD_MASK, WINNING_MASKS, Bitboard, Cell, Game, Player
+from .stats import (
+    DRAWS,
+    GAMES_OVER,
+    GAMES_STARTED,
+    MOVES,
+    opening_counter,
+    wins_counter,
+)
+
+# Many games played together, one numpy array per field of `Bitboard`: a
+# move of every game is a few operations over whole arrays. Needs numpy,
+# installed with the `simulate` extra.
+
+CELLS = tuple(Cell)
+
+# values of next_player and winner, as encoded by `Bitboard`: NOBODY is no
+# winner, or no next player once the game is over
+NOBODY, ONE, TWO = 0, 1, 2
+PLAYERS: tuple[Optional[Player], ...] = (None, Player.ONE, Player.TWO)
+
+# result of a move, for each game
+MARKED = 0
+GAME_IS_OVER = 1
+CELL_ALREADY_MARKED = 2
+
+Cells = npt.NDArray[np.intp]
+Errors = npt.NDArray[np.uint8]
+
+_MASKS = np.arange(FULL_BOARD_MASK + 1)
+# for every 9 bits mask of a player: does it hold a winning combination?
+_WINS = np.zeros(FULL_BOARD_MASK + 1, dtype=bool)
+for _winning_mask in WINNING_MASKS:
+    _WINS |= _MASKS & _winning_mask == _winning_mask
+# for every mask of the marked cells: how many cells are left, and the n-th
+_FREE_COUNTS = np.array(
+    [len(CELLS) - bin(mask).count("1") for mask in range(FULL_BOARD_MASK + 1)]
+)
+_FREE_CELLS = np.zeros((FULL_BOARD_MASK + 1, len(CELLS)), dtype=np.intp)
+for _mask in range(FULL_BOARD_MASK + 1):
+    _free = [cell for cell in range(len(CELLS)) if not _mask >> cell & 1]
+    _FREE_CELLS[_mask, : len(_free)] = _free
+
+
+class Simulation:
+    def __init__(self, games: int):
+        self.ones = np.zeros(games, dtype=np.uint16)
+        self.twos = np.zeros(games, dtype=np.uint16)
+        self.next_player = np.full(games, ONE, dtype=np.uint8)
+        self.winner = np.full(games, NOBODY, dtype=np.uint8)
+        self.moves = np.zeros(games, dtype=np.uint8)
+        # the first cell marked, -1 before the first move
+        self.openings = np.full(games, -1, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.ones)
+
+    def add_marks(self, cells: Cells) -> Errors:
+        # The next player of every game marks its cell, an index in `CELLS`:
+        # as AddMarkCommand, except games with an error are left unchanged
+        # and the error of each game is returned. Marks of games over are
+        # ignored, scripts of games of different lengths can be padded.
+        bits = np.left_shift(1, cells).astype(np.uint16)
+        ongoing = self.next_player != NOBODY
+        free = (self.ones | self.twos) & bits == 0
+        marked = ongoing & free
+        ones_move = marked & (self.next_player == ONE)
+        twos_move = marked & (self.next_player == TWO)
+        self.ones |= bits * ones_move
+        self.twos |= bits * twos_move
+
+        opened = marked & (self.moves == 0)
+        self.openings[opened] = cells[opened]
+        self.moves += marked
+        won = ones_move & _WINS[self.ones] | twos_move & _WINS[self.twos]
+        self.winner[won] = self.next_player[won]
+        over = won | marked & ((self.ones | self.twos) == FULL_BOARD_MASK)
+        # ONE <-> TWO
+        self.next_player ^= (ONE ^ TWO) * marked.astype(np.uint8)
+        self.next_player[over] = NOBODY
+
+        errors = np.full(len(self), MARKED, dtype=np.uint8)
+        errors[~ongoing] = GAME_IS_OVER
+        errors[ongoing & ~free] = CELL_ALREADY_MARKED
+        return errors
+
+    def random_cells(self, rng: np.random.Generator) -> Cells:
+        # a cell still free of every game, any of them as likely
+        marked = self.ones | self.twos
+        nth = (rng.random(len(self)) * _FREE_COUNTS[marked]).astype(np.intp)
+        return _FREE_CELLS[marked, nth]
+
+    def is_over(self) -> bool:
+        return not self.next_player.any()
+
+    def encode(self) -> npt.NDArray[np.uint32]:
+        # as Bitboard.encode, the games as stored in the `board` format
+        return (
+            self.ones.astype(np.uint32)
+            | self.twos.astype(np.uint32) << len(CELLS)
+            | self.next_player.astype(np.uint32) << 2 * len(CELLS)
+            | self.winner.astype(np.uint32) << 2 * len(CELLS) + 2
+        )
+
+    def game(self, index: int) -> Game:
+        return Bitboard(
+            int(self.ones[index]),
+            int(self.twos[index]),
+            PLAYERS[self.next_player[index]],
+            PLAYERS[self.winner[index]],
+        ).to_game()
+
+    def counts(self) -> dict[str, int]:
+        # the counters of tic_tac_toe.domain.stats, of all the games
+        over = self.next_player == NOBODY
+        counts = {
+            GAMES_STARTED: len(self),
+            GAMES_OVER: int(over.sum()),
+            DRAWS: int((over & (self.winner == NOBODY)).sum()),
+            wins_counter(Player.ONE): int((self.winner == ONE).sum()),
+            wins_counter(Player.TWO): int((self.winner == TWO).sum()),
+            MOVES: int(self.moves[over].sum()),
+        }
+        openings = np.bincount(self.openings[self.openings >= 0], minlength=len(CELLS))
+        for cell, games in zip(CELLS, openings):
+            if games:
+                counts[opening_counter(cell)] = int(games)
+        return counts
+
+
+def play_random(games: int, rng: Optional[np.random.Generator] = None) -> Simulation:
+    # games where both players mark a random free cell, until they are over
+    rng = np.random.default_rng() if rng is None else rng
+    simulation = Simulation(games)
+    # every move marks a free cell: all the games are over after 9 moves
+    for _ in CELLS:
+        simulation.add_marks(simulation.random_cells(rng))
+    return simulation
+
+
+def play(script: Cells) -> Simulation:
+    # game i marks the cells script[i], in order
+    simulation = Simulation(len(script))
+    for cells in script.T:
+        simulation.add_marks(cells)
+    return simulation
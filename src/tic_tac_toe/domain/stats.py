@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+from .data import Cell, Game, GameOver, Mark, Player
+
+# Counters are named, and only ever added to: counts of several processes
+# add up, and they can be stored as (name, value) rows.
+GAMES_STARTED = "games_started"
+GAMES_OVER = "games_over"
+DRAWS = "draws"
+# marks of the games that are over
+MOVES = "moves"
+
+
+def wins_counter(player: Player) -> str:
+    return f"wins_{player.value}"
+
+
+def opening_counter(cell: Cell) -> str:
+    return f"opening_{cell.value}"
+
+
+def new_games_counts(count: int) -> dict[str, int]:
+    return {GAMES_STARTED: count}
+
+
+def marks_counts(result: Game, marks: Sequence[Mark]) -> dict[str, int]:
+    # `marks` were added in this order to get `result`
+    counts = {}
+    if marks and len(result.marks) == len(marks):
+        # the first marks of the game
+        counts[opening_counter(marks[0].cell)] = 1
+    if isinstance(result, GameOver):
+        counts[GAMES_OVER] = 1
+        counts[MOVES] = len(result.marks)
+        if result.winner is None:
+            counts[DRAWS] = 1
+        else:
+            counts[wins_counter(result.winner)] = 1
+    return counts
+
+
+@dataclass(frozen=True, slots=True)
+class Opening:
+    cell: Cell
+    games: int
+
+
+@dataclass(frozen=True, slots=True)
+class GameStats:
+    games_started: int
+    games_over: int
+    # rates and length are over the games that are over
+    player_one_win_rate: float
+    player_two_win_rate: float
+    draw_rate: float
+    average_game_length: float
+    # most played first
+    openings: list[Opening]
+
+
+def compute_stats(counts: Mapping[str, int]) -> GameStats:
+    games_over = counts.get(GAMES_OVER, 0)
+
+    def rate(counter: str) -> float:
+        return counts.get(counter, 0) / games_over if games_over else 0.0
+
+    openings = [
+        Opening(cell=cell, games=counts[opening_counter(cell)])
+        for cell in Cell
+        if counts.get(opening_counter(cell))
+    ]
+    return GameStats(
+        games_started=counts.get(GAMES_STARTED, 0),
+        games_over=games_over,
+        player_one_win_rate=rate(wins_counter(Player.ONE)),
+        player_two_win_rate=rate(wins_counter(Player.TWO)),
+        draw_rate=rate(DRAWS),
+        average_game_length=rate(MOVES),
+        openings=sorted(openings, key=lambda opening: -opening.games),
+    )
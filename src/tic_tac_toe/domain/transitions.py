@@ -0,0 +1,74 @@
+from collections import deque
+from typing import Mapping
+
+from .data import (
+    AddMarkCommand,
+    Bitboard,
+    Cell,
+    CellAlreadyMarked,
+    CreateNewGameCommand,
+    Game,
+    GameError,
+    GameIsOver,
+    Mark,
+    Player,
+    PlayerCantMove,
+)
+
+Transitions = Mapping[tuple[Player, Cell], Game | GameError]
+
+
+class TransitionTable:
+    def __init__(self, transitions: Mapping[int, Transitions]) -> None:
+        # encoded bitboard -> every mark that can be added -> result
+        self.transitions = transitions
+
+    @classmethod
+    def build(cls) -> "TransitionTable":
+        game_is_over = GameIsOver(error="GAME_IS_OVER")
+        cell_already_marked = {
+            cell: CellAlreadyMarked(error="CELL_ALREADY_MARKED", cell=cell)
+            for cell in Cell
+        }
+        player_cant_move = {
+            player: PlayerCantMove(error="PLAYER_CANT_MOVE", player=player)
+            for player in Player
+        }
+        marks = [Mark(player=player, cell=cell) for player in Player for cell in Cell]
+        # a single model instance per position, shared by all transitions
+        games: dict[int, Game] = {}
+        transitions: dict[int, Transitions] = {}
+
+        new_game = Bitboard.from_game(CreateNewGameCommand()())
+        to_visit = deque([new_game])
+        games[new_game.encode()] = new_game.to_game()
+        while to_visit:
+            board = to_visit.popleft()
+            results: dict[tuple[Player, Cell], Game | GameError] = {}
+            for mark in marks:
+                move = mark.player, mark.cell
+                result = board.add_mark(mark)
+                if isinstance(result, PlayerCantMove):
+                    results[move] = player_cant_move[mark.player]
+                elif isinstance(result, CellAlreadyMarked):
+                    results[move] = cell_already_marked[mark.cell]
+                elif isinstance(result, GameIsOver):
+                    results[move] = game_is_over
+                else:
+                    key = result.encode()
+                    if key not in games:
+                        games[key] = result.to_game()
+                        to_visit.append(result)
+                    results[move] = games[key]
+            transitions[board.encode()] = results
+        return cls(transitions=transitions)
+
+    def __len__(self) -> int:
+        return len(self.transitions)
+
+    def add_mark(self, game: Game, mark: Mark) -> Game | GameError:
+        transitions = self.transitions.get(Bitboard.from_game(game).encode())
+        if transitions is None:
+            # position not reachable from a new game
+            return AddMarkCommand(mark=mark)(game)
+        return transitions[mark.player, mark.cell]
@@ -1,62 +1,503 @@
-from fastapi import FastAPI, status
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+import asyncio
+import time
+from contextlib import aclosing
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Optional,
+    Sequence,
+)
 
-from tic_tac_toe.domain.application import Application, GameAggregate, GameNotFound
-from tic_tac_toe.domain.data import GameError, Mark
+from fastapi import Body, FastAPI, Path, Query, WebSocket, status
+from fastapi.responses import Response, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from tic_tac_toe.adapters.metrics import CONTENT_TYPE, REGISTRY
+from tic_tac_toe.adapters.profiling import StackSampler
+from tic_tac_toe.adapters.serialization import dumps
+from tic_tac_toe.domain.ai import Difficulty
+from tic_tac_toe.domain.application import (
+    Application,
+    GameAggregate,
+    GameFilter,
+    GameHistoryNotFound,
+    GameNotFound,
+    GameOrder,
+    GameStatus,
+    GameUpdateConflict,
+    GameUpdates,
+    GridGameAggregate,
+    InvalidCursor,
+    MarksAdded,
+)
+from tic_tac_toe.domain.data import Cell, GameOver, Player
+from tic_tac_toe.entrypoints import schemas
 
-def create_asgi_app(application: Application) -> FastAPI:
+MAX_GAMES_PER_BATCH = 10_000
+MAX_GAMES_PER_PAGE = 1000
 
-    api = FastAPI()
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_seconds",
+    "Time to answer a request, up to the end of the response body",
+    labels=("method", "route", "status"),
+)
+ENCODE_SECONDS = REGISTRY.histogram(
+    "http_response_encode_seconds",
+    "Time to encode the json body of a response",
+)
+ENCODE = ENCODE_SECONDS.labels()
+
+
+class GameJSONResponse(Response):
+    # returning a response skips the validation against `response_model` and
+    # `jsonable_encoder`: game models are encoded by hand instead
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class TimedGameJSONResponse(GameJSONResponse):
+    # the responses of the routes with metrics
+    def render(self, content: Any) -> bytes:
+        started_at = time.perf_counter()
+        body = dumps(content)
+        ENCODE.observe(time.perf_counter() - started_at)
+        return body
+
+
+class MetricsMiddleware:
+    # A plain asgi middleware: `BaseHTTPMiddleware` runs the application in
+    # another task. Requests are labelled with the path of their route, e.g.
+    # `/games/{game_id}`, so the number of series doesn't grow with games.
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # endpoint -> path of its route
+        self.paths: dict[Any, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        # unless a response is started
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.labels(
+                scope["method"], self.route_path(scope), str(status_code)
+            ).observe(time.perf_counter() - started_at)
+
+    def route_path(self, scope: Scope) -> str:
+        # the router adds the endpoint of the route it matched to the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "<unmatched>"
+        path = self.paths.get(endpoint)
+        if path is None:
+            for route in scope["router"].routes:
+                self.paths[getattr(route, "endpoint", None)] = route.path
+            path = self.paths.get(endpoint, "<unmatched>")
+        return path
+
+
+class ProfilingMiddleware:
+    # requests are sampled here: the application and the repository calls of
+    # a request are all in the stacks sampled while it is in flight
+    def __init__(self, app: ASGIApp, sampler: StackSampler):
+        self.app = app
+        self.sampler = sampler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.sampler.should_profile(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        self.sampler.start_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.sampler.end_request()
+
+
+async def watch_game(
+    application: Application, updates: GameUpdates, game_id: str
+) -> AsyncGenerator[GameAggregate | GameNotFound, None]:
+    # the current game, then every update until the game is over
+    async with updates.subscribe(game_id) as subscription:
+        # read after subscribing: no update can be missed in between
+        result = await application.get_game(game_id=game_id)
+        yield result
+        if isinstance(result, GameNotFound):
+            return
+        game = result
+        while not isinstance(game.state, GameOver):
+            game = await anext(subscription)
+            yield game
+
+
+def create_asgi_app(
+    application: Application,
+    on_startup: Sequence[Callable[[], Awaitable[None]]] = (),
+    on_shutdown: Sequence[Callable[[], Awaitable[None]]] = (),
+    metrics: bool = False,
+    # not even a middleware without it
+    profiler: Optional[StackSampler] = None,
+) -> FastAPI:
+
+    api = FastAPI(on_startup=list(on_startup), on_shutdown=list(on_shutdown))
+    GameResponse = TimedGameJSONResponse if metrics else GameJSONResponse
+
+    if profiler is not None:
+        api.add_middleware(ProfilingMiddleware, sampler=profiler)
+
+    if metrics:
+        api.add_middleware(MetricsMiddleware)
+
+        @api.get(
+            "/metrics",
+            response_class=Response,
+            responses={status.HTTP_200_OK: {"content": {CONTENT_TYPE: {}}}},
+        )
+        async def get_metrics() -> Response:
+            # prometheus text format
+            return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
     @api.post(
         "/games",
-        response_model=GameAggregate,
+        response_model=schemas.GameAggregate,
         status_code=status.HTTP_201_CREATED,
     )
-    async def new_game() -> GameAggregate:
-        return await application.new_game()
+    async def new_game() -> Response:
+        result = await application.new_game()
+        return GameResponse(content=result, status_code=status.HTTP_201_CREATED)
+
+    @api.post(
+        "/games:batch",
+        response_model=list[schemas.GameAggregate],
+        status_code=status.HTTP_201_CREATED,
+    )
+    async def new_games(count: int = Query(ge=1, le=MAX_GAMES_PER_BATCH)) -> Response:
+        result = await application.new_games(count=count)
+        return GameResponse(content=result, status_code=status.HTTP_201_CREATED)
 
     @api.get(
         "/games/{game_id}",
-        response_model=GameAggregate,
+        response_model=schemas.GameAggregate,
         responses={
-            status.HTTP_404_NOT_FOUND: {"model": GameNotFound},
+            status.HTTP_404_NOT_FOUND: {"model": schemas.GameNotFound},
         },
     )
-    async def get_game(game_id: str) -> GameAggregate | JSONResponse:
+    async def get_game(game_id: str) -> Response:
         result = await application.get_game(game_id=game_id)
         if isinstance(result, GameNotFound):
-            return JSONResponse(
-                content=jsonable_encoder(result),
+            return GameResponse(
+                content=result,
                 status_code=status.HTTP_404_NOT_FOUND,
             )
-        return result
+        return GameResponse(content=result)
 
     @api.post(
         "/games/{game_id}/mark",
-        response_model=GameAggregate,
+        response_model=schemas.GameAggregate,
         responses={
-            status.HTTP_400_BAD_REQUEST: {"model": GameError},
-            status.HTTP_404_NOT_FOUND: {"model": GameNotFound},
+            status.HTTP_400_BAD_REQUEST: {"model": schemas.GameError},
+            status.HTTP_404_NOT_FOUND: {"model": schemas.GameNotFound},
+            status.HTTP_409_CONFLICT: {"model": schemas.GameUpdateConflict},
         },
     )
-    async def add_mark(game_id: str, mark: Mark) -> GameAggregate | JSONResponse:
-        result = await application.add_mark(game_id=game_id, mark=mark)
+    async def add_mark(game_id: str, mark: schemas.Mark) -> Response:
+        result = await application.add_mark(game_id=game_id, mark=mark.to_domain())
 
         if isinstance(result, GameAggregate):
-            return result
+            return GameResponse(content=result)
+
+        if isinstance(result, GameNotFound):
+            status_code = status.HTTP_404_NOT_FOUND
+        elif isinstance(result, GameUpdateConflict):
+            status_code = status.HTTP_409_CONFLICT
+        else:
+            status_code = status.HTTP_400_BAD_REQUEST
+
+        return GameResponse(
+            content=result,
+            status_code=status_code,
+        )
 
-        status_code = (
-            status.HTTP_404_NOT_FOUND
-            if isinstance(result, GameNotFound)
-            else status.HTTP_400_BAD_REQUEST
+    @api.post(
+        "/games/{game_id}/marks",
+        response_model=schemas.MarksAdded,
+        responses={
+            status.HTTP_404_NOT_FOUND: {"model": schemas.GameNotFound},
+            status.HTTP_409_CONFLICT: {"model": schemas.GameUpdateConflict},
+        },
+    )
+    async def add_marks(
+        game_id: str,
+        marks: list[schemas.Mark] = Body(min_items=1, max_items=len(Cell)),
+    ) -> Response:
+        result = await application.add_marks(
+            game_id=game_id, marks=[mark.to_domain() for mark in marks]
         )
 
-        return JSONResponse(
-            content=jsonable_encoder(result),
+        if isinstance(result, MarksAdded):
+            return GameResponse(content=result)
+
+        return GameResponse(
+            content=result,
+            status_code=(
+                status.HTTP_404_NOT_FOUND
+                if isinstance(result, GameNotFound)
+                else status.HTTP_409_CONFLICT
+            ),
+        )
+
+    @api.post(
+        "/games/{game_id}/ai-move",
+        response_model=schemas.GameAggregate,
+        responses={
+            status.HTTP_400_BAD_REQUEST: {"model": schemas.GameError},
+            status.HTTP_404_NOT_FOUND: {"model": schemas.GameNotFound},
+            status.HTTP_409_CONFLICT: {"model": schemas.GameUpdateConflict},
+        },
+    )
+    async def play_ai_move(
+        game_id: str,
+        difficulty: Difficulty = Difficulty.HARD,
+    ) -> Response:
+        result = await application.play_ai_move(game_id=game_id, difficulty=difficulty)
+
+        if isinstance(result, GameAggregate):
+            return GameResponse(content=result)
+
+        if isinstance(result, GameNotFound):
+            status_code = status.HTTP_404_NOT_FOUND
+        elif isinstance(result, GameUpdateConflict):
+            status_code = status.HTTP_409_CONFLICT
+        else:
+            status_code = status.HTTP_400_BAD_REQUEST
+
+        return GameResponse(
+            content=result,
             status_code=status_code,
         )
 
+    if application.grids is not None:
+
+        @api.post(
+            "/grid-games",
+            response_model=schemas.GridGameAggregate,
+            status_code=status.HTTP_201_CREATED,
+        )
+        async def new_grid_game(
+            game: schemas.NewGridGame = Body(default=schemas.NewGridGame()),
+        ) -> Response:
+            result = await application.new_grid_game(size=game.size, k=game.k)
+            return GameResponse(content=result, status_code=status.HTTP_201_CREATED)
+
+        @api.get(
+            "/grid-games/{game_id}",
+            response_model=schemas.GridGameAggregate,
+            responses={
+                status.HTTP_404_NOT_FOUND: {"model": schemas.GameNotFound},
+            },
+        )
+        async def get_grid_game(game_id: str) -> Response:
+            result = await application.get_grid_game(game_id=game_id)
+            if isinstance(result, GameNotFound):
+                return GameResponse(
+                    content=result, status_code=status.HTTP_404_NOT_FOUND
+                )
+            return GameResponse(content=result)
+
+        @api.post(
+            "/grid-games/{game_id}/mark",
+            response_model=schemas.GridGameAggregate,
+            responses={
+                status.HTTP_400_BAD_REQUEST: {"model": schemas.GridError},
+                status.HTTP_404_NOT_FOUND: {"model": schemas.GameNotFound},
+                status.HTTP_409_CONFLICT: {"model": schemas.GameUpdateConflict},
+            },
+        )
+        async def add_grid_mark(game_id: str, mark: schemas.GridMark) -> Response:
+            result = await application.add_grid_mark(
+                game_id=game_id, mark=mark.to_domain()
+            )
+
+            if isinstance(result, GridGameAggregate):
+                return GameResponse(content=result)
+
+            if isinstance(result, GameNotFound):
+                status_code = status.HTTP_404_NOT_FOUND
+            elif isinstance(result, GameUpdateConflict):
+                status_code = status.HTTP_409_CONFLICT
+            else:
+                status_code = status.HTTP_400_BAD_REQUEST
+
+            return GameResponse(content=result, status_code=status_code)
+
+    if application.statistics is not None:
+
+        @api.get("/stats", response_model=schemas.GameStats)
+        async def get_stats() -> Response:
+            return GameResponse(content=await application.get_stats())
+
+    if application.listing is not None:
+
+        @api.get(
+            "/games",
+            response_model=schemas.GamePage,
+            responses={
+                status.HTTP_400_BAD_REQUEST: {"model": schemas.InvalidCursor},
+            },
+        )
+        async def list_games(
+            status_: Optional[GameStatus] = Query(default=None, alias="status"),
+            # query parameters are strings: the value of a player is an int
+            winner: Optional[int] = Query(default=None, ge=1, le=len(Player)),
+            created_after: Optional[datetime] = None,
+            created_before: Optional[datetime] = None,
+            finished_after: Optional[datetime] = None,
+            finished_before: Optional[datetime] = None,
+            order: GameOrder = "created_at",
+            limit: int = Query(default=100, ge=1, le=MAX_GAMES_PER_PAGE),
+            cursor: Optional[str] = None,
+        ) -> Response:
+            result = await application.list_games(
+                filter=GameFilter(
+                    status=status_,
+                    winner=None if winner is None else Player(winner),
+                    created_after=created_after,
+                    created_before=created_before,
+                    finished_after=finished_after,
+                    finished_before=finished_before,
+                ),
+                order=order,
+                limit=limit,
+                cursor=cursor,
+            )
+            if isinstance(result, InvalidCursor):
+                return GameResponse(
+                    content=result, status_code=status.HTTP_400_BAD_REQUEST
+                )
+            return GameResponse(content=result)
+
+    if application.history is not None:
+
+        @api.get(
+            "/games/{game_id}/moves",
+            response_class=StreamingResponse,
+            responses={
+                status.HTTP_200_OK: {"content": {"application/x-ndjson": {}}},
+                status.HTTP_404_NOT_FOUND: {
+                    "model": schemas.GameNotFound | schemas.GameHistoryNotFound
+                },
+            },
+        )
+        async def game_moves(game_id: str) -> Response:
+            # one mark per line, in playing order
+            moves = application.game_moves(game_id=game_id)
+            first_move = await anext(moves, None)
+            if isinstance(first_move, GameNotFound | GameHistoryNotFound):
+                await moves.aclose()
+                return GameResponse(
+                    content=first_move, status_code=status.HTTP_404_NOT_FOUND
+                )
+
+            async def lines() -> AsyncIterator[bytes]:
+                async with aclosing(moves):
+                    if first_move is not None:
+                        yield dumps(first_move) + b"\n"
+                    async for move in moves:
+                        yield dumps(move) + b"\n"
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        @api.get(
+            "/games/{game_id}/at/{number}",
+            response_model=schemas.GameAggregate,
+            responses={
+                status.HTTP_404_NOT_FOUND: {
+                    "model": schemas.GameNotFound
+                    | schemas.GameHistoryNotFound
+                    | schemas.MoveNotFound
+                },
+            },
+        )
+        async def game_at(
+            game_id: str, number: int = Path(ge=0, le=len(Cell))
+        ) -> Response:
+            # the game after its first `number` moves
+            result = await application.game_at(game_id=game_id, number=number)
+            if isinstance(result, GameAggregate):
+                return GameResponse(content=result)
+            return GameResponse(content=result, status_code=status.HTTP_404_NOT_FOUND)
+
+    if application.updates is None:
+        return api
+    updates: GameUpdates = application.updates
+
+    @api.websocket("/games/{game_id}/updates")
+    async def websocket_game_updates(websocket: WebSocket, game_id: str) -> None:
+        await websocket.accept()
+
+        async def wait_for_disconnect() -> None:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+
+        disconnected = asyncio.create_task(wait_for_disconnect())
+        games = watch_game(application, updates, game_id)
+        try:
+            while True:
+                next_game = asyncio.ensure_future(anext(games))
+                await asyncio.wait(
+                    {next_game, disconnected}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not next_game.done():
+                    # the client went away while waiting for an update
+                    next_game.cancel()
+                    await asyncio.wait({next_game})
+                    return
+                try:
+                    game = next_game.result()
+                except StopAsyncIteration:
+                    break
+                await websocket.send_text(dumps(game).decode())
+            await websocket.close()
+        finally:
+            disconnected.cancel()
+            await games.aclose()
+
+    @api.get(
+        "/games/{game_id}/updates",
+        response_class=StreamingResponse,
+        responses={
+            status.HTTP_200_OK: {"content": {"text/event-stream": {}}},
+            status.HTTP_404_NOT_FOUND: {"model": schemas.GameNotFound},
+        },
+    )
+    async def server_sent_game_updates(game_id: str) -> Response:
+        # server-sent events, for clients that can't use websockets
+        result = await application.get_game(game_id=game_id)
+        if isinstance(result, GameNotFound):
+            return GameResponse(content=result, status_code=status.HTTP_404_NOT_FOUND)
+
+        async def events() -> AsyncIterator[bytes]:
+            async for game in watch_game(application, updates, game_id):
+                yield b"data: " + dumps(game) + b"\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
     return api
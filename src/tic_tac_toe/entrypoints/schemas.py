@@ -0,0 +1,189 @@
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+
+from pydantic import BaseModel, Field, root_validator
+
+from tic_tac_toe.domain import data, grid
+from tic_tac_toe.domain.data import Cell, Player
+from tic_tac_toe.domain.grid import MAX_GRID_K, MAX_GRID_SIZE
+
+# The json of the http api, as pydantic models: request bodies are parsed
+# into them, and the openapi schema is generated from them. They are named
+# as the domain values they mirror, responses are encoded from the domain
+# values directly (`tic_tac_toe.adapters.serialization`).
+
+
+class Mark(BaseModel):
+    player: Player
+    cell: Cell
+
+    def to_domain(self) -> data.Mark:
+        return data.Mark(player=self.player, cell=self.cell)
+
+
+class GameOngoing(BaseModel):
+    status: Literal["ONGOING"]
+    next_player: Player
+    marks: dict[Cell, Player]
+
+
+class GameOver(BaseModel):
+    status: Literal["OVER"]
+    winner: Optional[Player]
+    marks: dict[Cell, Player]
+
+
+Game = Annotated[
+    GameOngoing | GameOver,
+    Field(discriminator="status"),
+]
+
+
+class CellAlreadyMarked(BaseModel):
+    error: Literal["CELL_ALREADY_MARKED"]
+    cell: Cell
+
+
+class PlayerCantMove(BaseModel):
+    error: Literal["PLAYER_CANT_MOVE"]
+    player: Player
+
+
+class GameIsOver(BaseModel):
+    error: Literal["GAME_IS_OVER"]
+
+
+GameError = Annotated[
+    CellAlreadyMarked | GameIsOver | PlayerCantMove,
+    Field(discriminator="error"),
+]
+
+
+class GameNotFound(BaseModel):
+    error: Literal["GAME_NOT_FOUND"]
+
+
+class GameUpdateConflict(BaseModel):
+    error: Literal["GAME_UPDATE_CONFLICT"]
+
+
+class GameHistoryNotFound(BaseModel):
+    error: Literal["GAME_HISTORY_NOT_FOUND"]
+
+
+class MoveNotFound(BaseModel):
+    error: Literal["MOVE_NOT_FOUND"]
+
+
+class InvalidCursor(BaseModel):
+    error: Literal["INVALID_CURSOR"]
+
+
+class GameAggregate(BaseModel):
+    id: str
+    state: Game
+
+
+class MarksAdded(BaseModel):
+    id: str
+    state: Game
+    # marks are applied in order until the first one that can't be added
+    applied: int
+    error: Optional[GameError]
+
+
+class ListedGame(BaseModel):
+    id: str
+    state: Game
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+
+class GamePage(BaseModel):
+    games: list[ListedGame]
+    # pass it back as `cursor` to get the next page, missing on the last one
+    next_cursor: Optional[str]
+
+
+class Opening(BaseModel):
+    cell: Cell
+    games: int
+
+
+class GameStats(BaseModel):
+    games_started: int
+    games_over: int
+    # rates and length are over the games that are over
+    player_one_win_rate: float
+    player_two_win_rate: float
+    draw_rate: float
+    average_game_length: float
+    # most played first
+    openings: list[Opening]
+
+
+class NewGridGame(BaseModel):
+    size: int = Field(default=3, ge=1, le=MAX_GRID_SIZE)
+    # marks in a row to win
+    k: int = Field(default=3, ge=1, le=MAX_GRID_K)
+
+    @root_validator(skip_on_failure=True)
+    def k_fits_the_grid(cls, values: dict[str, int]) -> dict[str, int]:
+        if values["k"] > values["size"]:
+            raise ValueError("k must not be greater than the size of the grid")
+        return values
+
+
+class GridMark(BaseModel):
+    player: Player
+    row: int
+    column: int
+
+    def to_domain(self) -> grid.GridMark:
+        return grid.GridMark(player=self.player, row=self.row, column=self.column)
+
+
+class GridGameOngoing(BaseModel):
+    size: int
+    k: int
+    status: Literal["ONGOING"]
+    next_player: Player
+    # row by row
+    marks: list[GridMark]
+
+
+class GridGameOver(BaseModel):
+    size: int
+    k: int
+    status: Literal["OVER"]
+    winner: Optional[Player]
+    marks: list[GridMark]
+
+
+GridGame = Annotated[
+    GridGameOngoing | GridGameOver,
+    Field(discriminator="status"),
+]
+
+
+class GridGameAggregate(BaseModel):
+    id: str
+    state: GridGame
+
+
+class GridCellAlreadyMarked(BaseModel):
+    error: Literal["CELL_ALREADY_MARKED"]
+    row: int
+    column: int
+
+
+class CellOutsideGrid(BaseModel):
+    error: Literal["CELL_OUTSIDE_GRID"]
+    row: int
+    column: int
+
+
+GridError = Annotated[
+    CellOutsideGrid | GridCellAlreadyMarked | GameIsOver | PlayerCantMove,
+    Field(discriminator="error"),
+]
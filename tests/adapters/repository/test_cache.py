@@ -0,0 +1,177 @@
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from tests.fixtures import PLAYER_ONE_NEED_TO_MOVE, PLAYER_ONE_NEED_TO_START
+
+from tic_tac_toe.adapters.repository.cache import (
+    CachingGameRepository,
+    CachingGameRepositoryConfig,
+)
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+)
+from tic_tac_toe.domain.application import GameNotFound
+from tic_tac_toe.domain.data import AddMarkCommand, Cell, Mark, Player
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def postgres_repository():
+    return PostgresGameRepository(
+        config=PostgresGameRepositoryConfig(
+            db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+        )
+    )
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def make_repository(postgres_repository, clock):
+    def build(max_size=10, ttl=5.0):
+        return CachingGameRepository(
+            repository=postgres_repository,
+            config=CachingGameRepositoryConfig(max_size=max_size, ttl=ttl),
+            clock=clock,
+        )
+
+    return build
+
+
+def describe_get():
+    async def test_inserted_game_is_served_from_cache(make_repository):
+        repository = make_repository()
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_MOVE)
+
+        assert await repository.get(game_id=game_id) == PLAYER_ONE_NEED_TO_MOVE
+        assert repository.get_cache_stats() == {
+            "size": 1,
+            "hits": 1,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    async def test_games_inserted_in_bulk_are_not_cached(make_repository):
+        repository = make_repository()
+        games = {uuid4().hex: PLAYER_ONE_NEED_TO_START for _ in range(3)}
+        await repository.insert_many(games=games)
+        assert repository.get_cache_stats()["size"] == 0
+
+        for game_id, game in games.items():
+            assert await repository.get(game_id=game_id) == game
+        assert repository.get_cache_stats()["misses"] == 3
+
+    async def test_missing_game_is_read_once(make_repository, postgres_repository):
+        repository = make_repository()
+        game_id = uuid4().hex
+        await postgres_repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_MOVE)
+
+        assert await repository.get(game_id=game_id) == PLAYER_ONE_NEED_TO_MOVE
+        assert await repository.get(game_id=game_id) == PLAYER_ONE_NEED_TO_MOVE
+        assert repository.get_cache_stats()["misses"] == 1
+        assert repository.get_cache_stats()["hits"] == 1
+
+    async def test_not_found_is_not_cached(make_repository):
+        repository = make_repository()
+        assert await repository.get(game_id="i-dont-exist") == GameNotFound(
+            error="GAME_NOT_FOUND"
+        )
+        assert repository.get_cache_stats()["size"] == 0
+
+    async def test_expired_game_is_read_again(
+        make_repository, postgres_repository, clock
+    ):
+        repository = make_repository(ttl=5.0)
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        # updated by another worker
+        await postgres_repository.update(
+            game_id=game_id,
+            fn=lambda _: PLAYER_ONE_NEED_TO_MOVE,
+        )
+
+        clock.now = 4.9
+        assert await repository.get(game_id=game_id) == PLAYER_ONE_NEED_TO_START
+        clock.now = 5.0
+        assert await repository.get(game_id=game_id) == PLAYER_ONE_NEED_TO_MOVE
+
+    async def test_least_recently_used_game_is_evicted(make_repository):
+        repository = make_repository(max_size=2)
+        first, second, third = uuid4().hex, uuid4().hex, uuid4().hex
+        await repository.insert(game_id=first, game=PLAYER_ONE_NEED_TO_START)
+        await repository.insert(game_id=second, game=PLAYER_ONE_NEED_TO_START)
+        await repository.get(game_id=first)
+        await repository.insert(game_id=third, game=PLAYER_ONE_NEED_TO_START)
+
+        assert list(repository.games) == [first, third]
+        assert repository.get_cache_stats()["evictions"] == 1
+
+
+def describe_update():
+    async def test_updated_game_is_written_through(
+        make_repository, postgres_repository
+    ):
+        repository = make_repository()
+        game_id = uuid4().hex
+        add_mark = AddMarkCommand(mark=Mark(player=Player.ONE, cell=Cell.TOP_LEFT))
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        expected = add_mark(PLAYER_ONE_NEED_TO_START)
+        assert await repository.update(game_id=game_id, fn=add_mark) == expected
+        assert await postgres_repository.get(game_id=game_id) == expected
+        assert await repository.get(game_id=game_id) == expected
+        assert repository.get_cache_stats()["misses"] == 0
+
+    async def test_game_read_before_an_update_is_not_cached(clock):
+        class _SlowRepository(InMemoryGameRepository):
+            # the game is read, then returned once released
+            def __init__(self):
+                super().__init__()
+                self.release = asyncio.Event()
+
+            async def get(self, game_id):
+                result = await super().get(game_id)
+                await self.release.wait()
+                return result
+
+        slow_repository = _SlowRepository()
+        slow_repository.games["game"] = PLAYER_ONE_NEED_TO_START
+        repository = CachingGameRepository(
+            repository=slow_repository,
+            config=CachingGameRepositoryConfig(),
+            clock=clock,
+        )
+        add_mark = AddMarkCommand(mark=Mark(player=Player.ONE, cell=Cell.TOP_LEFT))
+
+        read = asyncio.create_task(repository.get(game_id="game"))
+        await asyncio.sleep(0)
+        updated = await repository.update(game_id="game", fn=add_mark)
+        slow_repository.release.set()
+
+        assert await read == PLAYER_ONE_NEED_TO_START
+        assert await repository.get(game_id="game") == updated
+        assert repository.reads == {}
+
+    async def test_rejected_update_invalidates_game(make_repository):
+        repository = make_repository()
+        game_id = uuid4().hex
+        add_mark = AddMarkCommand(mark=Mark(player=Player.TWO, cell=Cell.TOP_LEFT))
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        await repository.update(game_id=game_id, fn=add_mark)
+        assert game_id not in repository.games
@@ -0,0 +1,147 @@
+import os
+from uuid import uuid4
+
+import psycopg
+import pytest
+
+from tic_tac_toe.adapters.repository.grid import (
+    InMemoryGridGameRepository,
+    PostgresGridGameRepository,
+)
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+)
+from tic_tac_toe.domain.application import GameNotFound, GameUpdateConflict
+from tic_tac_toe.domain.data import Player
+from tic_tac_toe.domain.grid import (
+    MAX_GRID_SIZE,
+    AddGridMarkCommand,
+    CreateNewGridGameCommand,
+    GridCellAlreadyMarked,
+    GridMark,
+)
+
+
+@pytest.fixture(params=["memory", "postgres"])
+async def make_repository(request):
+    repositories = []
+
+    async def build():
+        if request.param == "memory":
+            return InMemoryGridGameRepository()
+        repository = PostgresGameRepository(
+            config=PostgresGameRepositoryConfig(
+                db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            )
+        )
+        await repository.open()
+        repositories.append(repository)
+        return PostgresGridGameRepository(repository=repository)
+
+    yield build
+
+    for repository in repositories:
+        await repository.close()
+
+
+def play(grid, *cells):
+    # players take turns, player one first
+    for index, (row, column) in enumerate(cells):
+        player = Player.ONE if index % 2 == 0 else Player.TWO
+        grid = grid.add_mark(GridMark(player=player, row=row, column=column))
+    return grid
+
+
+def describe_get_grid():
+    async def test_inserted_grid_is_returned(make_repository):
+        repository = await make_repository()
+        game_id = uuid4().hex
+        # the masks of the largest grid don't fit in 64 bits
+        last = MAX_GRID_SIZE - 1
+        grid = play(
+            CreateNewGridGameCommand(size=MAX_GRID_SIZE, k=5)(), (last, last), (0, 0)
+        )
+        await repository.insert_grid(game_id=game_id, grid=grid)
+        assert await repository.get_grid(game_id=game_id) == grid
+
+    async def test_grid_that_is_over_is_returned(make_repository):
+        repository = await make_repository()
+        game_id = uuid4().hex
+        grid = play(
+            CreateNewGridGameCommand()(), (0, 0), (1, 0), (0, 1), (1, 1), (0, 2)
+        )
+        assert grid.winner is Player.ONE
+        await repository.insert_grid(game_id=game_id, grid=grid)
+        assert await repository.get_grid(game_id=game_id) == grid
+
+    async def test_missing_grid_is_not_found(make_repository):
+        repository = await make_repository()
+        assert await repository.get_grid(game_id=uuid4().hex) == GameNotFound(
+            error="GAME_NOT_FOUND"
+        )
+
+
+def describe_update_grid():
+    async def test_updated_grid_is_stored(make_repository):
+        repository = await make_repository()
+        game_id = uuid4().hex
+        grid = CreateNewGridGameCommand(size=7, k=4)()
+        await repository.insert_grid(game_id=game_id, grid=grid)
+        add_mark = AddGridMarkCommand(mark=GridMark(player=Player.ONE, row=6, column=3))
+
+        result = await repository.update_grid(game_id=game_id, fn=add_mark)
+
+        assert result == add_mark(grid)
+        assert await repository.get_grid(game_id=game_id) == result
+
+    async def test_grid_is_unchanged_on_error(make_repository):
+        repository = await make_repository()
+        game_id = uuid4().hex
+        grid = play(CreateNewGridGameCommand(size=5, k=4)(), (2, 2))
+        await repository.insert_grid(game_id=game_id, grid=grid)
+        add_mark = AddGridMarkCommand(mark=GridMark(player=Player.TWO, row=2, column=2))
+
+        result = await repository.update_grid(game_id=game_id, fn=add_mark)
+
+        assert result == GridCellAlreadyMarked(
+            error="CELL_ALREADY_MARKED", row=2, column=2
+        )
+        assert await repository.get_grid(game_id=game_id) == grid
+
+    async def test_missing_grid_is_not_found(make_repository):
+        repository = await make_repository()
+        add_mark = AddGridMarkCommand(mark=GridMark(player=Player.ONE, row=0, column=0))
+        result = await repository.update_grid(game_id=uuid4().hex, fn=add_mark)
+        assert result == GameNotFound(error="GAME_NOT_FOUND")
+
+
+async def test_conflict_is_returned_when_attempts_are_exhausted():
+    repository = PostgresGameRepository(
+        config=PostgresGameRepositoryConfig(
+            db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            max_update_attempts=2,
+        )
+    )
+    await repository.open()
+    grids = PostgresGridGameRepository(repository=repository)
+    game_id = uuid4().hex
+    grid = CreateNewGridGameCommand(size=4, k=3)()
+    await grids.insert_grid(game_id=game_id, grid=grid)
+    add_mark = AddGridMarkCommand(mark=GridMark(player=Player.ONE, row=0, column=0))
+
+    def concurrently_updated(grid):
+        with psycopg.connect(
+            os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"), autocommit=True
+        ) as conn:
+            conn.execute(
+                "UPDATE grid_game SET version = version + 1 WHERE id = %s", [game_id]
+            )
+        return add_mark(grid)
+
+    try:
+        result = await grids.update_grid(game_id=game_id, fn=concurrently_updated)
+        assert result == GameUpdateConflict(error="GAME_UPDATE_CONFLICT")
+        assert await grids.get_grid(game_id=game_id) == grid
+    finally:
+        await repository.close()
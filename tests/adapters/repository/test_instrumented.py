@@ -0,0 +1,44 @@
+from tests.fixtures import PLAYER_ONE_NEED_TO_START
+
+from tic_tac_toe.adapters.repository.instrumented import (
+    COMMAND_SECONDS,
+    OPERATION_SECONDS,
+    UPDATE_ATTEMPTS,
+    InstrumentedGameRepository,
+)
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
+from tic_tac_toe.domain.application import GameNotFound
+from tic_tac_toe.domain.data import AddMarkCommand, Cell, Mark, Player
+
+
+def describe_instrumented_game_repository():
+    async def test_operations_are_timed():
+        repository = InstrumentedGameRepository(InMemoryGameRepository())
+        before = {
+            operation: OPERATION_SECONDS.count(operation)
+            for operation in ("insert", "insert_many", "get")
+        }
+        await repository.insert("1", PLAYER_ONE_NEED_TO_START)
+        await repository.insert_many({"2": PLAYER_ONE_NEED_TO_START})
+        assert await repository.get("2") == PLAYER_ONE_NEED_TO_START
+        assert await repository.get("missing") == GameNotFound(error="GAME_NOT_FOUND")
+        assert OPERATION_SECONDS.count("insert") == before["insert"] + 1
+        assert OPERATION_SECONDS.count("insert_many") == before["insert_many"] + 1
+        assert OPERATION_SECONDS.count("get") == before["get"] + 2
+
+    async def test_commands_and_attempts_of_updates_are_counted():
+        repository = InstrumentedGameRepository(InMemoryGameRepository())
+        await repository.insert("1", PLAYER_ONE_NEED_TO_START)
+        updates = OPERATION_SECONDS.count("update")
+        commands = COMMAND_SECONDS.count()
+        attempts = UPDATE_ATTEMPTS.count()
+
+        command = AddMarkCommand(mark=Mark(player=Player.ONE, cell=Cell.TOP_LEFT))
+        result = await repository.update("1", command)
+        assert result.marks == {Cell.TOP_LEFT: Player.ONE}
+        # a missing game runs no command
+        await repository.update("missing", command)
+
+        assert OPERATION_SECONDS.count("update") == updates + 2
+        assert COMMAND_SECONDS.count() == commands + 1
+        assert UPDATE_ATTEMPTS.count() == attempts + 1
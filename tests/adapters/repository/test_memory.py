@@ -0,0 +1,63 @@
+from tests.fixtures import PLAYER_ONE_NEED_TO_MOVE, PLAYER_ONE_NEED_TO_START
+
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
+from tic_tac_toe.domain.application import GameNotFound
+from tic_tac_toe.domain.data import (
+    AddMarkCommand,
+    Cell,
+    CellAlreadyMarked,
+    Mark,
+    Player,
+)
+
+
+def describe_get():
+    async def test_inserted_game_is_returned():
+        repository = InMemoryGameRepository()
+        await repository.insert(game_id="game", game=PLAYER_ONE_NEED_TO_MOVE)
+        assert await repository.get(game_id="game") == PLAYER_ONE_NEED_TO_MOVE
+
+    async def test_games_inserted_together_are_returned():
+        repository = InMemoryGameRepository()
+        await repository.insert_many(
+            games={"a": PLAYER_ONE_NEED_TO_MOVE, "b": PLAYER_ONE_NEED_TO_START}
+        )
+        assert await repository.get(game_id="a") == PLAYER_ONE_NEED_TO_MOVE
+        assert await repository.get(game_id="b") == PLAYER_ONE_NEED_TO_START
+
+    async def test_missing_game_is_not_found():
+        repository = InMemoryGameRepository()
+        assert await repository.get(game_id="missing") == GameNotFound(
+            error="GAME_NOT_FOUND"
+        )
+
+
+def describe_update():
+    async def test_updated_game_is_stored():
+        repository = InMemoryGameRepository()
+        await repository.insert(game_id="game", game=PLAYER_ONE_NEED_TO_START)
+        add_mark = AddMarkCommand(mark=Mark(player=Player.ONE, cell=Cell.TOP_LEFT))
+
+        result = await repository.update(game_id="game", fn=add_mark)
+
+        assert result == add_mark(PLAYER_ONE_NEED_TO_START)
+        assert await repository.get(game_id="game") == result
+
+    async def test_game_is_unchanged_on_error():
+        repository = InMemoryGameRepository()
+        await repository.insert(game_id="game", game=PLAYER_ONE_NEED_TO_MOVE)
+        cell = next(iter(PLAYER_ONE_NEED_TO_MOVE.marks))
+        add_mark = AddMarkCommand(mark=Mark(player=Player.ONE, cell=cell))
+
+        result = await repository.update(game_id="game", fn=add_mark)
+
+        assert result == CellAlreadyMarked(error="CELL_ALREADY_MARKED", cell=cell)
+        assert await repository.get(game_id="game") == PLAYER_ONE_NEED_TO_MOVE
+
+    async def test_missing_game_is_not_found():
+        repository = InMemoryGameRepository()
+        result = await repository.update(
+            game_id="missing",
+            fn=AddMarkCommand(mark=Mark(player=Player.ONE, cell=Cell.TOP_LEFT)),
+        )
+        assert result == GameNotFound(error="GAME_NOT_FOUND")
@@ -0,0 +1,700 @@
+import asyncio
+import os
+from dataclasses import replace
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import psycopg
+import pytest
+from psycopg import sql
+from psycopg_pool import PoolTimeout
+from tests.fixtures import (
+    DRAW,
+    PLAYER_ONE_NEED_TO_MOVE,
+    PLAYER_ONE_NEED_TO_START,
+    PLAYER_TWO_NEED_TO_START,
+    PLAYER_TWO_WIN,
+)
+
+from tic_tac_toe.adapters.repository.postgres import (
+    CELL_INDEXES,
+    CONNECTION_WAIT_SECONDS,
+    QUERY_SECONDS,
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+    PostgresGameRepositoryPoolConfig,
+    PostgresMoveLogConfig,
+    PostgresMoveLogGameRepository,
+    list_games_query,
+)
+from tic_tac_toe.domain.application import (
+    GameFilter,
+    GameHistoryNotFound,
+    GameNotFound,
+    GameUpdateConflict,
+    InvalidCursor,
+)
+from tic_tac_toe.domain.data import (
+    AddMarkCommand,
+    Cell,
+    GameIsOver,
+    GameOver,
+    Mark,
+    Player,
+    is_game,
+)
+
+
+@pytest.fixture
+async def make_repository():
+    repositories = []
+
+    async def build(
+        pool=None,
+        max_update_attempts=5,
+        storage_format="jsonb",
+        move_log=None,
+        metrics=False,
+    ):
+        config = PostgresGameRepositoryConfig(
+            db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            pool=pool,
+            max_update_attempts=max_update_attempts,
+            storage_format=storage_format,
+            metrics=metrics,
+        )
+        if move_log is None:
+            repository = PostgresGameRepository(config=config)
+        else:
+            repository = PostgresMoveLogGameRepository(config=config, move_log=move_log)
+        await repository.open()
+        repositories.append(repository)
+        return repository
+
+    yield build
+
+    for repository in repositories:
+        await repository.close()
+
+
+def describe_pool():
+    async def test_unpooled_repository_has_no_stats(make_repository):
+        repository = await make_repository()
+        assert repository.get_pool_stats() == {}
+
+    async def test_connections_are_reused(make_repository):
+        repository = await make_repository(
+            pool=PostgresGameRepositoryPoolConfig(min_size=1, max_size=2)
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_MOVE)
+        for _ in range(10):
+            assert await repository.get(game_id=game_id) == PLAYER_ONE_NEED_TO_MOVE
+
+        stats = repository.get_pool_stats()
+        assert stats["requests_num"] == 11
+        assert stats["pool_max"] == 2
+        assert stats["pool_size"] <= 2
+
+    @pytest.mark.parametrize("pooled", [False, True])
+    @pytest.mark.parametrize("metrics", [False, True])
+    async def test_connection_wait_and_queries_are_timed_with_metrics(
+        make_repository, pooled, metrics
+    ):
+        # the check of pooled connections is a query too
+        repository = await make_repository(
+            pool=(
+                PostgresGameRepositoryPoolConfig(min_size=1, check=False)
+                if pooled
+                else None
+            ),
+            metrics=metrics,
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        connections = CONNECTION_WAIT_SECONDS.count()
+        queries = QUERY_SECONDS.count()
+
+        await repository.update(
+            game_id=game_id,
+            fn=AddMarkCommand(mark=Mark(player=Player.ONE, cell=Cell.TOP_LEFT)),
+        )
+        # the game is read, then written
+        assert CONNECTION_WAIT_SECONDS.count() == connections + metrics
+        assert QUERY_SECONDS.count() == queries + 2 * metrics
+
+    async def test_update_commits_through_pooled_connection(make_repository):
+        repository = await make_repository(
+            pool=PostgresGameRepositoryPoolConfig(min_size=1, max_size=1)
+        )
+        game_id = uuid4().hex
+        mark = Mark(player=Player.ONE, cell=Cell.CENTER_CENTER)
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        expected = AddMarkCommand(mark=mark)(PLAYER_ONE_NEED_TO_START)
+        result = await repository.update(game_id=game_id, fn=AddMarkCommand(mark=mark))
+        assert result == expected
+        assert await repository.get(game_id=game_id) == expected
+
+    async def test_acquire_times_out_when_pool_is_exhausted(make_repository):
+        repository = await make_repository(
+            pool=PostgresGameRepositoryPoolConfig(min_size=1, max_size=1, timeout=0.1)
+        )
+        async with repository.connection():
+            with pytest.raises(PoolTimeout):
+                await asyncio.wait_for(repository.get(game_id="any"), timeout=5)
+
+
+def mark_first_free_cell(game):
+    if isinstance(game, GameOver):
+        return GameIsOver(error="GAME_IS_OVER")
+    cell = next(cell for cell in Cell if cell not in game.marks)
+    return AddMarkCommand(mark=Mark(player=game.next_player, cell=cell))(game)
+
+
+def update_first_free_cell(repository, game_id):
+    # the move log needs the marks played, filled on every attempt
+    marks = []
+
+    def fn(game):
+        result = mark_first_free_cell(game)
+        marks[:] = [
+            Mark(player=player, cell=cell)
+            for cell, player in (result.marks.items() if is_game(result) else [])
+            if cell not in game.marks
+        ]
+        return result
+
+    return repository.update(game_id=game_id, fn=fn, marks=marks)
+
+
+def describe_update():
+    async def test_concurrent_updates_are_not_lost(make_repository):
+        repository = await make_repository(
+            pool=PostgresGameRepositoryPoolConfig(min_size=4, max_size=16)
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        results = await asyncio.gather(
+            *[
+                repository.update(game_id=game_id, fn=mark_first_free_cell)
+                for _ in range(64)
+            ]
+        )
+
+        applied = [result for result in results if is_game(result)]
+        game = await repository.get(game_id=game_id)
+        # every successful update was applied on top of the previous one
+        assert sorted(len(result.marks) for result in applied) == list(
+            range(1, len(game.marks) + 1)
+        )
+        assert game in applied
+        assert all(
+            isinstance(result, (GameIsOver, GameUpdateConflict))
+            for result in results
+            if not is_game(result)
+        )
+
+    async def test_conflict_is_returned_when_attempts_are_exhausted(
+        make_repository,
+    ):
+        repository = await make_repository(max_update_attempts=2)
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        db_uri = os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI")
+
+        def concurrently_updated(game):
+            with psycopg.connect(db_uri, autocommit=True) as conn:
+                conn.execute(
+                    "UPDATE game SET version = version + 1 WHERE id = %s",
+                    [game_id],
+                )
+            return mark_first_free_cell(game)
+
+        result = await repository.update(game_id=game_id, fn=concurrently_updated)
+        assert result == GameUpdateConflict(error="GAME_UPDATE_CONFLICT")
+        assert await repository.get(game_id=game_id) == PLAYER_ONE_NEED_TO_START
+
+
+def read_columns(game_id):
+    db_uri = os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI")
+    with psycopg.connect(db_uri) as conn:
+        return conn.execute(
+            "SELECT state IS NOT NULL, board IS NOT NULL FROM game WHERE id = %s",
+            [game_id],
+        ).fetchone()
+
+
+def describe_storage_format():
+    @pytest.mark.parametrize(
+        "game",
+        [
+            pytest.param(PLAYER_ONE_NEED_TO_START, id="new game"),
+            pytest.param(PLAYER_TWO_NEED_TO_START, id="player two needs to start"),
+            pytest.param(PLAYER_ONE_NEED_TO_MOVE, id="ongoing game"),
+            pytest.param(PLAYER_TWO_WIN, id="game over (win)"),
+            pytest.param(DRAW, id="game over (draw)"),
+        ],
+    )
+    @pytest.mark.parametrize("written_as", ["jsonb", "board"])
+    @pytest.mark.parametrize("read_as", ["jsonb", "board"])
+    async def test_games_are_read_in_any_format(
+        game, written_as, read_as, make_repository
+    ):
+        writer = await make_repository(storage_format=written_as)
+        reader = await make_repository(storage_format=read_as)
+        game_id = uuid4().hex
+        await writer.insert(game_id=game_id, game=game)
+        assert await reader.get(game_id=game_id) == game
+
+    @pytest.mark.parametrize(
+        "storage_format, expected_columns",
+        [("jsonb", (True, False)), ("board", (False, True))],
+    )
+    async def test_games_are_written_in_configured_format(
+        storage_format, expected_columns, make_repository
+    ):
+        legacy = await make_repository(storage_format="jsonb")
+        repository = await make_repository(storage_format=storage_format)
+        inserted_id, inserted_in_bulk_id, updated_id = (uuid4().hex for _ in "abc")
+        await legacy.insert(game_id=updated_id, game=PLAYER_ONE_NEED_TO_START)
+
+        await repository.insert(game_id=inserted_id, game=PLAYER_ONE_NEED_TO_START)
+        await repository.insert_many(games={inserted_in_bulk_id: PLAYER_TWO_WIN})
+        await repository.update(game_id=updated_id, fn=mark_first_free_cell)
+        for game_id in (inserted_id, inserted_in_bulk_id, updated_id):
+            assert read_columns(game_id) == expected_columns
+
+    async def test_backfill_packs_jsonb_games(make_repository):
+        legacy = await make_repository(storage_format="jsonb")
+        repository = await make_repository(storage_format="board")
+        games = {uuid4().hex: game for game in (PLAYER_ONE_NEED_TO_MOVE, DRAW)}
+        await legacy.insert_many(games=games)
+
+        assert await repository.backfill_board(batch_size=1) >= len(games)
+        for game_id, game in games.items():
+            assert read_columns(game_id) == (False, True)
+            assert await legacy.get(game_id=game_id) == game
+        assert await repository.backfill_board() == 0
+
+
+def read_moves(game_id):
+    db_uri = os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI")
+    with psycopg.connect(db_uri) as conn:
+        snapshot_moves, state = conn.execute(
+            "SELECT snapshot_moves, state FROM game WHERE id = %s", [game_id]
+        ).fetchone()
+        moves = conn.execute(
+            """
+            SELECT number, player, cell FROM game_move
+            WHERE game_id = %s ORDER BY number
+            """,
+            [game_id],
+        ).fetchall()
+        return snapshot_moves, state, moves
+
+
+def describe_move_log():
+    async def test_moves_are_appended(make_repository):
+        repository = await make_repository(
+            move_log=PostgresMoveLogConfig(snapshot_interval=4)
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        game = PLAYER_ONE_NEED_TO_START
+        for _ in range(3):
+            game = mark_first_free_cell(game)
+            assert await update_first_free_cell(repository, game_id) == game
+            assert await repository.get(game_id=game_id) == game
+
+        snapshot_moves, state, moves = read_moves(game_id)
+        # the game row was not written
+        assert (snapshot_moves, state) == (
+            0,
+            {"status": "ONGOING", "next_player": 1, "marks": {}},
+        )
+        assert moves == [(1, 1, 0), (2, 2, 1), (3, 1, 2)]
+
+    async def test_game_is_written_every_snapshot_interval_moves(make_repository):
+        repository = await make_repository(
+            move_log=PostgresMoveLogConfig(snapshot_interval=2)
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        game = PLAYER_ONE_NEED_TO_START
+        for snapshot_moves in [0, 2, 2, 4]:
+            game = mark_first_free_cell(game)
+            await update_first_free_cell(repository, game_id)
+            assert read_moves(game_id)[0] == snapshot_moves
+            assert await repository.get(game_id=game_id) == game
+
+        # the snapshot holds every move: read as a plain game
+        legacy = await make_repository()
+        assert await legacy.get(game_id=game_id) == game
+
+    async def test_game_is_written_when_over(make_repository):
+        repository = await make_repository(
+            move_log=PostgresMoveLogConfig(snapshot_interval=100)
+        )
+        legacy = await make_repository()
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        game = PLAYER_ONE_NEED_TO_START
+        while not isinstance(game, GameOver):
+            game = mark_first_free_cell(game)
+            await update_first_free_cell(repository, game_id)
+
+        snapshot_moves, _, moves = read_moves(game_id)
+        assert snapshot_moves == len(moves) == len(game.marks)
+        assert await legacy.get(game_id=game_id) == game
+
+    async def test_updates_without_marks_are_refused(make_repository):
+        repository = await make_repository(move_log=PostgresMoveLogConfig())
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        with pytest.raises(ValueError):
+            await repository.update(game_id=game_id, fn=mark_first_free_cell)
+        assert await repository.get(game_id=game_id) == PLAYER_ONE_NEED_TO_START
+
+    async def test_given_marks_are_appended_in_their_order(make_repository):
+        repository = await make_repository(
+            move_log=PostgresMoveLogConfig(snapshot_interval=100)
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        # the marks of player one are not in board order
+        marks = [
+            Mark(player=Player.ONE, cell=Cell.BOTTOM_RIGHT),
+            Mark(player=Player.TWO, cell=Cell.TOP_LEFT),
+            Mark(player=Player.ONE, cell=Cell.BOTTOM_LEFT),
+        ]
+
+        def add_marks(game):
+            for mark in marks:
+                game = AddMarkCommand(mark=mark)(game)
+            return game
+
+        await repository.update(game_id=game_id, fn=add_marks, marks=marks)
+        _, _, moves = read_moves(game_id)
+        assert [(player, cell) for _, player, cell in moves] == [
+            (1, CELL_INDEXES[Cell.BOTTOM_RIGHT]),
+            (2, CELL_INDEXES[Cell.TOP_LEFT]),
+            (1, CELL_INDEXES[Cell.BOTTOM_LEFT]),
+        ]
+
+    async def test_concurrent_updates_are_not_lost(make_repository):
+        repository = await make_repository(
+            pool=PostgresGameRepositoryPoolConfig(min_size=4, max_size=16),
+            move_log=PostgresMoveLogConfig(snapshot_interval=3),
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+
+        results = await asyncio.gather(
+            *[update_first_free_cell(repository, game_id) for _ in range(64)]
+        )
+
+        applied = [result for result in results if is_game(result)]
+        game = await repository.get(game_id=game_id)
+        assert sorted(len(result.marks) for result in applied) == list(
+            range(1, len(game.marks) + 1)
+        )
+        assert game in applied
+        assert len(read_moves(game_id)[2]) == len(game.marks)
+
+    async def test_snapshot_games_writes_pending_moves(make_repository):
+        repository = await make_repository(
+            move_log=PostgresMoveLogConfig(snapshot_interval=100)
+        )
+        legacy = await make_repository()
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        game = await update_first_free_cell(repository, game_id)
+
+        assert await repository.snapshot_games(batch_size=1) >= 1
+        assert read_moves(game_id)[0] == 1
+        assert await legacy.get(game_id=game_id) == game
+        assert await repository.snapshot_games() == 0
+
+    async def test_moves_between_numbers(make_repository):
+        repository = await make_repository(
+            move_log=PostgresMoveLogConfig(snapshot_interval=2)
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        for _ in range(5):
+            await update_first_free_cell(repository, game_id)
+
+        moves = [move async for move in repository.moves(game_id=game_id)]
+        assert moves == [
+            Mark(player=Player.ONE, cell=Cell.TOP_LEFT),
+            Mark(player=Player.TWO, cell=Cell.TOP_CENTER),
+            Mark(player=Player.ONE, cell=Cell.TOP_RIGHT),
+            Mark(player=Player.TWO, cell=Cell.CENTER_LEFT),
+            Mark(player=Player.ONE, cell=Cell.CENTER_CENTER),
+        ]
+        assert [
+            move async for move in repository.moves(game_id=game_id, after=1, until=3)
+        ] == moves[1:3]
+
+    async def test_moves_of_missing_game(make_repository):
+        repository = await make_repository(move_log=PostgresMoveLogConfig())
+        assert [move async for move in repository.moves(game_id="i-dont-exist")] == [
+            GameNotFound(error="GAME_NOT_FOUND")
+        ]
+
+    async def test_moves_played_before_the_move_log(make_repository):
+        repository = await make_repository(move_log=PostgresMoveLogConfig())
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_MOVE)
+        assert [move async for move in repository.moves(game_id=game_id)] == [
+            GameHistoryNotFound(error="GAME_HISTORY_NOT_FOUND")
+        ]
+
+
+def database_now():
+    db_uri = os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI")
+    with psycopg.connect(db_uri) as conn:
+        return conn.execute("SELECT clock_timestamp()").fetchone()[0]
+
+
+def describe_list_games():
+    async def test_games_are_filtered(make_repository):
+        repository = await make_repository(storage_format="board")
+        legacy = await make_repository()
+        since = database_now()
+        games = {
+            "ongoing": PLAYER_ONE_NEED_TO_MOVE,
+            "won": PLAYER_TWO_WIN,
+            "draw": DRAW,
+        }
+        ids = {name: uuid4().hex for name in games}
+        # both storage formats are filtered alike
+        await repository.insert(game_id=ids["ongoing"], game=games["ongoing"])
+        await legacy.insert(game_id=ids["won"], game=games["won"])
+        await repository.insert(game_id=ids["draw"], game=games["draw"])
+
+        async def _listed(**filters):
+            page = await repository.list_games(
+                filter=GameFilter(created_after=since, **filters),
+                order="created_at",
+                limit=10,
+            )
+            return [game.id for game in page.games]
+
+        assert await _listed(status="ONGOING") == [ids["ongoing"]]
+        assert await _listed(status="OVER") == [ids["draw"], ids["won"]]
+        assert await _listed(winner=Player.TWO) == [ids["won"]]
+        assert await _listed(winner=Player.ONE) == []
+        assert await _listed(created_before=since) == []
+
+    async def test_games_are_paginated_newest_first(make_repository):
+        repository = await make_repository()
+        since = database_now()
+        # inserted in a single statement: same creation time, ordered by id
+        games = {uuid4().hex: PLAYER_ONE_NEED_TO_START for _ in range(5)}
+        await repository.insert_many(games=games)
+
+        listed, cursor = [], None
+        for size in [2, 2, 1]:
+            page = await repository.list_games(
+                filter=GameFilter(created_after=since),
+                order="created_at",
+                limit=2,
+                cursor=cursor,
+            )
+            assert len(page.games) == size
+            listed += page.games
+            cursor = page.next_cursor
+        assert cursor is None
+        assert [game.id for game in listed] == sorted(games, reverse=True)
+        assert all(game.state == PLAYER_ONE_NEED_TO_START for game in listed)
+
+    async def test_finished_games_are_listed_by_end_time(make_repository):
+        repository = await make_repository()
+        since = database_now()
+        game_ids = [uuid4().hex for _ in range(3)]
+        for game_id in game_ids:
+            await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        # the first game is over last, the third one is never over
+        for game_id in [game_ids[1], game_ids[0]]:
+            game = PLAYER_ONE_NEED_TO_START
+            while not isinstance(game, GameOver):
+                game = await repository.update(game_id=game_id, fn=mark_first_free_cell)
+
+        page = await repository.list_games(
+            filter=GameFilter(finished_after=since), order="finished_at", limit=10
+        )
+        assert [game.id for game in page.games] == game_ids[:2]
+        assert page.games[0].finished_at > page.games[1].finished_at
+        ongoing = await repository.list_games(
+            filter=GameFilter(created_after=since, status="ONGOING"),
+            order="created_at",
+            limit=10,
+        )
+        assert [(game.id, game.finished_at) for game in ongoing.games] == [
+            (game_ids[2], None)
+        ]
+
+    async def test_invalid_cursor(make_repository):
+        repository = await make_repository()
+        for cursor in ["not base64!", "W10=", "WzEsMl0="]:
+            assert await repository.list_games(
+                filter=GameFilter(), order="created_at", limit=10, cursor=cursor
+            ) == InvalidCursor(error="INVALID_CURSOR")
+
+    async def test_moves_after_the_snapshot_are_replayed(make_repository):
+        repository = await make_repository(
+            move_log=PostgresMoveLogConfig(snapshot_interval=100)
+        )
+        since = database_now()
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        game = await update_first_free_cell(repository, game_id)
+
+        page = await repository.list_games(
+            filter=GameFilter(created_after=since), order="created_at", limit=10
+        )
+        assert [listed.state for listed in page.games] == [game]
+
+    @pytest.mark.parametrize(
+        "filter,order,index",
+        [
+            (GameFilter(), "created_at", "game_created_at_idx"),
+            (
+                GameFilter(created_after=datetime(2026, 1, 1)),
+                "created_at",
+                "game_created_at_idx",
+            ),
+            (GameFilter(status="ONGOING"), "created_at", "game_status_created_at_idx"),
+            (
+                GameFilter(winner=Player.TWO),
+                "created_at",
+                "game_winner_created_at_idx",
+            ),
+            (GameFilter(), "finished_at", "game_finished_at_idx"),
+            (
+                GameFilter(status="OVER", finished_after=datetime(2026, 1, 1)),
+                "finished_at",
+                "game_finished_at_idx",
+            ),
+            (
+                GameFilter(winner=Player.TWO),
+                "finished_at",
+                "game_winner_finished_at_idx",
+            ),
+        ],
+    )
+    @pytest.mark.parametrize("after", [None, (datetime.now(timezone.utc), "game-id")])
+    def test_pages_are_read_from_an_index(filter, order, index, after):
+        query, params = list_games_query(filter, order, 100, after)
+        db_uri = os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI")
+        with psycopg.connect(db_uri) as conn:
+            # The plan depends on the statistics of the table: it is read from
+            # a temporary copy, with the indexes of `game` and only games
+            # ongoing, won by either player and drawn, not from the games
+            # other tests write meanwhile. The copy hides `game` until the
+            # rollback.
+            conn.execute(
+                """
+                CREATE TEMPORARY TABLE game
+                (LIKE public.game INCLUDING DEFAULTS INCLUDING GENERATED)
+                """
+            )
+            for (definition,) in conn.execute(
+                """
+                SELECT indexdef FROM pg_indexes
+                WHERE schemaname = 'public' AND tablename = 'game'
+                """
+            ).fetchall():
+                conn.execute(
+                    definition.replace(" ON public.game ", " ON pg_temp.game ")
+                )
+            conn.execute(
+                """
+                INSERT INTO game (id, board, created_at, finished_at)
+                SELECT
+                    'explain-' || i,
+                    (ARRAY[1 << 18, 1 << 20, 2 << 20, 0])[i % 4 + 1],
+                    now() - i * interval '1 minute',
+                    CASE WHEN i % 4 > 0 THEN now() - i * interval '1 second' END
+                FROM generate_series(1, 4000) AS i
+                """
+            )
+            conn.execute("ANALYZE game")
+            # the test table is too small for the planner to bother with
+            # indexes otherwise: the plan must not need anything else
+            conn.execute("SET enable_seqscan = off")
+            conn.execute("SET enable_bitmapscan = off")
+            ((plan,),) = conn.execute(
+                sql.SQL("EXPLAIN (FORMAT JSON) ") + query, params
+            ).fetchall()
+            conn.rollback()
+
+        def _nodes(node):
+            yield node
+            for child in node.get("Plans", []):
+                yield from _nodes(child)
+
+        nodes = list(_nodes(plan[0]["Plan"]))
+        assert [node["Node Type"] for node in nodes] == ["Limit", "Index Scan"]
+        assert nodes[1]["Index Name"] == index
+        assert nodes[1]["Scan Direction"] == "Backward"
+        # the cursor is where the scan starts, not a filter on every row
+        assert "Filter" not in nodes[1]
+
+
+def describe_export_games():
+    async def _exported(repository, game_ids):
+        return {
+            game.id: game
+            async for game in repository.export_games()
+            if game.id in game_ids
+        }
+
+    async def test_games_are_imported_back(make_repository):
+        repository = await make_repository(storage_format="board")
+        legacy = await make_repository()
+        games = {uuid4().hex: PLAYER_ONE_NEED_TO_MOVE, uuid4().hex: DRAW}
+        await repository.insert_many(games=games)
+        await legacy.insert(game_id=uuid4().hex, game=PLAYER_TWO_WIN)
+
+        exported = await _exported(repository, games)
+        assert {game_id: game.state for game_id, game in exported.items()} == games
+        game_id = next(iter(games))
+        assert exported[game_id].finished_at is None
+
+        copies = [replace(game, id=uuid4().hex) for game in exported.values()]
+        await legacy.import_games(copies)
+        assert await _exported(legacy, {copy.id for copy in copies}) == {
+            copy.id: copy for copy in copies
+        }
+
+    async def test_moves_after_the_snapshot_are_exported(make_repository):
+        repository = await make_repository(
+            move_log=PostgresMoveLogConfig(snapshot_interval=100)
+        )
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        game = await update_first_free_cell(repository, game_id)
+
+        exported = await _exported(repository, {game_id})
+        assert exported[game_id].state == game
+
+    async def test_existing_games_are_not_imported(make_repository):
+        repository = await make_repository()
+        game_id = uuid4().hex
+        await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+        (exported,) = (await _exported(repository, {game_id})).values()
+        new_game = replace(exported, id=uuid4().hex)
+
+        with pytest.raises(psycopg.errors.UniqueViolation):
+            await repository.import_games([new_game, exported])
+        assert await repository.get(game_id=new_game.id) == GameNotFound(
+            error="GAME_NOT_FOUND"
+        )
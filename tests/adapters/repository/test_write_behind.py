@@ -0,0 +1,202 @@
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from psycopg import OperationalError
+from tests.fixtures import PLAYER_ONE_NEED_TO_MOVE, PLAYER_ONE_NEED_TO_START
+
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+    PostgresGameRepositoryPoolConfig,
+)
+from tic_tac_toe.adapters.repository.write_behind import (
+    WriteBehindGameRepository,
+    WriteBehindGameRepositoryConfig,
+)
+from tic_tac_toe.domain.application import GameNotFound
+from tic_tac_toe.domain.data import AddMarkCommand, Cell, Mark, Player
+
+
+class SpyGameRepository(InMemoryGameRepository):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.failing = False
+        # games the database rejects
+        self.invalid = set()
+
+    async def insert_many(self, games):
+        if self.failing:
+            raise OperationalError("database is down")
+        if self.invalid & set(games):
+            raise ValueError("invalid game")
+        self.batches.append(list(games))
+        await super().insert_many(games)
+
+
+@pytest.fixture
+def spy_repository():
+    return SpyGameRepository()
+
+
+@pytest.fixture
+def make_repository(spy_repository):
+    def build(flush_interval=60.0, max_pending=10_000):
+        return WriteBehindGameRepository(
+            repository=spy_repository,
+            config=WriteBehindGameRepositoryConfig(
+                flush_interval=flush_interval, max_pending=max_pending
+            ),
+        )
+
+    return build
+
+
+ADD_MARK = AddMarkCommand(mark=Mark(player=Player.ONE, cell=Cell.TOP_LEFT))
+
+
+def describe_write_behind_game_repository():
+    async def test_new_games_are_read_before_being_inserted(
+        make_repository, spy_repository
+    ):
+        repository = make_repository()
+        await repository.insert("1", PLAYER_ONE_NEED_TO_START)
+        assert spy_repository.games == {}
+        assert await repository.get("1") == PLAYER_ONE_NEED_TO_START
+        assert await repository.get("2") == GameNotFound(error="GAME_NOT_FOUND")
+
+    async def test_new_games_are_inserted_together(make_repository, spy_repository):
+        repository = make_repository()
+        for game_id in ("1", "2", "3"):
+            await repository.insert(game_id, PLAYER_ONE_NEED_TO_START)
+        await repository.flush()
+        assert spy_repository.batches == [["1", "2", "3"]]
+        assert await repository.get("2") == PLAYER_ONE_NEED_TO_START
+
+    async def test_new_games_are_inserted_periodically(make_repository, spy_repository):
+        repository = make_repository(flush_interval=0.01)
+        await repository.open()
+        await repository.insert("1", PLAYER_ONE_NEED_TO_START)
+        await asyncio.sleep(0.05)
+        assert spy_repository.batches == [["1"]]
+        await repository.close()
+
+    async def test_games_waiting_are_inserted_on_close(make_repository, spy_repository):
+        repository = make_repository()
+        await repository.open()
+        await repository.insert("1", PLAYER_ONE_NEED_TO_START)
+        await repository.close()
+        assert spy_repository.batches == [["1"]]
+
+    async def test_games_are_inserted_before_being_updated(
+        make_repository, spy_repository
+    ):
+        repository = make_repository()
+        await repository.insert("1", PLAYER_ONE_NEED_TO_START)
+        await repository.insert("2", PLAYER_ONE_NEED_TO_START)
+        result = await repository.update("1", ADD_MARK)
+        assert result.marks == {Cell.TOP_LEFT: Player.ONE}
+        assert spy_repository.batches == [["1", "2"]]
+        assert await repository.get("1") == result
+
+    async def test_creating_games_waits_for_a_flush_when_full(
+        make_repository, spy_repository
+    ):
+        repository = make_repository(max_pending=2)
+        for game_id in ("1", "2", "3"):
+            await repository.insert(game_id, PLAYER_ONE_NEED_TO_START)
+        assert spy_repository.batches == [["1", "2"]]
+        assert repository.pending == {"3": PLAYER_ONE_NEED_TO_START}
+
+    async def test_games_are_kept_when_they_cant_be_inserted(
+        make_repository, spy_repository
+    ):
+        repository = make_repository()
+        await repository.insert("1", PLAYER_ONE_NEED_TO_START)
+        spy_repository.failing = True
+        with pytest.raises(OperationalError):
+            await repository.flush()
+        assert await repository.get("1") == PLAYER_ONE_NEED_TO_START
+        spy_repository.failing = False
+        await repository.flush()
+        assert spy_repository.batches == [["1"]]
+
+    async def test_games_rejected_are_dropped(make_repository, spy_repository):
+        repository = make_repository()
+        spy_repository.invalid = {"2", "5"}
+        for game_id in ("1", "2", "3", "4", "5"):
+            await repository.insert(game_id, PLAYER_ONE_NEED_TO_START)
+        await repository.flush()
+        assert sorted(spy_repository.games) == ["1", "3", "4"]
+        assert repository.pending == {}
+        assert await repository.get("2") == GameNotFound(error="GAME_NOT_FOUND")
+
+    async def test_flushing_goes_on_after_games_are_rejected(
+        make_repository, spy_repository
+    ):
+        repository = make_repository(max_pending=2)
+        spy_repository.invalid = {"1", "2"}
+        for game_id in ("1", "2", "3", "4", "5"):
+            await repository.insert(game_id, PLAYER_ONE_NEED_TO_START)
+        assert spy_repository.batches == [["3", "4"]]
+        assert repository.pending == {"5": PLAYER_ONE_NEED_TO_START}
+
+    async def test_several_games_are_inserted_at_once(make_repository, spy_repository):
+        repository = make_repository()
+        await repository.insert_many({"1": PLAYER_ONE_NEED_TO_START})
+        assert spy_repository.batches == [["1"]]
+
+    async def test_close_waits_for_the_insert_in_progress():
+        # an insert cancelled halfway would leave its pooled connection stuck
+        postgres_repository = PostgresGameRepository(
+            config=PostgresGameRepositoryConfig(
+                db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+                pool=PostgresGameRepositoryPoolConfig(min_size=1),
+            )
+        )
+        await postgres_repository.open()
+        repository = WriteBehindGameRepository(
+            repository=postgres_repository,
+            config=WriteBehindGameRepositoryConfig(flush_interval=0.001),
+        )
+        await repository.open()
+        game_ids = [uuid4().hex for _ in range(2000)]
+        for game_id in game_ids:
+            await repository.insert(game_id, PLAYER_ONE_NEED_TO_START)
+        while not repository.flushing:
+            await asyncio.sleep(0)
+        closed, _ = await asyncio.wait(
+            [asyncio.create_task(repository.close())], timeout=2
+        )
+        assert closed
+        await postgres_repository.close()
+
+        postgres_repository = PostgresGameRepository(
+            config=PostgresGameRepositoryConfig(
+                db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            )
+        )
+        for game_id in (game_ids[0], game_ids[-1]):
+            assert await postgres_repository.get(game_id) == PLAYER_ONE_NEED_TO_START
+
+    async def test_duplicate_games_are_dropped():
+        postgres_repository = PostgresGameRepository(
+            config=PostgresGameRepositoryConfig(
+                db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            )
+        )
+        existing, new = uuid4().hex, uuid4().hex
+        await postgres_repository.insert(existing, PLAYER_ONE_NEED_TO_MOVE)
+        repository = WriteBehindGameRepository(
+            repository=postgres_repository,
+            config=WriteBehindGameRepositoryConfig(),
+        )
+        await repository.insert(existing, PLAYER_ONE_NEED_TO_START)
+        await repository.insert(new, PLAYER_ONE_NEED_TO_START)
+        await repository.flush()
+        assert repository.pending == {}
+        assert await postgres_repository.get(existing) == PLAYER_ONE_NEED_TO_MOVE
+        assert await postgres_repository.get(new) == PLAYER_ONE_NEED_TO_START
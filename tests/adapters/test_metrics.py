@@ -0,0 +1,65 @@
+from tic_tac_toe.adapters.metrics import Gauge, Histogram, Registry
+
+
+def describe_histogram():
+    def test_counts_are_cumulative():
+        histogram = Histogram("latency", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        assert list(histogram.render()) == [
+            "# HELP latency Latency",
+            "# TYPE latency histogram",
+            'latency_bucket{le="0.1"} 2',
+            'latency_bucket{le="1.0"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            "latency_sum 2.65",
+            "latency_count 4",
+        ]
+
+    def test_series_are_kept_by_label_values():
+        histogram = Histogram(
+            "requests", "Requests", labels=("route", "status"), buckets=(1.0,)
+        )
+        histogram.observe(0.5, "/games", "201")
+        histogram.labels("/games/{game_id}", "404").observe(2.0)
+        histogram.observe(0.5, "/games", "201")
+        assert histogram.count("/games", "201") == 2
+        assert histogram.count("/games/{game_id}", "404") == 1
+        assert histogram.count("/games", "500") == 0
+        assert (
+            'requests_bucket{route="/games/{game_id}",status="404",le="+Inf"} 1'
+            in histogram.render()
+        )
+
+    def test_label_values_are_escaped():
+        histogram = Histogram("requests", "Requests", labels=("route",))
+        histogram.observe(0.5, 'a"b\\c')
+        assert 'requests_count{route="a\\"b\\\\c"} 1' in histogram.render()
+
+
+def describe_registry():
+    def test_metrics_are_rendered_by_name():
+        registry = Registry()
+        registry.histogram("b_seconds", "B", buckets=(1.0,)).observe(1.0)
+        registry.register(
+            Gauge("a_pool", "A", label="stat", read=lambda: {"size": 4, "idle": 1})
+        )
+        assert registry.render() == (
+            "# HELP a_pool A\n"
+            "# TYPE a_pool gauge\n"
+            'a_pool{stat="idle"} 1\n'
+            'a_pool{stat="size"} 4\n'
+            "# HELP b_seconds B\n"
+            "# TYPE b_seconds histogram\n"
+            'b_seconds_bucket{le="1.0"} 1\n'
+            'b_seconds_bucket{le="+Inf"} 1\n'
+            "b_seconds_sum 1.0\n"
+            "b_seconds_count 1\n"
+        )
+
+    def test_gauges_are_read_when_rendered():
+        values = {"size": 1}
+        registry = Registry()
+        registry.register(Gauge("pool", "Pool", label="stat", read=lambda: values))
+        values["size"] = 2
+        assert 'pool{stat="size"} 2\n' in registry.render()
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+
+from tic_tac_toe.adapters.profiling import ProfilingConfig, StackSampler, fold_stack
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def describe_fold_stack():
+    def test_outermost_frame_comes_first():
+        def inner():
+            return fold_stack(sys._getframe())
+
+        def outer():
+            return inner()
+
+        stack = outer()
+        assert stack.endswith(
+            f"{__name__}.{outer.__qualname__};{__name__}.{inner.__qualname__}"
+        )
+
+
+def describe_stack_sampler():
+    def test_requests_are_sampled_at_the_configured_rate():
+        draws = iter([0.5, 0.05])
+        clock = Clock()
+        sampler = StackSampler(
+            ProfilingConfig(sample_rate=0.1, min_interval=1.0),
+            uniform=lambda: next(draws),
+            clock=clock,
+        )
+        assert not sampler.should_profile([])
+        clock.now += 1.0
+        assert sampler.should_profile([])
+
+    def test_requests_with_the_header_are_profiled():
+        sampler = StackSampler(
+            ProfilingConfig(sample_rate=0.0, header="X-Profile"), clock=Clock()
+        )
+        assert not sampler.should_profile([(b"x-other", b"1")])
+        assert sampler.should_profile([(b"x-profile", b"1")])
+
+    def test_profiled_requests_are_rate_limited():
+        clock = Clock()
+        sampler = StackSampler(
+            ProfilingConfig(sample_rate=1.0, min_interval=1.0), clock=clock
+        )
+        assert sampler.should_profile([])
+        clock.now += 0.5
+        assert not sampler.should_profile([(b"x-profile", b"1")])
+        clock.now += 0.5
+        assert sampler.should_profile([])
+
+    async def test_stacks_are_written_folded(tmp_path):
+        output = tmp_path / "profile.folded"
+        sampler = StackSampler(
+            ProfilingConfig(sampling_interval=0.001, output=str(output))
+        )
+        await sampler.open()
+
+        def busy_request():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        sampler.start_request()
+        busy_request()
+        sampler.end_request()
+        # the stacks are written once no profiled request is left
+        deadline = time.monotonic() + 5
+        while not output.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        await sampler.close()
+
+        lines = output.read_text().splitlines()
+        counts = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in lines}
+        assert any(stack.endswith(".busy_request") for stack in counts)
+        assert sum(counts.values()) > 0
+
+    async def test_nothing_is_written_without_profiled_requests(tmp_path):
+        output = tmp_path / "profile.folded"
+        sampler = StackSampler(ProfilingConfig(output=str(output)))
+        await sampler.open()
+        await sampler.close()
+        assert not output.exists()
+
+    async def test_every_process_writes_its_own_file(tmp_path):
+        sampler = StackSampler(
+            ProfilingConfig(output=str(tmp_path / "profile-{pid}.folded"))
+        )
+        await sampler.open()
+        await sampler.close()
+        assert sampler.output == str(tmp_path / f"profile-{os.getpid()}.folded")
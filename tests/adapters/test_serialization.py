@@ -0,0 +1,148 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from tests.fixtures import (
+    DRAW,
+    PLAYER_ONE_NEED_TO_MOVE,
+    PLAYER_ONE_NEED_TO_START,
+    PLAYER_TWO_NEED_TO_START,
+    PLAYER_TWO_WIN,
+)
+
+from tic_tac_toe.adapters.serialization import (
+    decode_game,
+    decode_listed_game,
+    dumps,
+    encode,
+    encode_game,
+    loads,
+)
+from tic_tac_toe.domain.application import (
+    GameAggregate,
+    GamePage,
+    GridGameAggregate,
+    ListedGame,
+    MarksAdded,
+)
+from tic_tac_toe.domain.data import Cell, CellAlreadyMarked, Player
+from tic_tac_toe.domain.grid import CreateNewGridGameCommand, GridMark
+from tic_tac_toe.entrypoints import schemas
+
+GAMES = [
+    pytest.param(PLAYER_ONE_NEED_TO_START, id="new game"),
+    pytest.param(PLAYER_TWO_NEED_TO_START, id="player two needs to start"),
+    pytest.param(PLAYER_ONE_NEED_TO_MOVE, id="ongoing game"),
+    pytest.param(PLAYER_TWO_WIN, id="game over (win)"),
+    pytest.param(DRAW, id="game over (draw)"),
+]
+
+
+def describe_encode_game():
+    @pytest.mark.parametrize("game", GAMES)
+    def test_matches_jsonable_encoder(game):
+        assert encode_game(game) == jsonable_encoder(game)
+
+    @pytest.mark.parametrize("game", GAMES)
+    def test_is_decoded_back(game):
+        assert decode_game(loads(dumps(encode_game(game)))) == game
+
+
+def describe_dumps():
+    def test_game_aggregate():
+        aggregate = GameAggregate(id="game-id", state=PLAYER_ONE_NEED_TO_MOVE)
+        assert loads(dumps(aggregate)) == jsonable_encoder(aggregate)
+
+    def test_marks_added_with_error():
+        marks_added = MarksAdded(
+            id="game-id",
+            state=PLAYER_ONE_NEED_TO_MOVE,
+            applied=0,
+            error=CellAlreadyMarked(error="CELL_ALREADY_MARKED", cell=Cell.TOP_LEFT),
+        )
+        assert loads(dumps(marks_added)) == jsonable_encoder(marks_added)
+
+    def test_game_page():
+        at = datetime(2026, 10, 18, 20, 0, 0, 123456, tzinfo=timezone.utc)
+        page = GamePage(
+            games=[ListedGame(id="game-id", state=DRAW, created_at=at, finished_at=at)],
+            next_cursor=None,
+        )
+        assert loads(dumps(page)) == jsonable_encoder(page)
+
+    def test_grid_game_aggregate():
+        grid = CreateNewGridGameCommand(size=4, k=3)()
+        for mark in [
+            GridMark(player=Player.ONE, row=3, column=0),
+            GridMark(player=Player.TWO, row=0, column=3),
+        ]:
+            grid = grid.add_mark(mark)
+        data = loads(dumps(GridGameAggregate(id="game-id", state=grid)))
+        assert data == {
+            "id": "game-id",
+            "state": {
+                "size": 4,
+                "k": 3,
+                "status": "ONGOING",
+                "next_player": Player.ONE.value,
+                "marks": [
+                    {"player": Player.TWO.value, "row": 0, "column": 3},
+                    {"player": Player.ONE.value, "row": 3, "column": 0},
+                ],
+            },
+        }
+        # as documented in the openapi schema
+        schemas.GridGameAggregate.parse_obj(data)
+
+    def test_output_is_compact_json():
+        assert (
+            dumps([{"a": 1}]) == json.dumps([{"a": 1}], separators=(",", ":")).encode()
+        )
+
+
+def describe_encode():
+    def test_enum_is_encoded_as_its_value():
+        assert encode(Player.TWO) == Player.TWO.value
+
+    def test_datetime_is_encoded_in_iso_format():
+        at = datetime(2026, 10, 18, 20, 0, tzinfo=timezone.utc)
+        assert encode(at) == "2026-10-18T20:00:00+00:00"
+
+    def test_unknown_type_is_rejected():
+        with pytest.raises(TypeError):
+            encode(object())
+
+
+def describe_decode_listed_game():
+    @pytest.mark.parametrize("game", GAMES)
+    def test_is_decoded_back(game):
+        at = datetime(2026, 10, 18, 20, 0, 0, 123456, tzinfo=timezone.utc)
+        listed = ListedGame(id="game-id", state=game, created_at=at, finished_at=None)
+        assert decode_listed_game(dumps(listed)) == listed
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            b"[]",
+            b'{"id": 1, "state": {}, "created_at": "2026-10-18T20:00:00"}',
+            b'{"id": "game-id", "state": {}, "created_at": "2026-10-18T20:00:00"}',
+            b'{"id": "game-id", "state": {"status": "OVER", "marks": {"A1": 1}},'
+            b' "created_at": "2026-10-18T20:00:00"}',
+            b'{"id": "game-id", "state": {"status": "ONGOING", "marks": {},'
+            b' "next_player": 3}, "created_at": "2026-10-18T20:00:00"}',
+            b'{"id": "game-id", "state": {"status": "OVER", "marks": [],'
+            b' "winner": null}, "created_at": "2026-10-18T20:00:00"}',
+            b'{"id": "game-id", "state": {"status": "DONE", "marks": {}},'
+            b' "created_at": "2026-10-18T20:00:00"}',
+            b'{"id": "game-id", "created_at": "yesterday", "state": '
+            + dumps(DRAW)
+            + b"}",
+            b'{"id": "game-id", "created_at": "2026-10-18T20:00:00",'
+            b' "finished_at": 1, "state": ' + dumps(DRAW) + b"}",
+            b"not json",
+        ],
+    )
+    def test_invalid_games_are_rejected(line):
+        with pytest.raises(ValueError):
+            decode_listed_game(line)
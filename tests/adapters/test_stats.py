@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+import pytest
+
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+)
+from tic_tac_toe.adapters.stats import (
+    InMemoryGameStatistics,
+    PostgresGameStatistics,
+    PostgresGameStatisticsConfig,
+)
+
+
+def describe_in_memory_game_statistics():
+    async def test_counts_are_added():
+        statistics = InMemoryGameStatistics()
+        statistics.count({"games_started": 2})
+        statistics.count({"games_started": 1, "games_over": 1})
+        assert await statistics.read() == {"games_started": 3, "games_over": 1}
+
+
+@pytest.fixture
+def make_statistics():
+    def build(flush_interval=5.0):
+        repository = PostgresGameRepository(
+            config=PostgresGameRepositoryConfig(
+                db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            )
+        )
+        return PostgresGameStatistics(
+            repository=repository,
+            config=PostgresGameStatisticsConfig(flush_interval=flush_interval),
+        )
+
+    return build
+
+
+def describe_postgres_game_statistics():
+    async def test_counts_of_every_process_are_added(make_statistics):
+        # one instance per gunicorn worker
+        first, second = make_statistics(), make_statistics()
+        before = await first.read()
+        first.count({"games_started": 2})
+        second.count({"games_started": 1, "test_counter": 1})
+        # nothing is written before a flush
+        assert await first.read() == before
+        await first.flush()
+        await second.flush()
+        after = await second.read()
+        assert after["games_started"] == before.get("games_started", 0) + 3
+        assert after["test_counter"] == before.get("test_counter", 0) + 1
+
+    async def test_counts_are_flushed_periodically_and_on_close(make_statistics):
+        statistics = make_statistics(flush_interval=0.01)
+        before = (await statistics.read()).get("test_counter", 0)
+        await statistics.open()
+        statistics.count({"test_counter": 1})
+        for _ in range(100):
+            if (await statistics.read()).get("test_counter") == before + 1:
+                break
+            await asyncio.sleep(0.01)
+        assert (await statistics.read())["test_counter"] == before + 1
+        statistics.count({"test_counter": 1})
+        await statistics.close()
+        assert (await statistics.read())["test_counter"] == before + 2
+
+    async def test_flushing_goes_on_after_an_error(make_statistics):
+        statistics = make_statistics(flush_interval=0.01)
+        before = (await statistics.read()).get("test_counter", 0)
+        flush = statistics.flush
+        failures = []
+
+        async def _fail_once():
+            if not failures:
+                failures.append(RuntimeError("unexpected"))
+                raise failures[0]
+            await flush()
+
+        statistics.flush = _fail_once
+        await statistics.open()
+        try:
+            statistics.count({"test_counter": 1})
+            for _ in range(100):
+                if (await statistics.read()).get("test_counter") == before + 1:
+                    break
+                await asyncio.sleep(0.01)
+            assert failures
+            assert (await statistics.read())["test_counter"] == before + 1
+        finally:
+            await statistics.close()
+
+    async def test_rebuild_replaces_counters(make_statistics):
+        statistics = make_statistics()
+        statistics.count({"test_counter": 1})
+        await statistics.flush()
+        before, after = await statistics.rebuild()
+        assert before["test_counter"] >= 1
+        assert "test_counter" not in after
+        assert await statistics.read() == after
+        assert after["games_started"] >= after["games_over"]
+        assert after["games_over"] == (
+            after["draws"] + after["wins_1"] + after["wins_2"]
+        )
@@ -0,0 +1,158 @@
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from tests.fixtures import DRAW, PLAYER_ONE_NEED_TO_MOVE, PLAYER_ONE_NEED_TO_START
+
+from tic_tac_toe.adapters.repository.postgres import (
+    PostgresGameRepository,
+    PostgresGameRepositoryConfig,
+)
+from tic_tac_toe.adapters.updates import InMemoryGameUpdates, PostgresGameUpdates
+from tic_tac_toe.domain.application import GameAggregate
+
+
+def describe_in_memory_game_updates():
+    async def test_subscribers_get_games_they_subscribed_to():
+        updates = InMemoryGameUpdates()
+        game = GameAggregate(id="a", state=PLAYER_ONE_NEED_TO_MOVE)
+        async with updates.subscribe("a") as first, updates.subscribe("a") as second:
+            async with updates.subscribe("b") as other:
+                await updates.publish(game)
+                assert await anext(first) == game
+                assert await anext(second) == game
+                assert other.games.empty()
+
+    async def test_only_latest_game_is_kept_for_slow_subscribers():
+        updates = InMemoryGameUpdates()
+        async with updates.subscribe("a") as subscription:
+            await updates.publish(GameAggregate(id="a", state=PLAYER_ONE_NEED_TO_START))
+            await updates.publish(GameAggregate(id="a", state=PLAYER_ONE_NEED_TO_MOVE))
+            assert await anext(subscription) == GameAggregate(
+                id="a", state=PLAYER_ONE_NEED_TO_MOVE
+            )
+            assert subscription.games.empty()
+
+    async def test_subscription_is_removed_on_exit():
+        updates = InMemoryGameUpdates()
+        async with updates.subscribe("a"):
+            pass
+        assert updates.subscriptions == {}
+
+
+def describe_postgres_game_updates():
+    @pytest.fixture
+    def repository():
+        return PostgresGameRepository(
+            config=PostgresGameRepositoryConfig(
+                db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            )
+        )
+
+    async def test_games_are_published_to_every_process(repository):
+        # one instance per gunicorn worker
+        publisher = PostgresGameUpdates(repository=repository, channel="test")
+        listener = PostgresGameUpdates(repository=repository, channel="test")
+        await publisher.open()
+        await listener.open()
+        try:
+            game_id = uuid4().hex
+            game = GameAggregate(id=game_id, state=DRAW)
+            async with publisher.subscribe(game_id) as own:
+                async with listener.subscribe(game_id) as other:
+                    await publisher.publish(game)
+                    assert await asyncio.wait_for(anext(other), 5) == game
+                    assert await asyncio.wait_for(anext(own), 5) == game
+        finally:
+            await publisher.close()
+            await listener.close()
+
+    async def test_games_are_read_again_after_reconnecting(repository):
+        updates = PostgresGameUpdates(
+            repository=repository, channel="test", reconnect_delay=0.01
+        )
+        await updates.open()
+        try:
+            game_id = uuid4().hex
+            await repository.insert(game_id=game_id, game=PLAYER_ONE_NEED_TO_START)
+            async with updates.subscribe(game_id) as subscription:
+                # moved while not listening: not published
+                await repository.update(
+                    game_id=game_id, fn=lambda _: PLAYER_ONE_NEED_TO_MOVE
+                )
+                async with repository.connection() as conn:
+                    await conn.execute(
+                        "SELECT pg_terminate_backend(%s)",
+                        (updates.connection.info.backend_pid,),
+                    )
+                game = await asyncio.wait_for(anext(subscription), 5)
+                assert game == GameAggregate(id=game_id, state=PLAYER_ONE_NEED_TO_MOVE)
+
+                await updates.publish(GameAggregate(id=game_id, state=DRAW))
+                game = await asyncio.wait_for(anext(subscription), 5)
+                assert game == GameAggregate(id=game_id, state=DRAW)
+        finally:
+            await updates.close()
+
+    async def test_publishing_goes_on_after_an_error(repository):
+        updates = PostgresGameUpdates(
+            repository=repository, channel="test", reconnect_delay=0.01
+        )
+        await updates.open()
+        try:
+            game = GameAggregate(id=uuid4().hex, state=DRAW)
+            async with updates.subscribe(game.id) as subscription:
+                await updates.publish(game)
+                assert await asyncio.wait_for(anext(subscription), 5) == game
+                async with repository.connection() as conn:
+                    await conn.execute(
+                        "SELECT pg_terminate_backend(%s)",
+                        (updates.publishing_connection.info.backend_pid,),
+                    )
+
+                async def published():
+                    # games sent on the lost connection are lost, not the next
+                    while True:
+                        await updates.publish(game)
+                        try:
+                            return await asyncio.wait_for(anext(subscription), 0.1)
+                        except asyncio.TimeoutError:
+                            pass
+
+                assert await asyncio.wait_for(published(), 5) == game
+        finally:
+            await updates.close()
+
+    async def test_games_beyond_the_limit_are_dropped(repository):
+        updates = PostgresGameUpdates(repository=repository, max_pending=1)
+        # not opened: nothing is sent
+        await updates.publish(GameAggregate(id="a", state=DRAW))
+        await updates.publish(GameAggregate(id="b", state=DRAW))
+        assert updates.pending.qsize() == 1
+
+    async def test_invalid_updates_are_skipped(repository):
+        updates = PostgresGameUpdates(repository=repository, channel="test")
+        await updates.open()
+        try:
+            game = GameAggregate(id=uuid4().hex, state=DRAW)
+            async with updates.subscribe(game.id) as subscription:
+                async with repository.connection() as conn:
+                    await conn.execute("SELECT pg_notify('test', 'not a game')")
+                await updates.publish(game)
+                assert await asyncio.wait_for(anext(subscription), 5) == game
+        finally:
+            await updates.close()
+
+    async def test_open_fails_when_it_cant_listen():
+        repository = PostgresGameRepository(
+            config=PostgresGameRepositoryConfig(
+                db_uri="postgres://postgres@127.0.0.1:1/nowhere"
+            )
+        )
+        updates = PostgresGameUpdates(
+            repository=repository, reconnect_delay=0.01, open_timeout=0.1
+        )
+        with pytest.raises(asyncio.TimeoutError):
+            await updates.open()
+        assert updates.listener is None
@@ -0,0 +1,116 @@
+import random
+from functools import lru_cache
+
+import pytest
+from tests.fixtures import DRAW, PLAYER_ONE_NEED_TO_START, PLAYER_TWO_NEED_TO_START
+
+from tic_tac_toe.domain.ai import WINNING_MASKS, Difficulty, SolvedGameTable
+from tic_tac_toe.domain.data import (
+    CELL_MASKS,
+    FULL_BOARD_MASK,
+    AddMarkCommand,
+    Bitboard,
+    Cell,
+    GameIsOver,
+    GameOver,
+    Mark,
+    Player,
+)
+from tic_tac_toe.domain.transitions import TransitionTable
+
+
+@pytest.fixture(scope="module")
+def solved_game_table():
+    return SolvedGameTable.build()
+
+
+@lru_cache(maxsize=None)
+def best_score(own, opponent):
+    # plain minimax, without symmetries
+    scores = []
+    for cell in range(len(Cell)):
+        if (own | opponent) & 1 << cell:
+            continue
+        marked = own | 1 << cell
+        empty_cells = len(Cell) - (marked | opponent).bit_count()
+        if any(marked & mask == mask for mask in WINNING_MASKS[cell]):
+            scores.append(1 + empty_cells)
+        elif marked | opponent == FULL_BOARD_MASK:
+            scores.append(0)
+        else:
+            scores.append(-best_score(opponent, marked))
+    return max(scores)
+
+
+def score_of(game, mark):
+    board = Bitboard.from_game(game)
+    own, opponent = (
+        (board.ones, board.twos)
+        if mark.player is Player.ONE
+        else (board.twos, board.ones)
+    )
+    result = Bitboard.from_game(AddMarkCommand(mark=mark)(game))
+    if result.winner is not None:
+        return 1 + len(Cell) - bin(result.ones | result.twos).count("1")
+    if result.next_player is None:
+        return 0
+    return -best_score(opponent, own | CELL_MASKS[mark.cell])
+
+
+def describe_solved_game_table():
+    def test_symmetric_positions_are_stored_once(solved_game_table):
+        assert len(solved_game_table) == 627
+
+    def test_hard_moves_are_optimal_in_every_reachable_position(solved_game_table):
+        rng = random.Random(0)
+        for key in TransitionTable.build().transitions:
+            game = Bitboard.decode(key).to_game()
+            if isinstance(game, GameOver):
+                continue
+            mark = solved_game_table.choose_mark(game, Difficulty.HARD, rng)
+            board = Bitboard.from_game(game)
+            own, opponent = (
+                (board.ones, board.twos)
+                if game.next_player is Player.ONE
+                else (board.twos, board.ones)
+            )
+            assert score_of(game, mark) == best_score(own, opponent)
+
+    @pytest.mark.parametrize("ai", list(Player))
+    def test_hard_never_loses(ai, solved_game_table):
+        rng = random.Random(0)
+
+        def play(game):
+            if isinstance(game, GameOver):
+                assert game.winner in (ai, None)
+                return
+            if game.next_player is ai:
+                mark = solved_game_table.choose_mark(game, Difficulty.HARD, rng)
+                play(AddMarkCommand(mark=mark)(game))
+                return
+            for cell in Cell:
+                if cell not in game.marks:
+                    mark = Mark(player=game.next_player, cell=cell)
+                    play(AddMarkCommand(mark=mark)(game))
+
+        play(PLAYER_ONE_NEED_TO_START)
+
+    def test_easy_plays_any_free_cell(solved_game_table):
+        rng = random.Random(0)
+        cells = {
+            solved_game_table.choose_mark(
+                PLAYER_ONE_NEED_TO_START, Difficulty.EASY, rng
+            ).cell
+            for _ in range(200)
+        }
+        assert cells == set(Cell)
+
+    def test_unreachable_position_is_solved(solved_game_table):
+        mark = solved_game_table.choose_mark(
+            PLAYER_TWO_NEED_TO_START, Difficulty.HARD, random.Random(0)
+        )
+        assert mark.player is Player.TWO
+
+    def test_game_is_over(solved_game_table):
+        result = solved_game_table.choose_mark(DRAW, Difficulty.HARD, random.Random())
+        assert result == GameIsOver(error="GAME_IS_OVER")
@@ -0,0 +1,201 @@
+import asyncio
+
+import pytest
+from tests.fixtures import PLAYER_ONE_NEED_TO_START
+
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
+from tic_tac_toe.domain.application import (
+    Application,
+    GameAggregate,
+    GameMailboxes,
+    GameNotFound,
+)
+from tic_tac_toe.domain.data import Cell, CellAlreadyMarked, Mark, Player
+
+
+def describe_game_mailboxes():
+    class _SlowRepository(InMemoryGameRepository):
+        # the concurrent updates have the time to queue up
+        def __init__(self):
+            super().__init__()
+            self.updates = 0
+            # of every update, once written
+            self.marks = []
+
+        async def update(self, game_id, fn, marks=None):
+            self.updates += 1
+            await asyncio.sleep(0)
+            result = await super().update(game_id, fn, marks)
+            self.marks.append(list(marks))
+            return result
+
+    def _application(repository):
+        return Application(
+            repository=repository,
+            generate_game_id=lambda: "game",
+            mailboxes=GameMailboxes(),
+        )
+
+    async def test_concurrent_moves_are_applied_together():
+        repository = _SlowRepository()
+        repository.games["game"] = PLAYER_ONE_NEED_TO_START
+        application = _application(repository)
+        marks = [
+            Mark(player=Player.ONE, cell=Cell.CENTER_CENTER),
+            Mark(player=Player.TWO, cell=Cell.TOP_LEFT),
+            Mark(player=Player.ONE, cell=Cell.TOP_CENTER),
+            Mark(player=Player.TWO, cell=Cell.BOTTOM_RIGHT),
+        ]
+        results = await asyncio.gather(
+            *(application.add_mark("game", mark) for mark in marks)
+        )
+        # the first, then the others waiting for it
+        assert repository.updates == 2
+        for index, result in enumerate(results):
+            assert isinstance(result, GameAggregate)
+            assert len(result.state.marks) == index + 1
+        assert repository.games["game"] == results[-1].state
+        assert repository.marks == [marks[:1], marks[1:]]
+        assert len(application.mailboxes) == 0
+
+    async def test_errors_are_returned_to_their_request():
+        repository = _SlowRepository()
+        repository.games["game"] = PLAYER_ONE_NEED_TO_START
+        application = _application(repository)
+        marks = [
+            Mark(player=Player.ONE, cell=Cell.CENTER_CENTER),
+            Mark(player=Player.TWO, cell=Cell.TOP_LEFT),
+            Mark(player=Player.ONE, cell=Cell.TOP_LEFT),
+            Mark(player=Player.ONE, cell=Cell.TOP_CENTER),
+        ]
+        results = await asyncio.gather(
+            *(application.add_mark("game", mark) for mark in marks)
+        )
+        assert results[2] == CellAlreadyMarked(
+            error="CELL_ALREADY_MARKED", cell=Cell.TOP_LEFT
+        )
+        assert repository.marks == [marks[:1], [marks[1], marks[3]]]
+        assert repository.games["game"].marks == {
+            Cell.CENTER_CENTER: Player.ONE,
+            Cell.TOP_LEFT: Player.TWO,
+            Cell.TOP_CENTER: Player.ONE,
+        }
+
+    async def test_game_not_found_is_returned_to_every_request():
+        application = _application(_SlowRepository())
+        mark = Mark(player=Player.ONE, cell=Cell.CENTER_CENTER)
+        results = await asyncio.gather(
+            *(application.add_mark("game", mark) for _ in range(3))
+        )
+        assert results == [GameNotFound(error="GAME_NOT_FOUND")] * 3
+        assert len(application.mailboxes) == 0
+
+    async def test_failed_update_fails_every_request():
+        class _FailingRepository(_SlowRepository):
+            async def update(self, game_id, fn, marks=None):
+                await super().update(game_id, fn, marks)
+                raise RuntimeError("connection lost")
+
+        repository = _FailingRepository()
+        repository.games["game"] = PLAYER_ONE_NEED_TO_START
+        application = _application(repository)
+        mark = Mark(player=Player.ONE, cell=Cell.CENTER_CENTER)
+        results = await asyncio.gather(
+            *(application.add_mark("game", mark) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert [str(result) for result in results] == ["connection lost"] * 3
+        assert len(application.mailboxes) == 0
+
+    async def test_cancelled_request_is_not_applied():
+        repository = _SlowRepository()
+        repository.games["game"] = PLAYER_ONE_NEED_TO_START
+        application = _application(repository)
+        first = asyncio.create_task(
+            application.add_mark(
+                "game", Mark(player=Player.ONE, cell=Cell.CENTER_CENTER)
+            )
+        )
+        cancelled = asyncio.create_task(
+            application.add_mark("game", Mark(player=Player.TWO, cell=Cell.TOP_LEFT))
+        )
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        await first
+        assert repository.games["game"].marks == {Cell.CENTER_CENTER: Player.ONE}
+        assert len(application.mailboxes) == 0
+
+    class _HangingRepository(_SlowRepository):
+        # updates are written, then wait to be released to return
+        def __init__(self):
+            super().__init__()
+            self.written = asyncio.Event()
+            self.release = asyncio.Event()
+
+        async def update(self, game_id, fn, marks=None):
+            result = await super().update(game_id, fn, marks)
+            self.written.set()
+            await self.release.wait()
+            return result
+
+    async def test_cancelled_update_is_written_once():
+        repository = _HangingRepository()
+        repository.games["game"] = PLAYER_ONE_NEED_TO_START
+        application = _application(repository)
+        marks = [
+            Mark(player=Player.ONE, cell=Cell.CENTER_CENTER),
+            Mark(player=Player.TWO, cell=Cell.TOP_LEFT),
+        ]
+        cancelled = asyncio.create_task(application.add_mark("game", marks[0]))
+        await repository.written.wait()
+        waiting = asyncio.create_task(application.add_mark("game", marks[1]))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        # the update is committed: it is waited for
+        assert not cancelled.done()
+        repository.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        result = await waiting
+        assert isinstance(result, GameAggregate)
+        assert repository.marks == [marks[:1], marks[1:]]
+        assert repository.games["game"].marks == {
+            Cell.CENTER_CENTER: Player.ONE,
+            Cell.TOP_LEFT: Player.TWO,
+        }
+        assert len(application.mailboxes) == 0
+
+    async def test_cancelled_request_in_a_batch_is_applied():
+        repository = _HangingRepository()
+        repository.games["game"] = PLAYER_ONE_NEED_TO_START
+        application = _application(repository)
+        marks = [
+            Mark(player=Player.ONE, cell=Cell.CENTER_CENTER),
+            Mark(player=Player.TWO, cell=Cell.TOP_LEFT),
+            Mark(player=Player.ONE, cell=Cell.TOP_CENTER),
+        ]
+        first = asyncio.create_task(application.add_mark("game", marks[0]))
+        await repository.written.wait()
+        writing, cancelled = (
+            asyncio.create_task(application.add_mark("game", mark))
+            for mark in marks[1:]
+        )
+        await asyncio.sleep(0)
+        # the first update returns, the next two are written together
+        repository.written.clear()
+        release, repository.release = repository.release, asyncio.Event()
+        release.set()
+        await first
+        await repository.written.wait()
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        repository.release.set()
+        result = await writing
+        assert isinstance(result, GameAggregate)
+        assert repository.marks == [marks[:1], marks[1:]]
+        assert len(repository.games["game"].marks) == 3
+        assert len(application.mailboxes) == 0
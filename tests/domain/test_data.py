@@ -13,6 +13,7 @@ from tests.fixtures import (
 from tic_tac_toe.domain.data import (
     WINNING_CELL_COMBINATIONS,
     AddMarkCommand,
+    Bitboard,
     Cell,
     CellAlreadyMarked,
     GameIsOver,
@@ -243,3 +244,46 @@ def describe_add_mark():
         add_mark = AddMarkCommand(mark=mark_to_add)
         result = add_mark(game=game)
         assert expected == result
+
+
+def describe_bitboard():
+    @pytest.mark.parametrize(
+        "game",
+        [
+            pytest.param(PLAYER_ONE_NEED_TO_START, id="player one needs to start"),
+            pytest.param(PLAYER_TWO_NEED_TO_START, id="player two needs to start"),
+            pytest.param(PLAYER_ONE_NEED_TO_MOVE, id="player one needs to move"),
+            pytest.param(PLAYER_TWO_NEED_TO_MOVE, id="player two needs to move"),
+            pytest.param(PLAYER_TWO_WIN, id="player two won"),
+            pytest.param(DRAW, id="draw"),
+        ],
+    )
+    def test_conversion_is_lossless(game):
+        assert Bitboard.from_game(game).to_game() == game
+
+    @pytest.mark.parametrize(
+        "game",
+        [
+            pytest.param(PLAYER_TWO_NEED_TO_START, id="player two needs to start"),
+            pytest.param(PLAYER_ONE_NEED_TO_MOVE, id="player one needs to move"),
+            pytest.param(PLAYER_TWO_WIN, id="player two won"),
+            pytest.param(DRAW, id="draw"),
+        ],
+    )
+    def test_encoding_is_lossless(game):
+        board = Bitboard.from_game(game)
+        assert Bitboard.decode(board.encode()) == board
+
+    def test_each_player_has_its_own_bits():
+        board = Bitboard.from_game(PLAYER_TWO_NEED_TO_MOVE)
+        assert board.ones == 0b000000010
+        assert board.twos == 0b000000001
+        assert board.next_player is Player.TWO
+        assert board.winner is None
+
+    def test_marks_shared_by_games_are_read_only():
+        game = Bitboard.from_game(PLAYER_TWO_NEED_TO_MOVE).to_game()
+        assert Bitboard.from_game(game).to_game().marks is game.marks
+        with pytest.raises(TypeError):
+            game.marks[Cell.CENTER_CENTER] = Player.TWO  # type: ignore
+        assert Cell.CENTER_CENTER not in game.marks
@@ -0,0 +1,135 @@
+import pytest
+
+from tic_tac_toe.domain.data import (
+    WINNING_MASKS_BY_CELL,
+    Cell,
+    GameIsOver,
+    Player,
+    PlayerCantMove,
+)
+from tic_tac_toe.domain.grid import (
+    AddGridMarkCommand,
+    CellOutsideGrid,
+    CreateNewGridGameCommand,
+    Grid,
+    GridCellAlreadyMarked,
+    GridMark,
+    winning_masks,
+)
+
+
+def _play(grid: Grid, *cells: tuple[int, int]) -> Grid:
+    for row, column in cells:
+        assert grid.next_player is not None
+        mark = GridMark(player=grid.next_player, row=row, column=column)
+        result = AddGridMarkCommand(mark=mark)(grid)
+        assert isinstance(result, Grid), result
+        grid = result
+    return grid
+
+
+def describe_create_new_grid_game():
+    def it_defaults_to_tic_tac_toe():
+        assert CreateNewGridGameCommand()() == Grid(3, 3, 0, 0, Player.ONE, None)
+
+    @pytest.mark.parametrize(
+        "size, k",
+        [
+            pytest.param(3, 4, id="k larger than the grid"),
+            pytest.param(0, 1, id="empty grid"),
+            pytest.param(26, 5, id="grid too large"),
+            pytest.param(25, 7, id="k too large"),
+        ],
+    )
+    def it_rejects_invalid_variants(size, k):
+        with pytest.raises(ValueError):
+            CreateNewGridGameCommand(size=size, k=k)
+
+
+def describe_winning_masks():
+    def it_matches_the_board_of_cells():
+        masks = winning_masks(3, 3)
+        for index, cell in enumerate(Cell):
+            assert set(masks[index]) == set(WINNING_MASKS_BY_CELL[cell])
+
+    def it_counts_the_lines_through_a_cell():
+        # 5 across, 5 down and 5 along each diagonal
+        assert len(winning_masks(15, 5)[7 * 15 + 7]) == 20
+        # 1 across, 1 down and 1 diagonal
+        assert len(winning_masks(15, 5)[0]) == 3
+
+
+def describe_add_grid_mark():
+    @pytest.mark.parametrize(
+        "start, step",
+        [
+            pytest.param((7, 3), (0, 1), id="across"),
+            pytest.param((3, 14), (1, 0), id="down"),
+            pytest.param((10, 10), (1, 1), id="diagonal"),
+            pytest.param((14, 0), (-1, 1), id="anti-diagonal"),
+        ],
+    )
+    def it_wins_with_k_in_a_row(start, step):
+        # player two marks the top row meanwhile, one short of winning
+        cells = []
+        for i in range(5):
+            cells.append((start[0] + i * step[0], start[1] + i * step[1]))
+            cells.append((0, i + 5))
+        grid = _play(CreateNewGridGameCommand(size=15, k=5)(), *cells[:-1])
+        assert grid.winner is Player.ONE
+        assert grid.next_player is None
+
+    def it_does_not_win_across_the_edge_of_the_grid():
+        # the end of a row and the start of the next one are adjacent bits
+        grid = _play(
+            CreateNewGridGameCommand(size=5, k=3)(),
+            (0, 3), (2, 0), (0, 4), (2, 2), (1, 0),
+        )  # fmt: skip
+        assert grid.winner is None
+        assert grid.next_player is Player.TWO
+
+    def it_ends_in_a_draw_when_the_grid_is_full():
+        grid = _play(
+            CreateNewGridGameCommand()(),
+            (0, 0), (0, 1), (0, 2), (1, 1), (1, 0), (1, 2), (2, 1), (2, 0), (2, 2),
+        )  # fmt: skip
+        assert grid.winner is None
+        assert grid.next_player is None
+
+    def it_keeps_the_marks():
+        grid = _play(CreateNewGridGameCommand(size=19, k=5)(), (18, 18), (0, 9))
+        assert grid.player_at(18, 18) is Player.ONE
+        assert grid.player_at(0, 9) is Player.TWO
+        assert grid.player_at(9, 9) is None
+
+    @pytest.mark.parametrize(
+        "mark, error",
+        [
+            pytest.param(
+                GridMark(player=Player.TWO, row=1, column=1),
+                PlayerCantMove(error="PLAYER_CANT_MOVE", player=Player.TWO),
+                id="player can't move",
+            ),
+            pytest.param(
+                GridMark(player=Player.ONE, row=0, column=0),
+                GridCellAlreadyMarked(error="CELL_ALREADY_MARKED", row=0, column=0),
+                id="cell already marked",
+            ),
+            pytest.param(
+                GridMark(player=Player.ONE, row=2, column=7),
+                CellOutsideGrid(error="CELL_OUTSIDE_GRID", row=2, column=7),
+                id="cell outside the grid",
+            ),
+        ],
+    )
+    def it_returns_an_error(mark, error):
+        grid = _play(CreateNewGridGameCommand(size=7, k=4)(), (0, 0), (6, 6))
+        assert AddGridMarkCommand(mark=mark)(grid) == error
+
+    def it_returns_an_error_when_the_game_is_over():
+        grid = _play(
+            CreateNewGridGameCommand(size=4, k=3)(),
+            (0, 0), (3, 0), (0, 1), (3, 1), (0, 2),
+        )  # fmt: skip
+        mark = GridMark(player=Player.TWO, row=3, column=2)
+        assert grid.add_mark(mark) == GameIsOver(error="GAME_IS_OVER")
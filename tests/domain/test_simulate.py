@@ -0,0 +1,93 @@
+import random
+from collections import Counter
+
+import pytest
+
+from tic_tac_toe.domain.data import (
+    AddMarkCommand,
+    Bitboard,
+    Cell,
+    CreateNewGameCommand,
+    GameOver,
+    Mark,
+    Player,
+)
+from tic_tac_toe.domain.stats import marks_counts, new_games_counts
+
+np = pytest.importorskip("numpy")
+
+from tic_tac_toe.domain.simulate import (  # noqa: E402
+    CELL_ALREADY_MARKED,
+    CELLS,
+    GAME_IS_OVER,
+    MARKED,
+    Simulation,
+    play,
+    play_random,
+)
+
+ERRORS = {
+    "GAME_IS_OVER": GAME_IS_OVER,
+    "CELL_ALREADY_MARKED": CELL_ALREADY_MARKED,
+}
+
+
+def describe_simulation():
+    def it_plays_as_add_mark_command():
+        # random cells, some already marked and some after the game is over
+        rng = random.Random(0)
+        script = [[rng.randrange(len(CELLS)) for _ in range(12)] for _ in range(500)]
+        simulation = Simulation(len(script))
+        games = [CreateNewGameCommand()() for _ in script]
+        for step in range(12):
+            cells = np.array([cells[step] for cells in script])
+            errors = simulation.add_marks(cells)
+            for index, game in enumerate(games):
+                player = Player.ONE if isinstance(game, GameOver) else game.next_player
+                mark = Mark(player=player, cell=CELLS[cells[index]])
+                result = AddMarkCommand(mark=mark)(game)
+                if hasattr(result, "error"):
+                    assert errors[index] == ERRORS[result.error]
+                else:
+                    assert errors[index] == MARKED
+                    games[index] = result
+        assert [simulation.game(index) for index in range(len(games))] == games
+        assert list(simulation.encode()) == [
+            Bitboard.from_game(game).encode() for game in games
+        ]
+
+    def it_counts_as_the_game_statistics():
+        simulation = play_random(1000, np.random.default_rng(0))
+        counts = Counter(new_games_counts(len(simulation)))
+        for index in range(len(simulation)):
+            game = simulation.game(index)
+            assert isinstance(game, GameOver)
+            opening = Mark(player=Player.ONE, cell=CELLS[simulation.openings[index]])
+            # marks_counts only needs the first mark and the length
+            marks = [opening] + [opening] * (len(game.marks) - 1)
+            counts.update(marks_counts(game, marks))
+        assert simulation.counts() == counts
+
+    def it_plays_scripts():
+        simulation = play(
+            np.array(
+                [
+                    # player one wins across the top row
+                    [0, 3, 1, 4, 2, 5, 6, 7, 8],
+                    # a draw
+                    [0, 1, 2, 4, 3, 5, 7, 6, 8],
+                ]
+            )
+        )
+        assert simulation.game(0).winner is Player.ONE
+        # the marks after the game is over are ignored
+        assert Cell.CENTER_RIGHT not in simulation.game(0).marks
+        assert simulation.counts()["wins_1"] == 1
+        assert simulation.counts()["draws"] == 1
+
+    def it_plays_random_games_until_they_are_over():
+        simulation = play_random(10_000, np.random.default_rng(0))
+        assert simulation.is_over()
+        counts = simulation.counts()
+        assert counts["games_over"] == 10_000
+        assert 5 <= counts["moves"] / 10_000 <= 9
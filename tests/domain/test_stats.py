@@ -0,0 +1,83 @@
+from dataclasses import replace
+
+from tests.fixtures import DRAW, PLAYER_ONE_NEED_TO_MOVE, PLAYER_TWO_WIN
+
+from tic_tac_toe.domain.data import AddMarkCommand, Cell, Mark, Player
+from tic_tac_toe.domain.stats import (
+    GameStats,
+    Opening,
+    compute_stats,
+    marks_counts,
+    new_games_counts,
+)
+
+
+def describe_marks_counts():
+    def test_first_mark_is_the_opening():
+        mark = Mark(player=Player.ONE, cell=Cell.CENTER_CENTER)
+        game = AddMarkCommand(mark=mark)(replace(PLAYER_ONE_NEED_TO_MOVE, marks={}))
+        assert marks_counts(game, [mark]) == {"opening_CENTER_CENTER": 1}
+
+    def test_first_of_several_marks_is_the_opening():
+        marks = [
+            Mark(player=Player.ONE, cell=Cell.TOP_LEFT),
+            Mark(player=Player.TWO, cell=Cell.CENTER_CENTER),
+        ]
+        game = replace(PLAYER_ONE_NEED_TO_MOVE, marks={})
+        for mark in marks:
+            game = AddMarkCommand(mark=mark)(game)
+        assert marks_counts(game, marks) == {"opening_TOP_LEFT": 1}
+
+    def test_later_marks_are_not_counted():
+        mark = Mark(player=Player.ONE, cell=Cell.CENTER_CENTER)
+        game = AddMarkCommand(mark=mark)(PLAYER_ONE_NEED_TO_MOVE)
+        assert marks_counts(game, [mark]) == {}
+
+    def test_win():
+        mark = Mark(player=Player.TWO, cell=Cell.BOTTOM_LEFT)
+        assert marks_counts(PLAYER_TWO_WIN, [mark]) == {
+            "games_over": 1,
+            "moves": 7,
+            "wins_2": 1,
+        }
+
+    def test_draw():
+        mark = Mark(player=Player.ONE, cell=Cell.BOTTOM_RIGHT)
+        assert marks_counts(DRAW, [mark]) == {"games_over": 1, "moves": 9, "draws": 1}
+
+
+def describe_compute_stats():
+    def test_no_game():
+        assert compute_stats({}) == GameStats(
+            games_started=0,
+            games_over=0,
+            player_one_win_rate=0,
+            player_two_win_rate=0,
+            draw_rate=0,
+            average_game_length=0,
+            openings=[],
+        )
+
+    def test_rates_are_over_games_that_are_over():
+        counts = {
+            **new_games_counts(10),
+            "games_over": 4,
+            "wins_1": 2,
+            "wins_2": 1,
+            "draws": 1,
+            "moves": 26,
+            "opening_TOP_LEFT": 1,
+            "opening_CENTER_CENTER": 5,
+        }
+        assert compute_stats(counts) == GameStats(
+            games_started=10,
+            games_over=4,
+            player_one_win_rate=0.5,
+            player_two_win_rate=0.25,
+            draw_rate=0.25,
+            average_game_length=6.5,
+            openings=[
+                Opening(cell=Cell.CENTER_CENTER, games=5),
+                Opening(cell=Cell.TOP_LEFT, games=1),
+            ],
+        )
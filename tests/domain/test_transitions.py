@@ -0,0 +1,29 @@
+import pytest
+from tests.fixtures import PLAYER_TWO_NEED_TO_START
+
+from tic_tac_toe.domain.data import AddMarkCommand, Bitboard, Cell, Mark, Player
+from tic_tac_toe.domain.transitions import TransitionTable
+
+MARKS = [Mark(player=player, cell=cell) for player in Player for cell in Cell]
+
+
+@pytest.fixture(scope="module")
+def transition_table():
+    return TransitionTable.build()
+
+
+def describe_transition_table():
+    def test_contains_every_reachable_position(transition_table):
+        assert len(transition_table) == 5478
+
+    def test_matches_add_mark_command_exhaustively(transition_table):
+        for key in transition_table.transitions:
+            game = Bitboard.decode(key).to_game()
+            for mark in MARKS:
+                expected = AddMarkCommand(mark=mark)(game)
+                assert transition_table.add_mark(game, mark) == expected
+
+    def test_unreachable_position_falls_back_to_add_mark_command(transition_table):
+        mark = Mark(player=Player.TWO, cell=Cell.CENTER_CENTER)
+        expected = AddMarkCommand(mark=mark)(PLAYER_TWO_NEED_TO_START)
+        assert transition_table.add_mark(PLAYER_TWO_NEED_TO_START, mark) == expected
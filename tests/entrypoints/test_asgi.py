@@ -1,7 +1,9 @@
+import json
 import os
 from typing import Callable, Mapping, Optional
 from uuid import uuid4
 
+import psycopg
 import pytest
 from fastapi.encoders import jsonable_encoder
 from fastapi.testclient import TestClient
@@ -12,13 +14,29 @@ from tests.fixtures import (
     PLAYER_TWO_WIN,
 )
 
+from tic_tac_toe.adapters.profiling import ProfilingConfig, StackSampler
+from tic_tac_toe.adapters.repository.grid import PostgresGridGameRepository
 from tic_tac_toe.adapters.repository.postgres import (
     PostgresGameRepository,
     PostgresGameRepositoryConfig,
+    PostgresMoveLogConfig,
+    PostgresMoveLogGameRepository,
 )
-from tic_tac_toe.domain.application import Application
+from tic_tac_toe.adapters.stats import InMemoryGameStatistics
+from tic_tac_toe.adapters.updates import InMemoryGameUpdates
+from tic_tac_toe.domain.application import Application, GameStatistics, GameUpdates
 from tic_tac_toe.domain.data import Cell, Game, GameOngoing, Player
-from tic_tac_toe.entrypoints.asgi import create_asgi_app
+from tic_tac_toe.domain.transitions import TransitionTable
+from tic_tac_toe.entrypoints.asgi import (
+    ENCODE_SECONDS,
+    REQUEST_SECONDS,
+    create_asgi_app,
+)
+
+
+@pytest.fixture(scope="module")
+def transition_table():
+    return TransitionTable.build()
 
 
 @pytest.fixture
@@ -26,14 +44,27 @@ def make_client():
     async def build(
         games: Optional[Mapping[str, Game]] = None,
         generate_game_id: Optional[Callable[[], str]] = None,
+        transition_table: Optional[TransitionTable] = None,
+        updates: Optional[GameUpdates] = None,
+        move_log: bool = False,
+        statistics: Optional[GameStatistics] = None,
+        metrics: bool = False,
+        profiler: Optional[StackSampler] = None,
+        grids: bool = False,
     ):
         games = games or {}
         generate_game_id = generate_game_id or (lambda: uuid4().hex)
 
-        repository = PostgresGameRepository(
-            config=PostgresGameRepositoryConfig(
-                db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+        config = PostgresGameRepositoryConfig(
+            db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            metrics=metrics,
+        )
+        repository = (
+            PostgresMoveLogGameRepository(
+                config=config, move_log=PostgresMoveLogConfig(snapshot_interval=4)
             )
+            if move_log
+            else PostgresGameRepository(config=config)
         )
         for game_id, game in games.items():
             await repository.insert(game_id=game_id, game=game)
@@ -41,8 +72,20 @@ def make_client():
         application = Application(
             repository=repository,
             generate_game_id=generate_game_id,
+            transition_table=transition_table,
+            updates=updates,
+            history=repository if move_log else None,
+            listing=repository,
+            statistics=statistics,
+            grids=PostgresGridGameRepository(repository=repository) if grids else None,
+        )
+        asgi_app = create_asgi_app(
+            application=application,
+            on_startup=[] if profiler is None else [profiler.open],
+            on_shutdown=[] if profiler is None else [profiler.close],
+            metrics=metrics,
+            profiler=profiler,
         )
-        asgi_app = create_asgi_app(application=application)
         return TestClient(asgi_app)
 
     return build
@@ -285,10 +328,27 @@ def describe_add_mark():
             ),
         ],
     )
-    async def test_success(game, body, expected_state, make_client):
+    @pytest.mark.parametrize(
+        "use_transition_table",
+        [
+            pytest.param(False, id="add mark command"),
+            pytest.param(True, id="transition table"),
+        ],
+    )
+    async def test_success(
+        game,
+        body,
+        expected_state,
+        use_transition_table,
+        transition_table,
+        make_client,
+    ):
         game_id = uuid4().hex
         expected = {"id": game_id, "state": expected_state}
-        client = await make_client(games={game_id: game})
+        client = await make_client(
+            games={game_id: game},
+            transition_table=transition_table if use_transition_table else None,
+        )
         response = client.post(f"/games/{game_id}/mark", json=body)
         assert response.status_code == 200
         assert response.json() == expected
@@ -296,3 +356,689 @@ def describe_add_mark():
         get_game_response = client.get(f"/games/{game_id}")
         assert get_game_response.status_code == 200
         assert get_game_response.json() == expected
+
+
+def describe_lifecycle():
+    def test_hooks_run_on_startup_and_shutdown():
+        events = []
+
+        async def on_startup():
+            events.append("startup")
+
+        async def on_shutdown():
+            events.append("shutdown")
+
+        repository = PostgresGameRepository(
+            config=PostgresGameRepositoryConfig(
+                db_uri=os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI"),
+            )
+        )
+        application = Application(
+            repository=repository,
+            generate_game_id=lambda: uuid4().hex,
+        )
+        asgi_app = create_asgi_app(
+            application=application,
+            on_startup=[on_startup],
+            on_shutdown=[on_shutdown],
+        )
+        with TestClient(asgi_app):
+            assert events == ["startup"]
+        assert events == ["startup", "shutdown"]
+
+
+def describe_add_marks():
+    async def test_all_marks_are_added(make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: PLAYER_ONE_NEED_TO_START})
+        body = [
+            {"player": Player.ONE.value, "cell": Cell.CENTER_CENTER.value},
+            {"player": Player.TWO.value, "cell": Cell.TOP_CENTER.value},
+            {"player": Player.ONE.value, "cell": Cell.TOP_LEFT.value},
+            {"player": Player.TWO.value, "cell": Cell.BOTTOM_RIGHT.value},
+            {"player": Player.ONE.value, "cell": Cell.BOTTOM_LEFT.value},
+            {"player": Player.TWO.value, "cell": Cell.TOP_RIGHT.value},
+            {"player": Player.ONE.value, "cell": Cell.CENTER_LEFT.value},
+        ]
+        expected_state = {
+            "status": "OVER",
+            "winner": Player.ONE.value,
+            "marks": {mark["cell"]: mark["player"] for mark in body},
+        }
+        response = client.post(f"/games/{game_id}/marks", json=body)
+        assert response.status_code == 200
+        assert response.json() == {
+            "id": game_id,
+            "state": expected_state,
+            "applied": len(body),
+            "error": None,
+        }
+
+        get_game_response = client.get(f"/games/{game_id}")
+        assert get_game_response.json() == {"id": game_id, "state": expected_state}
+
+    async def test_marks_are_added_until_first_error(make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: PLAYER_ONE_NEED_TO_START})
+        body = [
+            {"player": Player.ONE.value, "cell": Cell.CENTER_CENTER.value},
+            {"player": Player.TWO.value, "cell": Cell.CENTER_CENTER.value},
+            {"player": Player.TWO.value, "cell": Cell.TOP_LEFT.value},
+        ]
+        expected_state = {
+            "status": "ONGOING",
+            "next_player": Player.TWO.value,
+            "marks": {Cell.CENTER_CENTER.value: Player.ONE.value},
+        }
+        response = client.post(f"/games/{game_id}/marks", json=body)
+        assert response.status_code == 200
+        assert response.json() == {
+            "id": game_id,
+            "state": expected_state,
+            "applied": 1,
+            "error": {
+                "error": "CELL_ALREADY_MARKED",
+                "cell": Cell.CENTER_CENTER.value,
+            },
+        }
+
+        get_game_response = client.get(f"/games/{game_id}")
+        assert get_game_response.json() == {"id": game_id, "state": expected_state}
+
+    async def test_no_mark_is_added(make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: DRAW})
+        body = [{"player": Player.ONE.value, "cell": Cell.CENTER_CENTER.value}]
+        response = client.post(f"/games/{game_id}/marks", json=body)
+        assert response.status_code == 200
+        assert response.json() == {
+            "id": game_id,
+            "state": jsonable_encoder(DRAW),
+            "applied": 0,
+            "error": {"error": "GAME_IS_OVER"},
+        }
+
+    async def test_game_not_found(make_client):
+        client = await make_client(games={})
+        body = [{"player": Player.ONE.value, "cell": Cell.CENTER_CENTER.value}]
+        response = client.post("/games/i-dont-exist/marks", json=body)
+        assert response.status_code == 404
+        assert response.json() == {"error": "GAME_NOT_FOUND"}
+
+    @pytest.mark.parametrize(
+        "size",
+        [pytest.param(0, id="no marks"), pytest.param(10, id="more marks than cells")],
+    )
+    async def test_invalid_number_of_marks(size, make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: PLAYER_ONE_NEED_TO_START})
+        body = [{"player": Player.ONE.value, "cell": Cell.CENTER_CENTER.value}] * size
+        response = client.post(f"/games/{game_id}/marks", json=body)
+        assert response.status_code == 422
+
+
+def describe_new_games():
+    async def test_created_games_are_returned_and_persisted(make_client):
+        game_ids = iter([uuid4().hex for _ in range(3)])
+        client = await make_client(generate_game_id=lambda: next(game_ids))
+        response = client.post("/games:batch", params={"count": 3})
+        assert response.status_code == 201
+
+        games = response.json()
+        assert len({game["id"] for game in games}) == 3
+        for game in games:
+            assert game["state"] == {
+                "status": "ONGOING",
+                "next_player": Player.ONE.value,
+                "marks": {},
+            }
+            get_response = client.get(f"/games/{game['id']}")
+            assert get_response.status_code == 200
+            assert get_response.json() == game
+
+    @pytest.mark.parametrize("count", [0, 10_001])
+    async def test_invalid_count(count, make_client):
+        client = await make_client()
+        response = client.post("/games:batch", params={"count": count})
+        assert response.status_code == 422
+
+
+def describe_play_ai_move():
+    async def test_winning_move_is_played(make_client):
+        game_id = uuid4().hex
+        game = GameOngoing(
+            status="ONGOING",
+            next_player=Player.TWO,
+            marks={
+                Cell.TOP_LEFT: Player.TWO,
+                Cell.TOP_CENTER: Player.TWO,
+                Cell.CENTER_CENTER: Player.ONE,
+                Cell.BOTTOM_LEFT: Player.ONE,
+                Cell.BOTTOM_CENTER: Player.ONE,
+            },
+        )
+        client = await make_client(games={game_id: game})
+        response = client.post(f"/games/{game_id}/ai-move")
+        assert response.status_code == 200
+        assert response.json() == {
+            "id": game_id,
+            "state": {
+                "status": "OVER",
+                "winner": Player.TWO.value,
+                "marks": {
+                    **jsonable_encoder(game.marks),
+                    Cell.TOP_RIGHT.value: Player.TWO.value,
+                },
+            },
+        }
+        assert client.get(f"/games/{game_id}").json() == response.json()
+
+    @pytest.mark.parametrize("difficulty", ["EASY", "MEDIUM", "HARD"])
+    async def test_a_cell_is_marked(difficulty, make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: PLAYER_ONE_NEED_TO_MOVE})
+        response = client.post(
+            f"/games/{game_id}/ai-move", params={"difficulty": difficulty}
+        )
+        assert response.status_code == 200
+        state = response.json()["state"]
+        assert state["next_player"] == Player.TWO.value
+        assert len(state["marks"]) == len(PLAYER_ONE_NEED_TO_MOVE.marks) + 1
+
+    async def test_game_is_over(make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: DRAW})
+        response = client.post(f"/games/{game_id}/ai-move")
+        assert response.status_code == 400
+        assert response.json() == {"error": "GAME_IS_OVER"}
+
+    async def test_game_not_found(make_client):
+        client = await make_client(games={})
+        response = client.post("/games/i-dont-exist/ai-move")
+        assert response.status_code == 404
+        assert response.json() == {"error": "GAME_NOT_FOUND"}
+
+    async def test_invalid_difficulty(make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: PLAYER_ONE_NEED_TO_START})
+        response = client.post(
+            f"/games/{game_id}/ai-move", params={"difficulty": "IMPOSSIBLE"}
+        )
+        assert response.status_code == 422
+
+
+def describe_game_updates():
+    def _mark(player, cell):
+        return {"player": player.value, "cell": cell.value}
+
+    async def test_websocket_pushes_game_after_every_move(make_client):
+        game_id = uuid4().hex
+        client = await make_client(
+            games={game_id: PLAYER_ONE_NEED_TO_START},
+            updates=InMemoryGameUpdates(),
+        )
+        # a single event loop for the websocket and the requests
+        with client, client.websocket_connect(f"/games/{game_id}/updates") as ws:
+            assert ws.receive_json() == {
+                "id": game_id,
+                "state": jsonable_encoder(PLAYER_ONE_NEED_TO_START),
+            }
+
+            response = client.post(
+                f"/games/{game_id}/mark", json=_mark(Player.ONE, Cell.CENTER_CENTER)
+            )
+            assert ws.receive_json() == response.json()
+
+            response = client.post(
+                f"/games/{game_id}/marks",
+                json=[
+                    _mark(Player.TWO, Cell.TOP_LEFT),
+                    _mark(Player.ONE, Cell.TOP_CENTER),
+                ],
+            )
+            assert ws.receive_json()["state"] == response.json()["state"]
+
+            response = client.post(f"/games/{game_id}/ai-move")
+            assert ws.receive_json() == response.json()
+
+    async def test_websocket_is_closed_when_game_is_over(make_client):
+        game_id = uuid4().hex
+        game = GameOngoing(
+            status="ONGOING",
+            next_player=Player.ONE,
+            marks={Cell.TOP_LEFT: Player.ONE, Cell.TOP_CENTER: Player.ONE},
+        )
+        client = await make_client(games={game_id: game}, updates=InMemoryGameUpdates())
+        with client, client.websocket_connect(f"/games/{game_id}/updates") as ws:
+            ws.receive_json()
+            response = client.post(
+                f"/games/{game_id}/mark", json=_mark(Player.ONE, Cell.TOP_RIGHT)
+            )
+            assert ws.receive_json()["state"]["status"] == "OVER"
+            assert ws.receive()["type"] == "websocket.close"
+            assert response.status_code == 200
+
+    async def test_websocket_game_not_found(make_client):
+        client = await make_client(updates=InMemoryGameUpdates())
+        with client, client.websocket_connect("/games/i-dont-exist/updates") as ws:
+            assert ws.receive_json() == {"error": "GAME_NOT_FOUND"}
+            assert ws.receive()["type"] == "websocket.close"
+
+    async def test_server_sent_events(make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: DRAW}, updates=InMemoryGameUpdates())
+        response = client.get(f"/games/{game_id}/updates")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        # a single event: the game is already over
+        event, end = response.text.split("\n\n")
+        assert end == ""
+        assert event.startswith("data: ")
+        assert json.loads(event.removeprefix("data: ")) == {
+            "id": game_id,
+            "state": jsonable_encoder(DRAW),
+        }
+
+    async def test_server_sent_events_game_not_found(make_client):
+        client = await make_client(updates=InMemoryGameUpdates())
+        response = client.get("/games/i-dont-exist/updates")
+        assert response.status_code == 404
+        assert response.json() == {"error": "GAME_NOT_FOUND"}
+
+    async def test_not_available_without_updates(make_client):
+        client = await make_client()
+        response = client.get("/games/i-dont-exist/updates")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Not Found"}
+
+
+def describe_game_history():
+    MOVES = [
+        {"player": Player.ONE.value, "cell": Cell.CENTER_CENTER.value},
+        {"player": Player.TWO.value, "cell": Cell.TOP_LEFT.value},
+        {"player": Player.ONE.value, "cell": Cell.TOP_RIGHT.value},
+        {"player": Player.TWO.value, "cell": Cell.BOTTOM_LEFT.value},
+        {"player": Player.ONE.value, "cell": Cell.CENTER_LEFT.value},
+        {"player": Player.TWO.value, "cell": Cell.CENTER_RIGHT.value},
+    ]
+
+    async def _play(client):
+        game_id = client.post("/games").json()["id"]
+        client.post(f"/games/{game_id}/marks", json=MOVES[:4])
+        for move in MOVES[4:]:
+            client.post(f"/games/{game_id}/mark", json=move)
+        return game_id
+
+    async def test_moves_are_streamed_in_playing_order(make_client):
+        client = await make_client(move_log=True)
+        game_id = await _play(client)
+        response = client.get(f"/games/{game_id}/moves")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.split("\n")
+        assert lines.pop() == ""
+        assert [json.loads(line) for line in lines] == MOVES
+
+    async def test_marks_of_a_request_are_recorded_in_the_order_sent(make_client):
+        client = await make_client(move_log=True)
+        game_id = client.post("/games").json()["id"]
+        # not in board order, the winning mark is not the last one of the board
+        marks = [
+            {"player": Player.ONE.value, "cell": Cell.BOTTOM_RIGHT.value},
+            {"player": Player.TWO.value, "cell": Cell.CENTER_CENTER.value},
+            {"player": Player.ONE.value, "cell": Cell.TOP_RIGHT.value},
+            {"player": Player.TWO.value, "cell": Cell.TOP_LEFT.value},
+            {"player": Player.ONE.value, "cell": Cell.CENTER_RIGHT.value},
+        ]
+        response = client.post(f"/games/{game_id}/marks", json=marks)
+        assert response.json()["state"]["winner"] == Player.ONE.value
+        response = client.get(f"/games/{game_id}/moves")
+        assert [json.loads(line) for line in response.text.splitlines()] == marks
+
+    async def test_new_game_has_no_moves(make_client):
+        client = await make_client(move_log=True)
+        game_id = client.post("/games").json()["id"]
+        response = client.get(f"/games/{game_id}/moves")
+        assert response.status_code == 200
+        assert response.text == ""
+
+    async def test_moves_game_not_found(make_client):
+        client = await make_client(move_log=True)
+        response = client.get("/games/i-dont-exist/moves")
+        assert response.status_code == 404
+        assert response.json() == {"error": "GAME_NOT_FOUND"}
+
+    async def test_moves_played_before_the_move_log(make_client):
+        game_id = uuid4().hex
+        client = await make_client(
+            games={game_id: PLAYER_ONE_NEED_TO_MOVE}, move_log=True
+        )
+        response = client.get(f"/games/{game_id}/moves")
+        assert response.status_code == 404
+        assert response.json() == {"error": "GAME_HISTORY_NOT_FOUND"}
+
+    async def test_game_at_every_move(make_client):
+        client = await make_client(move_log=True)
+        game_id = await _play(client)
+        replay = client.post("/games").json()["id"]
+        for number in range(len(MOVES) + 1):
+            response = client.get(f"/games/{game_id}/at/{number}")
+            assert response.status_code == 200
+            assert response.json() == client.get(f"/games/{replay}").json() | {
+                "id": game_id
+            }
+            if number < len(MOVES):
+                client.post(f"/games/{replay}/mark", json=MOVES[number])
+
+    async def test_replayed_games_are_cached(make_client):
+        client = await make_client(move_log=True)
+        game_id = await _play(client)
+        expected = client.get(f"/games/{game_id}/at/{len(MOVES)}").json()
+        intermediate = client.get(f"/games/{game_id}/at/2").json()
+
+        # moves are read again only past the games already replayed
+        db_uri = os.environ.get("TEST_POSTGRES_REPOSITORY_DB_URI")
+        with psycopg.connect(db_uri) as conn:
+            conn.execute("DELETE FROM game_move WHERE game_id = %s", [game_id])
+        assert client.get(f"/games/{game_id}/at/{len(MOVES)}").json() == expected
+        assert client.get(f"/games/{game_id}/at/2").json() == intermediate
+
+    async def test_game_at_move_not_played(make_client):
+        client = await make_client(move_log=True)
+        game_id = await _play(client)
+        response = client.get(f"/games/{game_id}/at/{len(MOVES) + 1}")
+        assert response.status_code == 404
+        assert response.json() == {"error": "MOVE_NOT_FOUND"}
+
+    async def test_game_at_game_not_found(make_client):
+        client = await make_client(move_log=True)
+        response = client.get("/games/i-dont-exist/at/0")
+        assert response.status_code == 404
+        assert response.json() == {"error": "GAME_NOT_FOUND"}
+
+    async def test_not_available_without_move_log(make_client):
+        client = await make_client()
+        response = client.get("/games/i-dont-exist/moves")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Not Found"}
+
+
+def describe_list_games():
+    async def test_games_are_listed_page_by_page(make_client):
+        client = await make_client()
+        first = client.post("/games").json()["id"]
+        (newest,) = client.get(
+            "/games", params={"order": "created_at", "limit": 1}
+        ).json()["games"]
+        assert newest["id"] == first
+        created = {first} | {client.post("/games").json()["id"] for _ in range(4)}
+
+        listed, cursor = [], None
+        while True:
+            params = {
+                "order": "created_at",
+                "limit": 2,
+                "created_after": newest["created_at"],
+            }
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = client.get("/games", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            listed += page["games"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert {game["id"] for game in listed} == created
+        assert [game["created_at"] for game in listed] == sorted(
+            (game["created_at"] for game in listed), reverse=True
+        )
+
+    async def test_games_are_filtered(make_client):
+        game_id = uuid4().hex
+        client = await make_client(games={game_id: PLAYER_TWO_WIN})
+        response = client.get(
+            "/games", params={"status": "OVER", "winner": 2, "limit": 1}
+        )
+        assert response.status_code == 200
+        (game,) = response.json()["games"]
+        assert game["id"] == game_id
+        assert game["state"] == jsonable_encoder(PLAYER_TWO_WIN)
+
+    async def test_invalid_cursor(make_client):
+        client = await make_client()
+        response = client.get("/games", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        assert response.json() == {"error": "INVALID_CURSOR"}
+
+    @pytest.mark.parametrize(
+        "params",
+        [{"limit": 0}, {"limit": 1001}, {"status": "LOST"}, {"order": "updated_at"}],
+    )
+    async def test_invalid_parameters(make_client, params):
+        client = await make_client()
+        response = client.get("/games", params=params)
+        assert response.status_code == 422
+
+
+def describe_stats():
+    async def test_games_are_counted(make_client):
+        client = await make_client(statistics=InMemoryGameStatistics())
+        client.post("/games:batch", params={"count": 2})
+        game_id = client.post("/games").json()["id"]
+        # player one wins on the diagonal, the ai plays the last move
+        client.post(
+            f"/games/{game_id}/marks",
+            json=[
+                {"player": Player.ONE.value, "cell": Cell.CENTER_CENTER.value},
+                {"player": Player.TWO.value, "cell": Cell.TOP_CENTER.value},
+                {"player": Player.ONE.value, "cell": Cell.TOP_LEFT.value},
+                {"player": Player.TWO.value, "cell": Cell.TOP_RIGHT.value},
+            ],
+        )
+        client.post(f"/games/{game_id}/ai-move")
+
+        response = client.get("/stats")
+        assert response.status_code == 200
+        assert response.json() == {
+            "games_started": 3,
+            "games_over": 1,
+            "player_one_win_rate": 1.0,
+            "player_two_win_rate": 0.0,
+            "draw_rate": 0.0,
+            "average_game_length": 5.0,
+            "openings": [{"cell": Cell.CENTER_CENTER.value, "games": 1}],
+        }
+
+    async def test_not_available_without_statistics(make_client):
+        client = await make_client()
+        response = client.get("/stats")
+        assert response.status_code == 404
+
+
+def describe_grid_games():
+    async def test_tic_tac_toe_is_the_default(make_client):
+        game_id = uuid4().hex
+        client = await make_client(grids=True, generate_game_id=lambda: game_id)
+        response = client.post("/grid-games")
+        assert response.status_code == 201
+        assert response.json() == {
+            "id": game_id,
+            "state": {
+                "size": 3,
+                "k": 3,
+                "status": "ONGOING",
+                "next_player": Player.ONE.value,
+                "marks": [],
+            },
+        }
+
+    async def test_game_is_played_and_read(make_client):
+        client = await make_client(grids=True)
+        game_id = client.post("/grid-games", json={"size": 15, "k": 5}).json()["id"]
+        marks = [
+            {"player": Player.ONE.value, "row": 7, "column": column}
+            if index % 2 == 0
+            else {"player": Player.TWO.value, "row": 0, "column": column}
+            for column in range(5)
+            for index in range(2)
+        ][:-1]
+        for mark in marks:
+            response = client.post(f"/grid-games/{game_id}/mark", json=mark)
+            assert response.status_code == 200
+
+        response = client.get(f"/grid-games/{game_id}")
+        assert response.status_code == 200
+        # row by row
+        assert response.json()["state"] == {
+            "size": 15,
+            "k": 5,
+            "status": "OVER",
+            "winner": Player.ONE.value,
+            "marks": marks[1::2] + marks[::2],
+        }
+
+    @pytest.mark.parametrize(
+        "body, expected",
+        [
+            pytest.param(
+                {"player": Player.ONE.value, "row": 4, "column": 0},
+                {"error": "CELL_OUTSIDE_GRID", "row": 4, "column": 0},
+                id="cell outside the grid",
+            ),
+            pytest.param(
+                {"player": Player.TWO.value, "row": 0, "column": 0},
+                {"error": "PLAYER_CANT_MOVE", "player": Player.TWO.value},
+                id="player is not expected to move",
+            ),
+        ],
+    )
+    async def test_domain_error(make_client, body, expected):
+        client = await make_client(grids=True)
+        game_id = client.post("/grid-games", json={"size": 4, "k": 3}).json()["id"]
+        response = client.post(f"/grid-games/{game_id}/mark", json=body)
+        assert response.status_code == 400
+        assert response.json() == expected
+
+    async def test_cell_already_marked(make_client):
+        client = await make_client(grids=True)
+        game_id = client.post("/grid-games").json()["id"]
+        client.post(
+            f"/grid-games/{game_id}/mark",
+            json={"player": Player.ONE.value, "row": 1, "column": 2},
+        )
+        response = client.post(
+            f"/grid-games/{game_id}/mark",
+            json={"player": Player.TWO.value, "row": 1, "column": 2},
+        )
+        assert response.status_code == 400
+        assert response.json() == {
+            "error": "CELL_ALREADY_MARKED",
+            "row": 1,
+            "column": 2,
+        }
+
+    async def test_game_not_found(make_client):
+        client = await make_client(grids=True)
+        assert client.get("/grid-games/missing").status_code == 404
+        response = client.post(
+            "/grid-games/missing/mark",
+            json={"player": Player.ONE.value, "row": 0, "column": 0},
+        )
+        assert response.status_code == 404
+        assert response.json() == {"error": "GAME_NOT_FOUND"}
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"size": 0},
+            {"size": 26},
+            {"size": 4, "k": 5},
+            {"k": 0},
+            {"size": 25, "k": 7},
+        ],
+    )
+    async def test_invalid_grid(make_client, body):
+        client = await make_client(grids=True)
+        response = client.post("/grid-games", json=body)
+        assert response.status_code == 422
+
+    async def test_not_available_without_grids(make_client):
+        client = await make_client()
+        response = client.post("/grid-games")
+        assert response.status_code == 404
+
+
+def describe_metrics():
+    async def test_requests_are_counted_by_route_and_status(make_client):
+        client = await make_client(metrics=True)
+        created = REQUEST_SECONDS.count("POST", "/games", "201")
+        found = REQUEST_SECONDS.count("GET", "/games/{game_id}", "200")
+        not_found = REQUEST_SECONDS.count("GET", "/games/{game_id}", "404")
+        unmatched = REQUEST_SECONDS.count("GET", "<unmatched>", "404")
+
+        game_id = client.post("/games").json()["id"]
+        client.get(f"/games/{game_id}")
+        client.get(f"/games/{game_id}")
+        client.get("/games/missing")
+        client.get("/missing")
+
+        assert REQUEST_SECONDS.count("POST", "/games", "201") == created + 1
+        assert REQUEST_SECONDS.count("GET", "/games/{game_id}", "200") == found + 2
+        assert REQUEST_SECONDS.count("GET", "/games/{game_id}", "404") == not_found + 1
+        assert REQUEST_SECONDS.count("GET", "<unmatched>", "404") == unmatched + 1
+
+    async def test_metrics_are_exposed_in_prometheus_format(make_client):
+        client = await make_client(metrics=True)
+        client.post("/games")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = response.text.splitlines()
+        assert "# TYPE http_request_seconds histogram" in lines
+        assert any(
+            line.startswith(
+                'http_request_seconds_count{method="POST",route="/games",status="201"}'
+            )
+            for line in lines
+        )
+        for name in (
+            "http_response_encode_seconds",
+            "postgres_connection_wait_seconds",
+            "postgres_query_seconds",
+        ):
+            assert f"# TYPE {name} histogram" in lines
+
+    async def test_not_available_without_metrics(make_client):
+        client = await make_client()
+        response = client.get("/metrics")
+        assert response.status_code == 404
+
+    async def test_responses_are_not_timed_without_metrics(make_client):
+        client = await make_client()
+        encoded = ENCODE_SECONDS.count()
+        client.post("/games")
+        assert ENCODE_SECONDS.count() == encoded
+
+
+def describe_profiling():
+    async def test_requests_with_the_header_are_profiled(make_client, tmp_path):
+        profiler = StackSampler(
+            ProfilingConfig(
+                sample_rate=0.0,
+                min_interval=0.001,
+                output=str(tmp_path / "profile.folded"),
+            )
+        )
+        client = await make_client(profiler=profiler)
+        with client:
+            game_id = client.post("/games").json()["id"]
+            not_profiled = profiler.last_started_at
+            response = client.post(
+                f"/games/{game_id}/mark",
+                json={"player": Player.ONE.value, "cell": Cell.TOP_LEFT.value},
+                headers={"x-profile": "1"},
+            )
+            assert response.status_code == 200
+            assert profiler.last_started_at > not_profiled
+            assert profiler.in_flight == 0
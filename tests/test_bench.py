@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+
+import pytest
+
+from tic_tac_toe.bench import (
+    ASGITransport,
+    HTTPTransport,
+    create_app,
+    parse_mix,
+    percentile,
+    run,
+)
+
+
+def describe_run():
+    @pytest.mark.parametrize("scenario", ["win", "draw", "error"])
+    async def test_scenarios_get_expected_responses(scenario):
+        app = create_app("memory")
+        reports = await run(
+            make_transport=lambda: ASGITransport(app=app),
+            concurrency=2,
+            duration=0.1,
+            mix={scenario: 1},
+            seed=0,
+        )
+        by_endpoint = {report.endpoint: report for report in reports}
+        assert set(by_endpoint) == {
+            "POST /games",
+            "POST /games/{id}/mark",
+            "GET /games/{id}",
+            "total",
+        }
+        assert by_endpoint["total"].requests == sum(
+            report.requests for report in reports if report.endpoint != "total"
+        )
+        assert all(report.unexpected == 0 for report in reports)
+
+    async def test_scenarios_with_no_weight_are_not_played():
+        app = create_app("memory")
+        reports = await run(
+            make_transport=lambda: ASGITransport(app=app),
+            concurrency=1,
+            duration=0.1,
+            mix={"win": 1, "error": 0},
+        )
+        by_endpoint = {report.endpoint: report for report in reports}
+        # a win takes 7 marks and a get for every new game
+        assert by_endpoint["POST /games/{id}/mark"].requests == (
+            7 * by_endpoint["POST /games"].requests
+        )
+
+
+def describe_http_transport():
+    async def test_connection_is_reused():
+        connections = 0
+
+        async def handle(reader, writer):
+            nonlocal connections
+            connections += 1
+            while await reader.readuntil(b"\r\n\r\n"):
+                await reader.readexactly(len('{"a":1}'))
+                writer.write(b"HTTP/1.1 201 Created\r\ncontent-length: 2\r\n\r\n{}")
+                await writer.drain()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        transport = HTTPTransport(host="127.0.0.1", port=port)
+        try:
+            for _ in range(3):
+                assert await transport.request("POST", "/", b'{"a":1}') == (201, b"{}")
+        finally:
+            await transport.close()
+            server.close()
+        assert connections == 1
+
+
+def describe_percentile():
+    def test_nearest_rank():
+        values = [float(value) for value in range(1, 101)]
+        assert percentile(values, 0.5) == 50.0
+        assert percentile(values, 0.99) == 99.0
+        assert percentile([3.0], 0.99) == 3.0
+
+
+def describe_parse_mix():
+    def test_weights_default_to_one():
+        assert parse_mix("win,draw=2") == {"win": 1.0, "draw": 2.0}
+
+    @pytest.mark.parametrize("value", ["lose=1", "win=x", "win=-1", "win=0"])
+    def test_invalid_mix_is_rejected(value):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_mix(value)
@@ -0,0 +1,130 @@
+import os
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import psycopg
+import pytest
+from tests.fixtures import DRAW, PLAYER_ONE_NEED_TO_MOVE
+
+from tic_tac_toe import __main__
+from tic_tac_toe.__main__ import asgi, generate_game_id, main, self_check
+from tic_tac_toe.adapters.repository.memory import InMemoryGameRepository
+from tic_tac_toe.adapters.serialization import dumps
+from tic_tac_toe.domain.ai import SolvedGameTable
+from tic_tac_toe.domain.application import Application, ListedGame
+from tic_tac_toe.domain.data import CreateNewGameCommand
+
+
+def describe_self_check():
+    async def test_passes_with_a_working_application():
+        repository = InMemoryGameRepository()
+        application = Application(
+            repository=repository, generate_game_id=generate_game_id
+        )
+        await self_check(application, repository)
+        # nothing is written
+        assert repository.games == {}
+
+    async def test_fails_when_the_database_returns_a_game_for_a_new_id():
+        class _AnyGameRepository(InMemoryGameRepository):
+            async def get(self, game_id):
+                return CreateNewGameCommand()()
+
+        repository = _AnyGameRepository()
+        application = Application(
+            repository=repository, generate_game_id=generate_game_id
+        )
+        with pytest.raises(RuntimeError, match="self check"):
+            await self_check(application, repository)
+
+
+def describe_asgi():
+    def test_ai_table_is_built_once_per_process(monkeypatch):
+        # never connected to
+        monkeypatch.setenv("POSTGRES_REPOSITORY_DB_URI", "postgresql://user:pass@db/db")
+        builds = []
+
+        def build():
+            builds.append(1)
+            return SolvedGameTable()
+
+        monkeypatch.setattr(SolvedGameTable, "build", build)
+        __main__.solved_game_table.cache_clear()
+        try:
+            asgi()
+            asgi()
+        finally:
+            __main__.solved_game_table.cache_clear()
+        assert len(builds) == 1
+
+    def test_ai_moves_are_reseeded_in_forked_workers():
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write, repr(__main__.RNG.random()).encode())
+            os._exit(0)
+        os.close(write)
+        os.waitpid(pid, 0)
+        with os.fdopen(read) as child:
+            assert float(child.read()) != __main__.RNG.random()
+
+
+def describe_import_games():
+    @pytest.fixture
+    def server_env(monkeypatch):
+        # as the server runs: with a pool
+        monkeypatch.setenv(
+            "POSTGRES_REPOSITORY_DB_URI", os.environ["TEST_POSTGRES_REPOSITORY_DB_URI"]
+        )
+        monkeypatch.setenv("POSTGRES_REPOSITORY_POOL", "1")
+        monkeypatch.setenv("POSTGRES_REPOSITORY_POOL_MIN_SIZE", "1")
+
+    def _write_games(path, games):
+        # before the games the listing tests create
+        at = datetime(2001, 1, 1, tzinfo=timezone.utc)
+        path.write_bytes(
+            b"".join(
+                dumps(ListedGame(id=game_id, state=game, created_at=at, finished_at=at))
+                + b"\n"
+                for game_id, game in games
+            )
+        )
+
+    def test_games_are_imported(server_env, tmp_path, capsys):
+        game_ids = [uuid4().hex, uuid4().hex]
+        _write_games(tmp_path / "games", [(game_id, DRAW) for game_id in game_ids])
+
+        main(["import-games", "--input", str(tmp_path / "games")])
+
+        assert capsys.readouterr().err == "2 games imported\n"
+        with psycopg.connect(os.environ["TEST_POSTGRES_REPOSITORY_DB_URI"]) as conn:
+            (count,) = conn.execute(
+                "SELECT count(*) FROM game WHERE id = ANY(%s)", [game_ids]
+            ).fetchone()
+        assert count == 2
+
+    def test_game_already_stored_is_reported(server_env, tmp_path):
+        stored = uuid4().hex
+        _write_games(tmp_path / "stored", [(stored, DRAW)])
+        main(["import-games", "--input", str(tmp_path / "stored")])
+        _write_games(
+            tmp_path / "games",
+            [
+                (uuid4().hex, PLAYER_ONE_NEED_TO_MOVE),
+                (uuid4().hex, DRAW),
+                (stored, DRAW),
+            ],
+        )
+
+        with pytest.raises(
+            SystemExit, match="^line 3: game already stored, 2 games imported"
+        ):
+            main(
+                [
+                    "import-games",
+                    "--input",
+                    str(tmp_path / "games"),
+                    "--batch-size",
+                    "1",
+                ]
+            )